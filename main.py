@@ -1,10 +1,25 @@
-import geopandas as gp
-import matplotlib.pyplot as plt
 from sar_annulus import create_di_gdfs
 from sar_dispersions import create_da_gdfs
 from misc_func import set_gdf
 from sar_intersections import intersect_gdfs, intersect_regions
+from sar_exact import create_exact_gdf
+from sar_raster import render_statistical_areas, raster_region_poa, vector_region_poa, compare_raster_to_vector
+from sar_sensitivity import sensitivity_analysis
+from sar_resolution import resolution_report
+from sar_render import poa_colors, draw_regions, render_map
+from sar_consensus import load_profiles, consensus_region_poa
+from sar_regions import clean_regions, summarize_cleaning
+from sar_lines import intersect_lines
+from sar_timeseries import scale_distances, load_schedule, time_series_poa
+from sar_cache import cache_key, load_cached, store_cached
+from sar_watch import update_regions, collect_pieces, write_features, wait_for_change
+from sar_profile import stage, count, start_profiling, stop_profiling
+from sar_export import read_export
+from sar_output import FORMATS, write_layers
+import unit_conversions as uc
+import argparse
 import os
+import time
 
 ##### CHANGE THESE VARIABLES #####
 
@@ -33,14 +48,120 @@ EPSG_WGS84 = 4326
 # DO NOT provide any other objects like range rings or sectors.
 FILE = "POA-Test1.json"
 
-# Path where this file exists
-# Use double backspaces in the path.  i.e. "C:\\Users\\username\\Desktop\\"
-PATH = ".\\"
+# Path where the output and cache folders are created
+# Use double backspaces in the path.  i.e. "C:\\Users\\username\\Desktop"
+PATH = "."
+
+# Calculate the statistical area POA analytically from the ring radii and sector angles
+# instead of intersecting the annulus and sector polygons.
+# True = Yes, False = No
+EXACT_POA = False
+
+# Calculate the region POA from a grid of the statistical areas instead of polygon overlay.
+# Meant for very large region sets, such as auto-generated grid segments.
+# True = Yes, False = No
+RASTER_POA = False
+
+# Width of a raster cell, in meters
+RASTER_CELL_SIZE = 25
+
+# Report the difference between the raster and the polygon overlay region POA
+# True = Yes, False = No
+RASTER_COMPARE = True
+
+# Also split the lines in the json file, such as trails, roads and drainages, along the
+# statistical areas and write them as Lines_Bisected.json, with a POA by their share of each line
+# True = Yes, False = No
+LINES_POA = False
+
+# Repair self intersecting and otherwise invalid regions before the overlay
+# True = Yes, False = No
+REPAIR_REGIONS = True
+
+# Snap the regions and the region pieces to a grid of this size, in meters, i.e. 0.01.
+# Snapping removes the slivers between edges that almost match. None = Keep the vertices as drawn
+REGION_GRID_SIZE = None
+
+# Drop region fragments and region pieces smaller than this, in square meters. 0 = Keep every fragment
+REGION_MIN_AREA = 0
+
+# Resolution of the rings, arcs and sector caps. Set either the largest gap, in meters,
+# between the polygons and the true circles, or the largest relative area error, i.e. 0.001.
+# Fewer vertices make every overlay faster. None keeps the default resolution.
+GEOMETRY_TOLERANCE = None
+GEOMETRY_AREA_ERROR = None
+
+# Report the area and POA error of the statistical areas and regions against an exact reference
+# True = Yes, False = No
+RESOLUTION_REPORT = False
+
+# Report how the region POA responds to uncertainty in the LPB inputs
+# True = Yes, False = No
+SENSITIVITY = False
+
+# Number of perturbed scenarios to run
+SENSITIVITY_RUNS = 2000
+
+# Uncertainty of the LPB inputs: the standard deviation of the log scale factor
+# of the distances and dispersion angles, and of the direction of travel in degrees
+SENSITIVITY_DISTANCE_ERROR = 0.2
+SENSITIVITY_ANGLE_ERROR = 0.2
+SENSITIVITY_DOT_ERROR = 20
+
+# Number of worker processes to spread the scenarios across, None uses this process only
+SENSITIVITY_WORKERS = None
+
+# Random seed of the perturbed scenarios, None for a different set of scenarios each run
+SENSITIVITY_SEED = None
+
+# Combine several IPP and lost person profile pairs into one weighted consensus region POA.
+# The path to a json list of profiles, each with optional "name", "ipp" (the IPP marker's title),
+# "distances", "angles", "dot" and "weight" keys. Missing values fall back to the inputs above.
+# None = A single IPP and profile
+CONSENSUS_FILE = None
+
+# Project the region POA over the time the subject has been missing, one column per time step.
+# Either list the hours missing of each step, i.e. list(range(1, 49)), and the distances above are
+# scaled by (hours / TIME_SERIES_REFERENCE_HOURS) ** TIME_SERIES_EXPONENT up to the reference time,
+# or set TIME_SERIES_FILE to a json list of {"hours": h, "distances": [five distances in km]}.
+# None = No projection
+TIME_SERIES_HOURS = None
+TIME_SERIES_FILE = None
+TIME_SERIES_REFERENCE_HOURS = 24
+TIME_SERIES_EXPONENT = 0.5
+
+# Keep the annuli, sectors and statistical areas on disk and reuse them while the
+# IPP and LPB inputs stay the same
+# True = Yes, False = No
+USE_CACHE = False
+
+# Path of the cache and the size, in megabytes, it may grow to
+CACHE_PATH = os.path.join(PATH, "cache")
+CACHE_MAX_MB = 200
+
+# Keep running and recalculate whenever the json file is saved again.
+# Only the regions that were added or changed are recalculated and rewritten.
+# True = Yes, False = No
+WATCH = False
+
+# How often, in seconds, to check the json file for changes
+WATCH_INTERVAL = 1
 
 # Do you wish to see the graphic plots when you run this program
 # True = Yes, False = No
 SHOW_PLOTS = True
 
+# Write a map of the regions and their POA to the output folder, without opening a window.
+# The image format follows the file extension, i.e. "POA_Map.png" or "POA_Map.svg". None = No map
+MAP_FILE = None
+
+# The resolution of a PNG map, in pixels per inch
+MAP_DPI = 150
+
+# Leave out map labels that would overlap a higher POA label
+# True = Yes, False = No
+MAP_DECLUTTER = True
+
 # What files do you want returned for import back into SAR Topo?
 REGIONS_BISECTED = True
 STATISTICAL_INTERSECTS = True
@@ -48,65 +169,135 @@ DIPP_ANNULI = True
 DIPP_ARCS = True
 DA_SECTORS = True
 
+# The format of the returned files: "GeoJSON" for SAR Topo, or "FlatGeobuf" / "GeoParquet" for archiving
+OUTPUT_FORMAT = "GeoJSON"
+
+# Write every layer into a single file instead of one file per layer
+# True = Yes, False = No
+COMBINE_OUTPUTS = False
+
+# Number of decimal places kept in the returned coordinates, None keeps them all
+# 6 decimal places is about 10cm and makes much smaller files
+OUTPUT_PRECISION = None
+
 
 ##### DO NOT CHANGE ANYTHING BELOW THIS #####
 
-def set_variables(distances_from_ipp, dispersion_angles, direction_of_travel, file):
+# The layers that can be returned, in the order of the variables above
+OUTPUT_NAMES = ('Regions_Bisected', 'Statistical_Intersects', 'DIPP_Annuli', 'DIPP_Arcs', 'DA_Sectors')
+
+def load_export(file, EPSG_LOCAL=None, ipp_titles=('IPP',), lines=False):
     '''
-    Properly formats the input variables,loads the json file, 
-    and validates/extracts the IPP and regions.
-    
+    Loads the json file and validates/extracts the IPP and regions.
+
     Args:
-        distances_from_ipp (list): The distances from the IPP
-        dispersion_angles (list): The dispersion angles
-        direction_of_travel (int): The direction of travel
-        file (str): The path to the json file
-    
-    Returns:    
-        dipp_obj (areas): The distances from the IPP object
-        da_obj (areas): The dispersion angles object
-        ipp (geopandas.GeoDataFrame): The IPP geodataframe
+        file (str or file object): The path to the json file, or a text file object to read it from
+        EPSG_LOCAL (int): The local spatial coordinate reference system, None for the configured one
+        ipp_titles (list): The titles of the IPP markers to extract
+        lines (bool): Whether to also extract the lines, such as trails, roads and drainages
+
+    Returns:
+        ipp (geopandas.GeoDataFrame): The IPP geodataframe, one row per IPP title
         regions (geopandas.GeoDataFrame): The regions geodataframe
+        lines (geopandas.GeoDataFrame): The lines geodataframe, only returned if lines is True
     '''
+    # Resolved here rather than in the signature so --epsg-local is picked up
+    if EPSG_LOCAL is None:
+        EPSG_LOCAL = globals()['EPSG_LOCAL']
+
     try: 
-        # Load the json file
-        original_gdf = gp.read_file(file)
+        # Stream the json file, keeping only the IPP and the polygons, in the local zone
+        original_gdf = read_export(file, EPSG_LOCAL, EPSG_WGS84, ipp_title=ipp_titles, lines=lines)
     except Exception as e:
         raise ValueError(f"Error loading file: {e}") from e
-    
-    # Set the CRS to the local zone
-    original_gdf = original_gdf.to_crs(epsg=EPSG_LOCAL)
 
     # Retrieve the user defined IPP and convert to a geodataframe
-    ipp = original_gdf[original_gdf['title'] == 'IPP'][['geometry']]
-    ipp['title'] = 'IPP'
+    ipp = original_gdf[original_gdf['title'].isin(ipp_titles)][['geometry']]
+    ipp['title'] = original_gdf['title']
     ipp = set_gdf(ipp, EPSG_LOCAL)
 
     # Retrieve the user defined regions and convert them to a geodataframe
     regions = original_gdf[original_gdf.geometry.geom_type == 'Polygon']
     regions = set_gdf(regions, EPSG_LOCAL)
 
+    # Repair, snap and drop the fragments of hand drawn regions
+    with stage('clean regions') as record:
+        regions, report = clean_regions(regions, REGION_GRID_SIZE, REGION_MIN_AREA, repair=REPAIR_REGIONS)
+        regions.attrs['cleaning'] = summarize_cleaning(report)
+        count(record, regions)
+
     if regions.empty:
         raise ValueError("No regions found in the file")
     elif ipp.empty:
         raise ValueError("No IPP found in the file")
+    missing = [title for title in ipp_titles if title not in ipp.index]
+    if missing:
+        raise ValueError(f"No IPP titled {missing} found in the file")
 
-    # Create the distances from IPP object
-    #dipp_obj = dipp(name='Distances from IPP', distances=distances_from_ipp, ipp=ipp, EPSG_LOCAL=EPSG_LOCAL, EPSG_WGS84=EPSG_WGS84)
-    
-    dipp_gdf, dipp_arcs_gdf = create_di_gdfs(ipp=ipp, distances=distances_from_ipp, EPSG_LOCAL=EPSG_LOCAL)
+    if lines:
+        # Retrieve the lines, leaving out any IPP drawn as a line
+        line_gdf = original_gdf[original_gdf.geometry.geom_type.isin(['LineString', 'MultiLineString']) & ~original_gdf['title'].isin(ipp_titles)]
+        line_gdf = set_gdf(line_gdf, EPSG_LOCAL)
+        return ipp, regions, line_gdf
 
+    return ipp, regions
 
 
+def format_angles(dispersion_angles, direction_of_travel):
+    '''
+    Replaces unknown dispersion angles and direction of travel and splits
+    the dispersion angles in half.
+
+    Args:
+        dispersion_angles (list): The dispersion angles
+        direction_of_travel (int): The direction of travel
+
+    Returns:
+        half_angles (list): The dispersion angles either side of the direction of travel
+        direction_of_travel (int): The direction of travel
+    '''
     # Check if the dispersion angles and direction of travel are known
     if dispersion_angles is None or direction_of_travel is None:
         dispersion_angles = [0, 0, 0, 0, 0]
         direction_of_travel = 0
 
     # Split the dispersion angles in half (either side from the direction of travel)
-    dispersion_angles = [i / 2 for i in dispersion_angles]
+    half_angles = [i / 2 for i in dispersion_angles]
+
+    return half_angles, direction_of_travel
+
+
+def set_variables(distances_from_ipp, dispersion_angles, direction_of_travel, file, EPSG_LOCAL=None):
+    '''
+    Properly formats the input variables,loads the json file, 
+    and validates/extracts the IPP and regions.
+    
+    Args:
+        distances_from_ipp (list): The distances from the IPP
+        dispersion_angles (list): The dispersion angles
+        direction_of_travel (int): The direction of travel
+        file (str): The path to the json file
+        EPSG_LOCAL (int): The local spatial coordinate reference system, None for the configured one
+    
+    Returns:    
+        regions (geopandas.GeoDataFrame): The regions geodataframe
+        dipp_gdf (geopandas.GeoDataFrame): The DIPP annuli geodataframe
+        dipp_arcs_gdf (geopandas.GeoDataFrame): The DIPP arcs geodataframe
+        da_gdf (geopandas.GeoDataFrame): The DA sectors geodataframe
+    '''
+    if EPSG_LOCAL is None:
+        EPSG_LOCAL = globals()['EPSG_LOCAL']
+    ipp, regions = load_export(file, EPSG_LOCAL)
+
+    # Create the distances from IPP object
+    #dipp_obj = dipp(name='Distances from IPP', distances=distances_from_ipp, ipp=ipp, EPSG_LOCAL=EPSG_LOCAL, EPSG_WGS84=EPSG_WGS84)
+    
+    dipp_gdf, dipp_arcs_gdf = create_di_gdfs(ipp=ipp, distances=distances_from_ipp, EPSG_LOCAL=EPSG_LOCAL)
+
+    dispersion_angles, direction_of_travel = format_angles(dispersion_angles, direction_of_travel)
 
-    da_gdf = create_da_gdfs(angles=dispersion_angles, ipp=ipp, dot=direction_of_travel, max_distance=max(distances_from_ipp), EPSG_LOCAL=EPSG_LOCAL)
+    # The sectors are clipped to the outer ring, in meters
+    da_gdf = create_da_gdfs(angles=dispersion_angles, ipp=ipp, dot=direction_of_travel, max_distance=max(uc.km_to_m(distances_from_ipp)), EPSG_LOCAL=EPSG_LOCAL)
     
     return regions, dipp_gdf, dipp_arcs_gdf, da_gdf 
 
@@ -116,14 +307,9 @@ def  assign_POA_colors(gdf):
     Normalizes the 'POA' column to a range of 0-1 and assigns a color
     to each based on the autumn heatmap
     '''
-    # Normalize the POA values to a range of 0-1
+    # Normalize and convert the POA values to hex colors in one pass
     if ('Region_Portion_POA' in gdf.columns):
-        gdf['fill'] = (gdf['Region_Portion_POA'] - gdf['Region_Portion_POA'].min()) / (gdf['Region_Portion_POA'].max() - gdf['Region_Portion_POA'].min())
-    
-    # Assign a color to each POA value based on the autumn colormap
-    gdf['fill'] = gdf['fill'].apply(lambda x: plt.cm.autumn(x))
-    # Convert the color to a hex value
-    gdf['fill'] = gdf['fill'].apply(lambda x: f"#{int(x[0]*255):02x}{int(x[1]*255):02x}{int(x[2]*255):02x}")
+        gdf['fill'] = poa_colors(gdf['Region_Portion_POA'].to_numpy())
     # Set the stroke, stroke-width, and fill-opacity columns
     gdf['stroke'] = '#000000'
     gdf['stroke-width'] = 1
@@ -134,46 +320,588 @@ def  assign_POA_colors(gdf):
 
 
 
-def main():
-    # Read the input variables and set the geodataframes
-    regions, dipp_gdf, dipp_arcs_gdf, da_gdf = set_variables(distances_from_ipp, dispersion_angles, direction_of_travel, FILE)
+def selected_outputs():
+    '''
+    Returns the names of the layers the user wants returned for SAR Topo.
+    '''
+    flags = (REGIONS_BISECTED, STATISTICAL_INTERSECTS, DIPP_ANNULI, DIPP_ARCS, DA_SECTORS)
+    return [name for name, wanted in zip(OUTPUT_NAMES, flags) if wanted]
+
+
+def output_path():
+    '''
+    Returns the directory the output files are written to.
+    '''
+    return os.path.join(PATH, "output")
+
+
+def geometry_resolution():
+    '''
+    Returns the resolution settings of the rings, arcs and sector caps, empty for the default resolution.
+    '''
+    settings = {'tolerance': GEOMETRY_TOLERANCE, 'area_error': GEOMETRY_AREA_ERROR}
+    return {name: value for name, value in settings.items() if value is not None}
+
+
+def build_statistical_areas(ipp, distances_from_ipp, dispersion_angles, direction_of_travel, EPSG_LOCAL, exact=False, outputs=(), resolution=None):
+    '''
+    Builds the annuli, arcs, sectors and the statistical areas they intersect into.
+
+    Args:
+        ipp (geopandas.GeoDataFrame): The IPP geodataframe
+        distances_from_ipp (list): The distances from the IPP
+        dispersion_angles (list): The dispersion angles
+        direction_of_travel (int): The direction of travel
+        EPSG_LOCAL (int): The local spatial coordinate reference system
+        exact (bool): Whether to calculate the statistical area POA analytically
+        outputs (list): The names of the layers that will be written out
+        resolution (dict): The tolerance or area_error of the rings, arcs and sector caps, None for the default resolution
+
+    Returns:
+        layers (dict): The geodataframes keyed by output name. Layers that were not
+            needed in exact mode are None.
+    '''
+    resolution = resolution or {}
+    angles, dot = format_angles(dispersion_angles, direction_of_travel)
+    # The sectors are clipped to the outer ring, in meters
+    max_distance = max(uc.km_to_m(distances_from_ipp))
+
+    if exact:
+        # Build the statistical areas directly with their exact POA values
+        with stage('intersects') as record:
+            intersects_gdf = create_exact_gdf(ipp=ipp, distances=distances_from_ipp, angles=angles, dot=dot, EPSG_LOCAL=EPSG_LOCAL, **resolution)
+            count(record, intersects_gdf)
+
+        # Only build the annuli and sectors if they are written out
+        dipp_gdf, dipp_arcs_gdf, da_gdf = None, None, None
+        if 'DIPP_Annuli' in outputs or 'DIPP_Arcs' in outputs:
+            with stage('annuli') as record:
+                dipp_gdf, dipp_arcs_gdf = create_di_gdfs(ipp=ipp, distances=distances_from_ipp, EPSG_LOCAL=EPSG_LOCAL, **resolution)
+                count(record, dipp_gdf)
+        if 'DA_Sectors' in outputs:
+            with stage('sectors') as record:
+                da_gdf = create_da_gdfs(angles=angles, ipp=ipp, dot=dot, max_distance=max_distance, EPSG_LOCAL=EPSG_LOCAL, **resolution)
+                count(record, da_gdf)
+    else:
+        with stage('annuli') as record:
+            dipp_gdf, dipp_arcs_gdf = create_di_gdfs(ipp=ipp, distances=distances_from_ipp, EPSG_LOCAL=EPSG_LOCAL, **resolution)
+            count(record, dipp_gdf)
+        with stage('sectors') as record:
+            da_gdf = create_da_gdfs(angles=angles, ipp=ipp, dot=dot, max_distance=max_distance, EPSG_LOCAL=EPSG_LOCAL, **resolution)
+            count(record, da_gdf)
+
+        # Intersect the DIPP annuli with the DA sectors
+        with stage('intersects') as record:
+            intersects_gdf = intersect_gdfs(gdf1=dipp_gdf, gdf2=da_gdf, EPSG_LOCAL=EPSG_LOCAL, include_math='Statistical_Intersects' in outputs)
+            count(record, intersects_gdf)
+
+    return {
+        'Statistical_Intersects': intersects_gdf,
+        'DIPP_Annuli': dipp_gdf,
+        'DIPP_Arcs': dipp_arcs_gdf,
+        'DA_Sectors': da_gdf,
+    }
+
+
+def statistical_areas(ipp, distances_from_ipp, dispersion_angles, direction_of_travel, EPSG_LOCAL, exact=False, outputs=(), cache_dir=None, resolution=None):
+    '''
+    Returns the statistical layers from the cache, building and caching them if they are missing.
+
+    Args:
+        ipp (geopandas.GeoDataFrame): The IPP geodataframe
+        distances_from_ipp (list): The distances from the IPP
+        dispersion_angles (list): The dispersion angles
+        direction_of_travel (int): The direction of travel
+        EPSG_LOCAL (int): The local spatial coordinate reference system
+        exact (bool): Whether to calculate the statistical area POA analytically
+        outputs (list): The names of the layers that will be written out
+        cache_dir (str): The statistical area cache directory, None to always rebuild them
+        resolution (dict): The tolerance or area_error of the rings, arcs and sector caps, None for the default resolution
+
+    Returns:
+        layers (dict): The geodataframes keyed by output name
+    '''
+    layers = None
+    if cache_dir is not None:
+        key = cache_key(ipp, distances_from_ipp, dispersion_angles, direction_of_travel, EPSG_LOCAL, exact=exact, math='Statistical_Intersects' in outputs, **(resolution or {}))
+        layers = load_cached(cache_dir, key)
+        # An exact mode entry may not hold every layer this run writes out
+        if layers is not None and any(layers.get(name, True) is None for name in outputs):
+            layers = None
+
+    if layers is None:
+        layers = build_statistical_areas(ipp, distances_from_ipp, dispersion_angles, direction_of_travel, EPSG_LOCAL, exact=exact, outputs=outputs, resolution=resolution)
+        if cache_dir is not None:
+            store_cached(cache_dir, key, layers, CACHE_MAX_MB * 1024 * 1024)
+
+    return layers
+
+
+def calculate_poa(file, distances_from_ipp, dispersion_angles, direction_of_travel, EPSG_LOCAL, exact=False, outputs=(), cache_dir=None, resolution=None, lines=False):
+    '''
+    Runs the POA calculation for a single SAR Topo export.
+
+    Args:
+        file (str): The path to the json file
+        distances_from_ipp (list): The distances from the IPP
+        dispersion_angles (list): The dispersion angles
+        direction_of_travel (int): The direction of travel
+        EPSG_LOCAL (int): The local spatial coordinate reference system
+        exact (bool): Whether to calculate the statistical area POA analytically
+        outputs (list): The names of the layers that will be written out
+        cache_dir (str): The statistical area cache directory, None to always rebuild them
+        resolution (dict): The tolerance or area_error of the rings, arcs and sector caps, None for the default resolution
+        lines (bool): Whether to also split the lines in the file along the statistical areas, as 'Lines_Bisected'
+
+    Returns:
+        layers (dict): The geodataframes keyed by output name. Layers that were not
+            needed in exact mode are None.
+    '''
+    if lines:
+        ipp, regions, line_gdf = load_export(file, EPSG_LOCAL, lines=True)
+    else:
+        ipp, regions = load_export(file, EPSG_LOCAL)
+    layers = statistical_areas(ipp, distances_from_ipp, dispersion_angles, direction_of_travel, EPSG_LOCAL, exact=exact, outputs=outputs, cache_dir=cache_dir, resolution=resolution)
+
+    # Intersect the regions with the statistical areas
+    with stage('region overlay') as record:
+        layers['Regions_Bisected'] = intersect_regions(regions, layers['Statistical_Intersects'], EPSG_LOCAL,
+                                                       grid_size=REGION_GRID_SIZE, min_area=REGION_MIN_AREA)
+        count(record, layers['Regions_Bisected'])
+    layers['Regions_Bisected'].attrs['cleaning'] = dict(regions.attrs['cleaning'], dropped_piece_area_m2=layers['Regions_Bisected'].attrs['dropped_area'])
+
+    # Split the lines along the statistical areas
+    if lines:
+        with stage('line overlay') as record:
+            layers['Lines_Bisected'] = intersect_lines(line_gdf, layers['Statistical_Intersects'], EPSG_LOCAL)
+            count(record, layers['Lines_Bisected'])
+
+    return layers
+
+
+def write_outputs(layers, outpath):
+    '''
+    Writes the layers to files in WGS84 for import back into SAR Topo.
+
+    Args:
+        layers (dict): The geodataframes keyed by output name
+        outpath (str): The directory to write the files to
+    '''
+    write_layers(layers, outpath, EPSG_WGS84, output_format=OUTPUT_FORMAT, combined=COMBINE_OUTPUTS, precision=OUTPUT_PRECISION)
+
+
+def run_raster():
+    '''
+    Calculates the region POA from a grid of the statistical areas and, if requested,
+    reports its difference from the polygon overlay.
+
+    Returns:
+        region_poa (pandas.Series or pandas.DataFrame): The region POA, or the comparison report
+    '''
+    ipp, regions = load_export(FILE, EPSG_LOCAL)
+    angles, dot = format_angles(dispersion_angles, direction_of_travel)
+
+    # Render the statistical areas over the regions and count the cells of each inside each region
+    grid, x_centers, y_centers, area_poa = render_statistical_areas(ipp=ipp, distances=distances_from_ipp, angles=angles, dot=dot, bounds=regions.total_bounds, cell_size=RASTER_CELL_SIZE)
+    region_poa = raster_region_poa(regions, grid, x_centers, y_centers, area_poa)
+
+    if RASTER_COMPARE:
+        intersects_gdf = create_exact_gdf(ipp=ipp, distances=distances_from_ipp, angles=angles, dot=dot, EPSG_LOCAL=EPSG_LOCAL)
+        region_poa, summary = compare_raster_to_vector(region_poa, vector_region_poa(regions, intersects_gdf))
+        print(summary)
+
+    return region_poa
+
 
-    # Intersect the DIPP annuli with the DA sectors
-    intersects_gdf = intersect_gdfs(gdf1=dipp_gdf, gdf2=da_gdf, EPSG_LOCAL=EPSG_LOCAL)
+def run_sensitivity():
+    '''
+    Runs the LPB input sensitivity analysis and writes the report to the output directory.
+
+    Returns:
+        report (pandas.DataFrame): The per region POA and rank statistics
+    '''
+    ipp, regions = load_export(FILE, EPSG_LOCAL)
+    angles, dot = format_angles(dispersion_angles, direction_of_travel)
+
+    report = sensitivity_analysis(regions, ipp, distances_from_ipp, angles, dot, runs=SENSITIVITY_RUNS,
+                                  distance_error=SENSITIVITY_DISTANCE_ERROR, angle_error=SENSITIVITY_ANGLE_ERROR,
+                                  dot_error=SENSITIVITY_DOT_ERROR, workers=SENSITIVITY_WORKERS, seed=SENSITIVITY_SEED)
+
+    outpath = output_path()
+    if not os.path.exists(outpath):
+        os.makedirs(outpath)
+    report.to_csv(os.path.join(outpath, "POA_Sensitivity.csv"))
 
-    # Intersect the regions with the DIPP annuli
-    region_intersections_gdf = intersect_regions(regions, intersects_gdf, EPSG_LOCAL)
+    return report
+
+
+def run_consensus():
+    '''
+    Calculates the region POA of every IPP and profile pair, and their weighted consensus,
+    and writes the table to the output directory.
+
+    Returns:
+        table (pandas.DataFrame): The Region_POA of each region under each profile and the Consensus_POA
+    '''
+    profiles = load_profiles(CONSENSUS_FILE, distances_from_ipp, dispersion_angles, direction_of_travel)
+    ipp_titles = list(dict.fromkeys(profile['ipp'] for profile in profiles))
+    ipps, regions = load_export(FILE, EPSG_LOCAL, ipp_titles=ipp_titles)
+
+    # Only the statistical areas are built per profile, the regions are overlaid once
+    cell_layers = []
+    with stage('statistical areas'):
+        for profile in profiles:
+            ipp = ipps.loc[[profile['ipp']]].iloc[:1]
+            layers = statistical_areas(ipp, profile['distances'], profile['angles'], profile['dot'], EPSG_LOCAL, exact=EXACT_POA,
+                                       outputs=['Statistical_Intersects'], cache_dir=CACHE_PATH if USE_CACHE else None,
+                                       resolution=geometry_resolution())
+            cell_layers.append(layers['Statistical_Intersects'])
+    with stage('consensus overlay') as record:
+        table = consensus_region_poa(regions, cell_layers, [profile['weight'] for profile in profiles],
+                                     [profile['name'] for profile in profiles], grid_size=REGION_GRID_SIZE, min_area=REGION_MIN_AREA)
+        count(record, regions)
+
+    outpath = output_path()
+    if not os.path.exists(outpath):
+        os.makedirs(outpath)
+    table.to_csv(os.path.join(outpath, "POA_Consensus.csv"))
+
+    return table
+
+
+def run_time_series():
+    '''
+    Projects the region POA over the time the subject has been missing and writes
+    the table to the output directory.
+
+    Returns:
+        table (pandas.DataFrame): The Region_POA of each region (rows) at each time step (columns)
+    '''
+    if TIME_SERIES_FILE:
+        hours, distances = load_schedule(TIME_SERIES_FILE)
+    else:
+        hours = TIME_SERIES_HOURS
+        distances = scale_distances(distances_from_ipp, hours, TIME_SERIES_REFERENCE_HOURS, TIME_SERIES_EXPONENT)
+
+    ipp, regions = load_export(FILE, EPSG_LOCAL)
+    angles, dot = format_angles(dispersion_angles, direction_of_travel)
+    with stage('time series') as record:
+        table = time_series_poa(regions, ipp, distances, angles, dot, EPSG_LOCAL, hours=hours, resolution=geometry_resolution())
+        count(record, regions)
+
+    outpath = output_path()
+    if not os.path.exists(outpath):
+        os.makedirs(outpath)
+    table.to_csv(os.path.join(outpath, "POA_Time_Series.csv"))
+
+    return table
+
+
+def run_resolution_report(intersects_gdf):
+    '''
+    Measures the area and POA error of the statistical areas and regions against an exact
+    reference and writes the reports to the output directory.
+
+    Args:
+        intersects_gdf (geopandas.GeoDataFrame): The statistical areas the regions were intersected with
+
+    Returns:
+        summary (dict): The vertex count and the largest and mean errors
+    '''
+    ipp, regions = load_export(FILE, EPSG_LOCAL)
+    angles, dot = format_angles(dispersion_angles, direction_of_travel)
+    cells, region_errors, summary = resolution_report(intersects_gdf, regions, ipp, distances_from_ipp, angles, dot, EPSG_LOCAL)
+
+    outpath = output_path()
+    if not os.path.exists(outpath):
+        os.makedirs(outpath)
+    cells.to_csv(os.path.join(outpath, "POA_Resolution_Areas.csv"))
+    region_errors.to_csv(os.path.join(outpath, "POA_Resolution_Regions.csv"))
+
+    return summary
+
+
+def run_watch():
+    '''
+    Recalculates the region POA each time the json file changes, until interrupted.
+    The statistical layers are only rebuilt and rewritten when the IPP moves.
+    Separate GeoJSON files reuse the serialized features of the unchanged regions,
+    other formats and combined outputs rewrite the region layer through write_outputs.
+    '''
+    outputs = selected_outputs()
+    outpath = output_path()
+    cache_dir = CACHE_PATH if USE_CACHE else None
+    state, statistical_key, layers = {}, None, None
+    serialize = OUTPUT_FORMAT == 'GeoJSON' and not COMBINE_OUTPUTS
+
+    stat = None
+    while True:
+        try:
+            current = os.stat(FILE)
+            stat = (current.st_mtime_ns, current.st_size)
+            start = time.perf_counter()
+            ipp, regions = load_export(FILE, EPSG_LOCAL)
+
+            # Rebuild the statistical layers and every region if the IPP moved
+            key = cache_key(ipp, distances_from_ipp, dispersion_angles, direction_of_travel, EPSG_LOCAL, exact=EXACT_POA, **geometry_resolution())
+            if key != statistical_key:
+                layers = statistical_areas(ipp, distances_from_ipp, dispersion_angles, direction_of_travel, EPSG_LOCAL, exact=EXACT_POA, outputs=outputs, cache_dir=cache_dir, resolution=geometry_resolution())
+                # A combined file is written with the regions below
+                if not COMBINE_OUTPUTS:
+                    write_outputs({name: layers[name] for name in outputs if name != 'Regions_Bisected'}, outpath)
+                state, statistical_key = {}, key
+
+            state, changes = update_regions(state, regions, layers['Statistical_Intersects'], EPSG_LOCAL, EPSG_WGS84,
+                                            grid_size=REGION_GRID_SIZE, min_area=REGION_MIN_AREA,
+                                            precision=OUTPUT_PRECISION, serialize=serialize)
+            # Moving the IPP marks every region as added, so this also catches rebuilt layers
+            if changes['added'] or changes['changed'] or changes['removed']:
+                if COMBINE_OUTPUTS:
+                    write_outputs({name: collect_pieces(state) if name == 'Regions_Bisected' else layers[name] for name in outputs}, outpath)
+                elif 'Regions_Bisected' in outputs and serialize:
+                    os.makedirs(outpath, exist_ok=True)
+                    write_features(state['features'], state['keys'], os.path.join(outpath, "Regions_Bisected.json"))
+                elif 'Regions_Bisected' in outputs:
+                    write_outputs({'Regions_Bisected': collect_pieces(state)}, outpath)
+
+            print(f"{len(changes['added'])} added, {len(changes['changed'])} changed, {len(changes['removed'])} removed "
+                  f"regions in {time.perf_counter() - start:.2f}s")
+        except (OSError, ValueError) as e:
+            print(e)
+
+        try:
+            stat = wait_for_change(FILE, stat, WATCH_INTERVAL)
+        except KeyboardInterrupt:
+            return
+
+
+def main():
+    # The raster mode replaces the polygon overlay and its outputs
+    if RASTER_POA:
+        region_poa = run_raster()
+        print(region_poa)
+        return
+
+    if SENSITIVITY:
+        print(run_sensitivity())
+        return
+
+    if WATCH:
+        run_watch()
+        return
+
+    if CONSENSUS_FILE:
+        print(run_consensus())
+        return
+
+    if TIME_SERIES_HOURS or TIME_SERIES_FILE:
+        print(run_time_series())
+        return
+
+    # Calculate the region POA and the statistical layers
+    outputs = selected_outputs()
+    layers = calculate_poa(FILE, distances_from_ipp, dispersion_angles, direction_of_travel, EPSG_LOCAL, exact=EXACT_POA, outputs=outputs,
+                           cache_dir=CACHE_PATH if USE_CACHE else None, resolution=geometry_resolution(), lines=LINES_POA)
+    region_intersections_gdf = layers['Regions_Bisected']
 
     # Output the results to the console
     print(region_intersections_gdf[['Region_Portion_POA', 'Region_POA']])
+    if LINES_POA:
+        print(layers['Lines_Bisected'][['Length_km', 'Line_Portion', 'Segment_POA', 'Line_POA']])
+        outputs = outputs + ['Lines_Bisected']
+
+    # Report what was repaired or dropped from the regions
+    cleaning = region_intersections_gdf.attrs.get('cleaning', {})
+    if any(cleaning.values()):
+        print(f"Cleaned regions: {cleaning}")
+
+    if RESOLUTION_REPORT:
+        print(run_resolution_report(layers['Statistical_Intersects']))
     
+    if SHOW_PLOTS or MAP_FILE:
+        with stage('coloring'):
+            region_intersections_gdf = assign_POA_colors(region_intersections_gdf)
+        layers['Regions_Bisected'] = region_intersections_gdf
+
+    # If the user wants a map file, draw it without opening a window
+    if MAP_FILE:
+        with stage('map') as record:
+            outpath = output_path()
+            if not os.path.exists(outpath):
+                os.makedirs(outpath)
+            render_map(region_intersections_gdf, os.path.join(outpath, MAP_FILE), dpi=MAP_DPI, declutter_labels=MAP_DECLUTTER)
+            count(record, region_intersections_gdf)
+
     # If the user wants to see the plots, display them
     if SHOW_PLOTS:
-        region_intersections_gdf = assign_POA_colors(region_intersections_gdf)
-        region_intersections_gdf.plot(color=region_intersections_gdf['fill'], edgecolor=region_intersections_gdf['stroke'], linewidth=region_intersections_gdf['stroke-width'], alpha=region_intersections_gdf['fill-opacity'])
-        for idx, row in region_intersections_gdf.iterrows():
-            plt.text(row.geometry.centroid.x, row.geometry.centroid.y, idx + " \n POA: " + str(row['Region_Portion_POA']), fontsize=8, ha='center', va='center')
-        plt.show()
+        import matplotlib.pyplot as plt
 
-    # Create a subdirectory 'output' if it doesn't exist
-    outpath = PATH + "output\\"    
-    if not os.path.exists(outpath):
-        os.makedirs(outpath)
+        with stage('plotting') as record:
+            fig, ax = plt.subplots()
+            draw_regions(ax, region_intersections_gdf)
+            count(record, region_intersections_gdf)
+        plt.show()
 
     # Save the geodataframes to a json files based on user input
-    if REGIONS_BISECTED:
-        region_intersections_gdf.to_crs(epsg=EPSG_WGS84).to_file(outpath + "Regions_Bisected.json", driver='GeoJSON')
-    if STATISTICAL_INTERSECTS:
-        intersects_gdf.to_crs(epsg=EPSG_WGS84).to_file(outpath + "Statistical_Intersects.json", driver='GeoJSON')
-    if DIPP_ANNULI:
-        dipp_gdf.to_crs(epsg=EPSG_WGS84).to_file(outpath + "DIPP_Annuli.json", driver='GeoJSON')
-    if DIPP_ARCS:
-        dipp_arcs_gdf.to_crs(epsg=EPSG_WGS84).to_file(outpath + "DIPP_Arcs.json", driver='GeoJSON')
-    if DA_SECTORS:
-        da_gdf.to_crs(epsg=EPSG_WGS84).to_file(outpath + "DA_Sectors.json", driver='GeoJSON')
-    
-    
-    
+    write_outputs({name: layers[name] for name in outputs}, output_path())
+
+
+def run_profiled(report_path, cprofile_path=None):
+    '''
+    Runs the program with every stage timed and writes the stage report.
+
+    Args:
+        report_path (str): The json file to write the stage report to
+        cprofile_path (str): The file to write the cProfile stats of the slowest stage to,
+            None to skip cProfile
+    '''
+    profiler = start_profiling(cprofile=cprofile_path is not None)
+    try:
+        main()
+    finally:
+        stop_profiling()
+        profiler.write(report_path, cprofile_path)
+        print(f"Stage report written to {report_path}")
+
+
+def parse_arguments(argv=None):
+    '''
+    Reads the options from the command line. Every option defaults to the
+    variables at the top of this file.
+
+    Args:
+        argv (list): The command line arguments, None to use sys.argv
+
+    Returns:
+        args (argparse.Namespace): The options
+    '''
+    parser = argparse.ArgumentParser(description="Calculate the region POA from a SAR Topo export")
+    flag = argparse.BooleanOptionalAction
+
+    parser.add_argument('file', nargs='?', default=FILE, help="The json file with the IPP marker and region polygons")
+    parser.add_argument('--path', default=PATH, help="The directory the output and cache folders are created in")
+
+    lpb = parser.add_argument_group("LPB inputs")
+    lpb.add_argument('--distances', type=float, nargs=5, default=distances_from_ipp, metavar='KM', help="The five distances from the IPP, in km")
+    lpb.add_argument('--angles', type=_optional_float, nargs=5, default=dispersion_angles, metavar='DEG', help="The five dispersion angles, in degrees, or 'none' if not known")
+    lpb.add_argument('--dot', type=_optional_float, default=direction_of_travel, metavar='DEG', help="The direction of travel, in degrees true north, or 'none' if not known")
+    lpb.add_argument('--epsg-local', type=int, default=EPSG_LOCAL, help="The local spatial coordinate reference system")
+    lpb.add_argument('--epsg-wgs84', type=int, default=EPSG_WGS84, help="The spatial coordinate reference system of the export")
+
+    modes = parser.add_argument_group("Modes")
+    modes.add_argument('--exact', action=flag, default=EXACT_POA, help="Calculate the statistical area POA analytically")
+    modes.add_argument('--lines', action=flag, default=LINES_POA, help="Also split the lines, such as trails, along the statistical areas")
+    modes.add_argument('--repair-regions', action=flag, default=REPAIR_REGIONS, help="Repair self intersecting and otherwise invalid regions")
+    modes.add_argument('--grid-size', type=float, default=REGION_GRID_SIZE, help="Snap the regions and region pieces to a grid of this size, in meters")
+    modes.add_argument('--min-area', type=float, default=REGION_MIN_AREA, help="Drop region fragments and pieces smaller than this, in square meters")
+    modes.add_argument('--tolerance', type=float, default=GEOMETRY_TOLERANCE, help="The largest gap, in meters, between the ring, arc and sector cap polygons and the true circles")
+    modes.add_argument('--area-error', type=float, default=GEOMETRY_AREA_ERROR, help="The largest relative area error of the ring, arc and sector cap polygons")
+    modes.add_argument('--resolution-report', action=flag, default=RESOLUTION_REPORT, help="Report the area and POA error against an exact reference")
+    modes.add_argument('--raster', action=flag, default=RASTER_POA, help="Calculate the region POA from a grid of the statistical areas")
+    modes.add_argument('--raster-cell-size', type=float, default=RASTER_CELL_SIZE, help="The width of a raster cell, in meters")
+    modes.add_argument('--raster-compare', action=flag, default=RASTER_COMPARE, help="Report the raster difference from the polygon overlay")
+    modes.add_argument('--sensitivity', action=flag, default=SENSITIVITY, help="Report how the region POA responds to LPB input uncertainty")
+    modes.add_argument('--sensitivity-runs', type=int, default=SENSITIVITY_RUNS, help="The number of perturbed scenarios")
+    modes.add_argument('--sensitivity-distance-error', type=float, default=SENSITIVITY_DISTANCE_ERROR, help="The log scale error of the distances")
+    modes.add_argument('--sensitivity-angle-error', type=float, default=SENSITIVITY_ANGLE_ERROR, help="The log scale error of the dispersion angles")
+    modes.add_argument('--sensitivity-dot-error', type=float, default=SENSITIVITY_DOT_ERROR, help="The error of the direction of travel, in degrees")
+    modes.add_argument('--sensitivity-workers', type=int, default=SENSITIVITY_WORKERS, help="The number of worker processes for the scenarios")
+    modes.add_argument('--seed', type=int, default=SENSITIVITY_SEED, help="The random seed of the scenarios, to reproduce a sensitivity report")
+    modes.add_argument('--consensus', default=CONSENSUS_FILE, metavar='PROFILES',
+                       help="Combine the IPP and profile pairs in a json file into a weighted consensus region POA")
+    modes.add_argument('--time-series', type=float, nargs='+', default=TIME_SERIES_HOURS, metavar='HOURS',
+                       help="Project the region POA at each of these hours missing, scaling the distances")
+    modes.add_argument('--time-series-file', default=TIME_SERIES_FILE, metavar='SCHEDULE',
+                       help="Project the region POA over a json schedule of distance tables")
+    modes.add_argument('--reference-hours', type=float, default=TIME_SERIES_REFERENCE_HOURS, help="The hours missing at which the full distances are reached")
+    modes.add_argument('--growth-exponent', type=float, default=TIME_SERIES_EXPONENT, help="How fast the distances grow with the hours missing")
+    modes.add_argument('--watch', action=flag, default=WATCH, help="Recalculate whenever the json file is saved again")
+    modes.add_argument('--watch-interval', type=float, default=WATCH_INTERVAL, help="How often to check the json file, in seconds")
+
+    cache = parser.add_argument_group("Cache")
+    cache.add_argument('--cache', action=flag, default=USE_CACHE, help="Reuse the statistical areas while the IPP and LPB inputs stay the same")
+    cache.add_argument('--cache-path', help="The cache directory, defaults to the cache folder in --path")
+    cache.add_argument('--cache-max-mb', type=float, default=CACHE_MAX_MB, help="The size the cache may grow to, in megabytes")
+
+    output = parser.add_argument_group("Output")
+    output.add_argument('--show-plots', action=flag, default=SHOW_PLOTS, help="Display the regions and their POA")
+    output.add_argument('--map', default=MAP_FILE, metavar='FILE', help="Write a PNG or SVG map of the regions and their POA to the output folder")
+    output.add_argument('--map-dpi', type=int, default=MAP_DPI, help="The resolution of a PNG map, in pixels per inch")
+    output.add_argument('--declutter', action=flag, default=MAP_DECLUTTER, help="Leave out map labels that would overlap a higher POA label")
+    output.add_argument('--outputs', nargs='*', choices=OUTPUT_NAMES, default=selected_outputs(), help="The layers to write out")
+    output.add_argument('--format', choices=list(FORMATS), default=OUTPUT_FORMAT, help="The format of the output files")
+    output.add_argument('--combine', action=flag, default=COMBINE_OUTPUTS, help="Write every layer into a single file")
+    output.add_argument('--precision', type=int, default=OUTPUT_PRECISION, help="The number of decimal places kept in the output coordinates")
+    output.add_argument('--profile', nargs='?', const='profile.json', metavar='REPORT',
+                        help="Write the wall time, peak Python heap and resident memory, and feature/vertex counts of each stage to a json file")
+    output.add_argument('--cprofile', metavar='FILE', help="With --profile, also write the cProfile stats of the slowest stage")
+
+    args = parser.parse_args(argv)
+    if None in args.angles and any(angle is not None for angle in args.angles):
+        parser.error("--angles must all be numbers or all be 'none'")
+    return args
+
+
+def configure(args):
+    '''
+    Replaces the variables at the top of this file with the command line options.
+
+    Args:
+        args (argparse.Namespace): The options, from parse_arguments
+    '''
+    global FILE, PATH, distances_from_ipp, dispersion_angles, direction_of_travel, EPSG_LOCAL, EPSG_WGS84
+    global LINES_POA, REPAIR_REGIONS, REGION_GRID_SIZE, REGION_MIN_AREA
+    global EXACT_POA, GEOMETRY_TOLERANCE, GEOMETRY_AREA_ERROR, RESOLUTION_REPORT, RASTER_POA, RASTER_CELL_SIZE, RASTER_COMPARE
+    global SENSITIVITY, SENSITIVITY_RUNS, SENSITIVITY_DISTANCE_ERROR, SENSITIVITY_ANGLE_ERROR, SENSITIVITY_DOT_ERROR, SENSITIVITY_WORKERS, SENSITIVITY_SEED
+    global TIME_SERIES_HOURS, TIME_SERIES_FILE, TIME_SERIES_REFERENCE_HOURS, TIME_SERIES_EXPONENT
+    global CONSENSUS_FILE, WATCH, WATCH_INTERVAL, USE_CACHE, CACHE_PATH, CACHE_MAX_MB
+    global SHOW_PLOTS, MAP_FILE, MAP_DPI, MAP_DECLUTTER, REGIONS_BISECTED, STATISTICAL_INTERSECTS, DIPP_ANNULI, DIPP_ARCS, DA_SECTORS
+    global OUTPUT_FORMAT, COMBINE_OUTPUTS, OUTPUT_PRECISION
+
+    FILE, PATH = args.file, args.path
+    distances_from_ipp = args.distances
+    # Unknown angles are passed on as None, like the variables above
+    dispersion_angles = None if None in args.angles else args.angles
+    direction_of_travel = args.dot
+    EPSG_LOCAL, EPSG_WGS84 = args.epsg_local, args.epsg_wgs84
+
+    EXACT_POA = args.exact
+    LINES_POA = args.lines
+    REPAIR_REGIONS, REGION_GRID_SIZE, REGION_MIN_AREA = args.repair_regions, args.grid_size, args.min_area
+    GEOMETRY_TOLERANCE, GEOMETRY_AREA_ERROR, RESOLUTION_REPORT = args.tolerance, args.area_error, args.resolution_report
+    RASTER_POA, RASTER_CELL_SIZE, RASTER_COMPARE = args.raster, args.raster_cell_size, args.raster_compare
+    SENSITIVITY, SENSITIVITY_RUNS = args.sensitivity, args.sensitivity_runs
+    SENSITIVITY_DISTANCE_ERROR, SENSITIVITY_ANGLE_ERROR = args.sensitivity_distance_error, args.sensitivity_angle_error
+    SENSITIVITY_DOT_ERROR, SENSITIVITY_WORKERS = args.sensitivity_dot_error, args.sensitivity_workers
+    SENSITIVITY_SEED = args.seed
+    CONSENSUS_FILE = args.consensus
+    TIME_SERIES_HOURS, TIME_SERIES_FILE = args.time_series, args.time_series_file
+    TIME_SERIES_REFERENCE_HOURS, TIME_SERIES_EXPONENT = args.reference_hours, args.growth_exponent
+    WATCH, WATCH_INTERVAL = args.watch, args.watch_interval
+    USE_CACHE, CACHE_MAX_MB = args.cache, args.cache_max_mb
+    CACHE_PATH = args.cache_path or os.path.join(PATH, "cache")
+
+    SHOW_PLOTS = args.show_plots
+    MAP_FILE, MAP_DPI, MAP_DECLUTTER = args.map, args.map_dpi, args.declutter
+    REGIONS_BISECTED, STATISTICAL_INTERSECTS, DIPP_ANNULI, DIPP_ARCS, DA_SECTORS = (name in args.outputs for name in OUTPUT_NAMES)
+    OUTPUT_FORMAT, COMBINE_OUTPUTS, OUTPUT_PRECISION = args.format, args.combine, args.precision
+
+
+def _optional_float(value):
+    '''
+    Parses a number, or 'none' for a value that is not known.
+    '''
+    if value.lower() == 'none':
+        return None
+    return float(value)
+
+
 if __name__ == '__main__':
 
-    main()
\ No newline at end of file
+    args = parse_arguments()
+    configure(args)
+
+    if args.profile:
+        run_profiled(args.profile, args.cprofile)
+    else:
+        main()
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def set_gdf(gdf, EPSG_LOCAL):
     '''
     Validates the CRS and index of a geodataframe
@@ -23,4 +26,35 @@ def set_gdf(gdf, EPSG_LOCAL):
     if 'title' in gdf.columns:
         gdf.set_index('title', inplace=True)
 
-    return gdf
\ No newline at end of file
+    return gdf
+
+
+def circle_segments(radius, tolerance=None, area_error=None, minimum=8):
+    '''
+    Returns the number of segments a full circle needs to stay within the tolerance
+    and the relative area error of the true circle.
+
+    Args:
+        radius (float): The radius of the circle, in meters
+        tolerance (float): The largest gap, in meters, allowed between the true circle and its segments
+        area_error (float): The largest relative area the polygon may be short of the true circle
+        minimum (int): The fewest segments to use
+
+    Returns:
+        segments (int): The number of segments, or None when neither limit is set
+    '''
+    if tolerance is None and area_error is None:
+        return None
+
+    segments = minimum
+    if tolerance is not None and radius > tolerance:
+        # The gap at the middle of a segment is radius * (1 - cos(pi / segments))
+        segments = max(segments, int(np.ceil(np.pi / np.arccos(1 - tolerance / radius))))
+    if area_error is not None:
+        # A regular polygon covers segments * sin(2pi / segments) / 2pi of the circle,
+        # which is close to 1 - 2pi^2 / (3 * segments^2)
+        segments = max(segments, int(np.ceil(np.pi * np.sqrt(2 / (3 * area_error)))))
+        while 1 - segments * np.sin(2 * np.pi / segments) / (2 * np.pi) > area_error:
+            segments += 1
+
+    return segments
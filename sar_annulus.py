@@ -6,9 +6,38 @@ import geopandas as gp
 import pandas as pd
 import numpy as np  
 from shapely.geometry import Point, Polygon
-from misc_func import set_gdf
+from misc_func import set_gdf, circle_segments
+
+# The POA of each annulus, from the center circle out
+INIT_POA = [25, 25, 25, 20, 5]
    
-def create_di_gdfs(ipp, distances, EPSG_LOCAL):
+def create_annuli(ipp_x, ipp_y, distances, tolerance=None, area_error=None):
+    """
+    Creates the annulus polygons around an IPP without building any geodataframes.
+
+    Args:
+        ipp_x (float): The IPP x coordinate
+        ipp_y (float): The IPP y coordinate
+        distances (list): The distances from the IPP, in meters
+        tolerance (float): The largest gap, in meters, between a ring and the true circle, None for the default resolution
+        area_error (float): The largest relative area a ring may be short of the true circle, None for the default resolution
+
+    Returns:
+        annuli (list): The center circle followed by an annulus for each further distance
+    """
+    annuli = []
+    previous_circle = None
+    for distance in distances:
+        # Without a resolution setting, keep shapely's default buffer
+        segments = circle_segments(distance, tolerance, area_error)
+        quad_segs = 16 if segments is None else int(np.ceil(segments / 4))
+        circle = Point(ipp_x, ipp_y).buffer(distance, quad_segs)
+        annuli.append(circle if previous_circle is None else circle.difference(previous_circle))
+        previous_circle = circle
+
+    return annuli
+
+def create_di_gdfs(ipp, distances, EPSG_LOCAL, tolerance=None, area_error=None):
     """
     Creates a geodataframe of annulus buffers around an IPP.
     Also produces a geodataframe of arc buffers around the IPP for programs that 
@@ -18,6 +47,8 @@ def create_di_gdfs(ipp, distances, EPSG_LOCAL):
         ipp (GeoDataFrame): The IPP geodataframe
         distances (list): The distances from the IPP, in km, as they appear in the LPB table
         EPSG_LOCAL (int): The local spatial coordinate reference system
+        tolerance (float): The largest gap, in meters, between a ring and the true circle, None for the default resolution
+        area_error (float): The largest relative area a ring may be short of the true circle, None for the default resolution
 
     Returns:
         buffers_gdf (GeoDataFrame): The geodataframe of annulus buffers
@@ -28,7 +59,12 @@ def create_di_gdfs(ipp, distances, EPSG_LOCAL):
     distances = uc.km_to_m(distances)
 
     titles = ['25%', '50%', '75%', '95%', '100%']
-    init_poa = [25, 25, 25, 20, 5]
+    init_poa = INIT_POA
+
+    # Get the IPP coordinates
+    ipp_x, ipp_y = ipp.geometry.x.iloc[0], ipp.geometry.y.iloc[0]
+
+    annuli = create_annuli(ipp_x, ipp_y, distances, tolerance, area_error)
 
     buffers = []
     arc_buffers = []
@@ -36,31 +72,27 @@ def create_di_gdfs(ipp, distances, EPSG_LOCAL):
     idx = 0
     # Iterate through the distances from the IPP and create a buffer around each
     for distance in distances:
-        # If this is the center buffer, create a circle
+        # Without a resolution setting, keep 100 arc points
+        segments = circle_segments(distance, tolerance, area_error)
+        arc_count = 100 if segments is None else segments
+
+        buffer = annuli[idx]
+
+        # If this is the center buffer, the arc is the circle
         if previous_buffer is None:
-            
-            buffer = Point(ipp.geometry.x.iloc[0], ipp.geometry.y.iloc[0]).buffer(distance)
             arc_buffer = buffer
 
-        # Otherwise, create an annulus and arc   
+        # Otherwise, create an arc   
         else:
-            # Create an annulus
-            buffer = (
-                Point(ipp.geometry.x.iloc[0], ipp.geometry.y.iloc[0])
-                .buffer(distance)
-                .difference(Point(ipp.geometry.x.iloc[0], ipp.geometry.y.iloc[0])
-                .buffer(previous_buffer))
-            )
-
             # Create an arc
-            # Return 100 evenly spaced samples from 0 to 360 degrees
-            angles = np.linspace(np.radians(0), np.radians(359.999), 100)
+            # Return evenly spaced samples from 0 to 360 degrees
+            angles = np.linspace(np.radians(0), np.radians(359.999), arc_count)
             # Create an outer and inner arc of points
             outer_arc = [Point(distance * np.cos(angle), distance * np.sin(angle)) for angle in angles]
             inner_arc = [Point(previous_buffer * np.cos(angle), previous_buffer * np.sin(angle)) for angle in reversed(angles)]
             arc_points = outer_arc + inner_arc
             # Create a shapely object from the points
-            arc_buffer = Polygon([(point.x + ipp.geometry.x.iloc[0], point.y + ipp.geometry.y.iloc[0]) for point in arc_points])
+            arc_buffer = Polygon([(point.x + ipp_x, point.y + ipp_y) for point in arc_points])
 
         # Convert the buffer shapely objects to a geodataframe
         buffer_gdf = gp.GeoDataFrame(geometry=[buffer])
@@ -0,0 +1,149 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import main as poa
+
+
+def load_incidents(source):
+    '''
+    Builds the list of incidents to process from a manifest or a directory.
+
+    A manifest is a json list of incidents, each with a "file" and optionally a "name",
+    "distances", "angles", "dot" and "epsg". Relative file paths are resolved against
+    the manifest's directory.
+
+    A directory is searched for SAR Topo json exports. An export "X.json" may have its
+    LPB inputs, with the same keys as a manifest entry, in a "X.lpb.json" next to it.
+
+    Missing LPB inputs fall back to the values set in main.py.
+
+    Args:
+        source (str): The path to a manifest json file or a directory of exports
+
+    Returns:
+        incidents (list): One dict per incident with name, file, distances, angles, dot and epsg
+    '''
+    if os.path.isdir(source):
+        entries = []
+        for filename in sorted(os.listdir(source)):
+            if not filename.endswith('.json') or filename.endswith('.lpb.json'):
+                continue
+            entry = {'file': filename}
+            params_file = os.path.join(source, filename[:-len('.json')] + '.lpb.json')
+            if os.path.exists(params_file):
+                with open(params_file) as f:
+                    entry.update(json.load(f))
+            entries.append(entry)
+        base = source
+    else:
+        with open(source) as f:
+            entries = json.load(f)
+        base = os.path.dirname(os.path.abspath(source))
+
+    incidents = []
+    for entry in entries:
+        file = os.path.join(base, entry['file'])
+        incidents.append({
+            'name': entry.get('name', os.path.splitext(os.path.basename(file))[0]),
+            'file': file,
+            'distances': entry.get('distances', poa.distances_from_ipp),
+            'angles': entry.get('angles', poa.dispersion_angles),
+            'dot': entry.get('dot', poa.direction_of_travel),
+            'epsg': entry.get('epsg', poa.EPSG_LOCAL),
+        })
+
+    names = [incident['name'] for incident in incidents]
+    if len(set(names)) != len(names):
+        raise ValueError("Incident names must be unique")
+
+    return incidents
+
+
+def process_incident(incident, outpath, exact=False, outputs=(), cache_dir=None):
+    '''
+    Calculates and writes the POA of a single incident. Runs in a worker process.
+
+    Args:
+        incident (dict): The incident, as returned by load_incidents
+        outpath (str): The directory the incident's output directory is created in
+        exact (bool): Whether to calculate the statistical area POA analytically
+        outputs (list): The names of the layers to write
+        cache_dir (str): The statistical area cache directory, None to always rebuild them
+
+    Returns:
+        summary (dict): A summary row for the incident
+    '''
+    start = time.perf_counter()
+    summary = {'name': incident['name'], 'file': incident['file']}
+    try:
+        layers = poa.calculate_poa(incident['file'], incident['distances'], incident['angles'], incident['dot'], incident['epsg'], exact=exact, outputs=outputs, cache_dir=cache_dir,
+                                   resolution=poa.geometry_resolution())
+        poa.write_outputs({name: layers[name] for name in outputs}, os.path.join(outpath, incident['name']))
+
+        region_intersections_gdf = layers['Regions_Bisected']
+        summary.update({
+            'status': 'ok',
+            'region_pieces': len(region_intersections_gdf),
+            'total_POA': round(region_intersections_gdf['Region_Portion_POA'].sum(), 2),
+            'max_Region_POA': region_intersections_gdf['Region_POA'].max(),
+            'error': '',
+        })
+    except Exception as e:
+        summary.update({'status': 'failed', 'error': f"{type(e).__name__}: {e}"})
+    summary['seconds'] = round(time.perf_counter() - start, 3)
+
+    return summary
+
+
+def run_batch(incidents, outpath, workers=None, exact=False, outputs=(), cache_dir=None):
+    '''
+    Processes the incidents across a pool of worker processes and writes a summary table.
+
+    Args:
+        incidents (list): The incidents, as returned by load_incidents
+        outpath (str): The directory to write the per-incident outputs and summary to
+        workers (int): The number of worker processes, defaults to the number of CPUs
+        exact (bool): Whether to calculate the statistical area POA analytically
+        outputs (list): The names of the layers to write for each incident
+        cache_dir (str): The statistical area cache directory, shared by the workers
+
+    Returns:
+        summary (DataFrame): One row per incident, in the order given
+    '''
+    os.makedirs(outpath, exist_ok=True)
+
+    rows = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(process_incident, incident, outpath, exact, outputs, cache_dir): incident['name'] for incident in incidents}
+        for future in as_completed(futures):
+            row = future.result()
+            print(f"{row['name']}: {row['status']} ({row['seconds']}s)")
+            rows[futures[future]] = row
+
+    summary = pd.DataFrame([rows[incident['name']] for incident in incidents])
+    summary.to_csv(os.path.join(outpath, 'summary.csv'), index=False)
+
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calculate the POA of many SAR Topo exports in parallel")
+    parser.add_argument('source', help="A directory of json exports or a json manifest of incidents")
+    parser.add_argument('-o', '--output', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'output'), help="The directory to write the outputs to")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="The number of worker processes, defaults to the number of CPUs")
+    parser.add_argument('--exact', action=argparse.BooleanOptionalAction, default=poa.EXACT_POA, help="Calculate the statistical area POA analytically")
+    parser.add_argument('--cache', default=poa.CACHE_PATH if poa.USE_CACHE else None, help="The directory to cache statistical areas in")
+    args = parser.parse_args()
+
+    incidents = load_incidents(args.source)
+    summary = run_batch(incidents, args.output, workers=args.workers, exact=args.exact, outputs=poa.selected_outputs(), cache_dir=args.cache)
+    print(summary)
+
+
+if __name__ == '__main__':
+    main()
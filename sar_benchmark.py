@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import main as poa
+import unit_conversions as uc
+from sar_annulus import create_di_gdfs
+from sar_dispersions import create_da_gdfs
+from sar_intersections import intersect_gdfs, intersect_regions
+from sar_synthetic import PATTERNS, write_synthetic_export
+
+
+def time_stage(timings, name, func, *args, **kwargs):
+    '''
+    Runs a function, appending its wall time to the stage's list of timings.
+
+    Returns:
+        The function's return value
+    '''
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    timings.setdefault(name, []).append(time.perf_counter() - start)
+    return result
+
+
+def benchmark_case(file, repeat=3):
+    '''
+    Times each stage of the pipeline on a single export.
+
+    Args:
+        file (str): The path to the json file
+        repeat (int): The number of times to run every stage
+
+    Returns:
+        stages (dict): The min, median and max seconds of each stage
+    '''
+    distances = poa.distances_from_ipp
+    angles, dot = poa.format_angles(poa.dispersion_angles, poa.direction_of_travel)
+
+    timings = {}
+    with tempfile.TemporaryDirectory() as outpath:
+        for _ in range(repeat):
+            time_stage(timings, 'set_variables', poa.set_variables, distances, poa.dispersion_angles, poa.direction_of_travel, file)
+
+            ipp, regions = poa.load_export(file, poa.EPSG_LOCAL)
+            dipp_gdf, dipp_arcs_gdf = time_stage(timings, 'create_di_gdfs', create_di_gdfs, ipp=ipp, distances=distances, EPSG_LOCAL=poa.EPSG_LOCAL)
+            da_gdf = time_stage(timings, 'create_da_gdfs', create_da_gdfs, angles=angles, ipp=ipp, dot=dot, max_distance=max(uc.km_to_m(distances)), EPSG_LOCAL=poa.EPSG_LOCAL)
+            intersects_gdf = time_stage(timings, 'intersect_gdfs', intersect_gdfs, gdf1=dipp_gdf, gdf2=da_gdf, EPSG_LOCAL=poa.EPSG_LOCAL, include_math=True)
+            region_intersections_gdf = time_stage(timings, 'intersect_regions', intersect_regions, regions, intersects_gdf, poa.EPSG_LOCAL)
+
+            layers = {
+                'Regions_Bisected': region_intersections_gdf,
+                'Statistical_Intersects': intersects_gdf,
+                'DIPP_Annuli': dipp_gdf,
+                'DIPP_Arcs': dipp_arcs_gdf,
+                'DA_Sectors': da_gdf,
+            }
+            for name, gdf in layers.items():
+                time_stage(timings, f'write {name}', poa.write_outputs, {name: gdf}, outpath)
+
+    return {
+        name: {'min': min(values), 'median': statistics.median(values), 'max': max(values)}
+        for name, values in timings.items()
+    }
+
+
+def run_benchmarks(region_counts, vertices=(4,), patterns=('tiled',), repeat=3, seed=0):
+    '''
+    Generates a synthetic export for every combination of region count, vertex count
+    and pattern, and times the pipeline on each.
+
+    Args:
+        region_counts (list): The numbers of regions
+        vertices (list): The numbers of vertices per region
+        patterns (list): The region layouts, from sar_synthetic.PATTERNS
+        repeat (int): The number of times to run every stage
+        seed (int): The random seed of the synthetic exports
+
+    Returns:
+        results (dict): The environment and the stage timings of every case
+    '''
+    cases = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for pattern in patterns:
+            for n_vertices in vertices:
+                for n_regions in region_counts:
+                    file = write_synthetic_export(os.path.join(workdir, 'export.json'), n_regions, vertices=n_vertices,
+                                                  pattern=pattern, extent_km=max(poa.distances_from_ipp), seed=seed)
+                    stages = benchmark_case(file, repeat)
+                    cases.append({'regions': n_regions, 'vertices': n_vertices, 'pattern': pattern, 'stages': stages})
+                    total = sum(stage['median'] for stage in stages.values())
+                    print(f"{pattern:>12} {n_vertices:>4} vertices {n_regions:>6} regions: {total:.3f}s")
+
+    return {'environment': environment(), 'repeat': repeat, 'cases': cases}
+
+
+def environment():
+    '''
+    Describes the code version and machine the benchmarks ran on.
+    '''
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+
+    import geopandas
+    import shapely
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'geopandas': geopandas.__version__,
+        'shapely': shapely.__version__,
+    }
+
+
+def compare_results(baseline, results):
+    '''
+    Prints the median time of every stage against a previous run of the same cases.
+
+    Args:
+        baseline (dict): The results of a previous run
+        results (dict): The results of this run
+    '''
+    previous = {(case['regions'], case['vertices'], case['pattern']): case['stages'] for case in baseline['cases']}
+    for case in results['cases']:
+        before = previous.get((case['regions'], case['vertices'], case['pattern']))
+        if before is None:
+            continue
+        print(f"{case['pattern']} {case['vertices']} vertices {case['regions']} regions")
+        for name, stage in case['stages'].items():
+            if name in before:
+                ratio = stage['median'] / before[name]['median'] if before[name]['median'] else float('inf')
+                print(f"    {name:<30} {before[name]['median']:>9.4f}s -> {stage['median']:>9.4f}s  x{ratio:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the POA pipeline on synthetic SAR Topo exports")
+    parser.add_argument('-n', '--regions', type=int, nargs='+', default=[10, 100, 1000], help="The numbers of regions, 10 to 50000")
+    parser.add_argument('-v', '--vertices', type=int, nargs='+', default=[4], help="The numbers of vertices per region")
+    parser.add_argument('-p', '--patterns', nargs='+', default=['tiled'], choices=PATTERNS, help="The region layouts")
+    parser.add_argument('-r', '--repeat', type=int, default=3, help="The number of times to run every stage")
+    parser.add_argument('-o', '--output', default='benchmark.json', help="The json file to save the results to")
+    parser.add_argument('-c', '--compare', help="A previous results file to compare against")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.regions, args.vertices, args.patterns, args.repeat)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare_results(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+if __name__ == '__main__':
+    print("\n\rThis file is being run directly\n\r")
+
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import time
+import geopandas as gp
+import shapely
+
+# Bump when the statistical areas or the cache format change, so old entries are not reused
+CACHE_VERSION = 2
+
+# A temporary file older than this was left by an interrupted write, not one still in progress
+STALE_TMP_SECONDS = 3600
+
+
+def cache_key(ipp, distances, angles, dot, EPSG_LOCAL, **options):
+    """
+    Builds the content address of a set of statistical areas.
+
+    Args:
+        ipp (GeoDataFrame): The IPP geodataframe, in EPSG_LOCAL
+        distances (list): The distances from the IPP, in km
+        angles (list): The dispersion angles
+        dot (int): The direction of travel
+        EPSG_LOCAL (int): The local spatial coordinate reference system
+        options: Any other settings that change the statistical areas, such as exact mode
+
+    Returns:
+        key (str): The hex digest identifying the statistical areas
+    """
+    params = {
+        'version': CACHE_VERSION,
+        # The IPP is rounded to the centimeter so reprojection noise doesn't miss the cache
+        'ipp': [round(float(ipp.geometry.x.iloc[0]), 2), round(float(ipp.geometry.y.iloc[0]), 2)],
+        'distances': [float(d) for d in distances],
+        'angles': None if angles is None else [float(a) for a in angles],
+        'dot': None if dot is None else float(dot),
+        'epsg': int(EPSG_LOCAL),
+        'options': options,
+    }
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+def load_cached(cache_dir, key):
+    """
+    Loads a set of statistical areas from the cache and marks it as recently used.
+
+    Args:
+        cache_dir (str): The cache directory
+        key (str): The key, from cache_key
+
+    Returns:
+        layers (dict): The geodataframes keyed by output name, or None if not cached
+            or the entry can't be read
+    """
+    path = os.path.join(cache_dir, key + '.pkl')
+    try:
+        with open(path, 'rb') as f:
+            stored = pickle.load(f)
+
+        layers = {}
+        for name, entry in stored.items():
+            if entry is None:
+                layers[name] = None
+                continue
+            data, wkb, epsg, columns = entry
+            layers[name] = gp.GeoDataFrame(data, geometry=shapely.from_wkb(wkb), crs=epsg)[columns]
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # A truncated, stale or incompatible entry is a miss, drop it so it is rebuilt
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+    # Record the use for the least recently used eviction
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+    return layers
+
+
+def store_cached(cache_dir, key, layers, max_bytes):
+    """
+    Writes a set of statistical areas to the cache, then evicts the least recently used
+    entries until the cache fits in max_bytes.
+
+    Args:
+        cache_dir (str): The cache directory
+        key (str): The key, from cache_key
+        layers (dict): The geodataframes keyed by output name
+        max_bytes (int): The largest size the cache may grow to
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Store the attributes as a frame, the geometry as WKB and the column order to restore
+    stored = {}
+    for name, gdf in layers.items():
+        if gdf is None:
+            stored[name] = None
+            continue
+        stored[name] = (
+            gdf.drop(columns=gdf.geometry.name),
+            shapely.to_wkb(gdf.geometry.to_numpy()),
+            gdf.crs.to_epsg() if gdf.crs is not None else None,
+            list(gdf.columns),
+        )
+
+    # Write to a temporary file first so a reader never sees a partial entry
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(stored, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, os.path.join(cache_dir, key + '.pkl'))
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    evict(cache_dir, max_bytes)
+
+
+def evict(cache_dir, max_bytes):
+    """
+    Removes the least recently used cache entries until the cache fits in max_bytes.
+    Temporary files left behind by interrupted writes are removed once they are stale.
+
+    Args:
+        cache_dir (str): The cache directory
+        max_bytes (int): The largest size the cache may grow to
+    """
+    entries = []
+    stale = time.time() - STALE_TMP_SECONDS
+    for filename in os.listdir(cache_dir):
+        if not filename.endswith(('.pkl', '.tmp')):
+            continue
+        path = os.path.join(cache_dir, filename)
+        try:
+            stat = os.stat(path)
+            if filename.endswith('.tmp'):
+                # Another process may still be writing a recent one
+                if stat.st_mtime < stale:
+                    os.remove(path)
+                continue
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, filename))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, filename in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(os.path.join(cache_dir, filename))
+        except FileNotFoundError:
+            pass
+        total -= size
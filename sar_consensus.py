@@ -0,0 +1,99 @@
+if __name__ == '__main__':
+    print("\n\rThis file is being run directly\n\r")
+
+
+import json
+import numpy as np
+import pandas as pd
+import shapely
+
+
+def load_profiles(path, distances, angles, dot, ipp_title='IPP'):
+    """
+    Reads the IPP and lost person profile pairs to combine.
+
+    The file is a json list of profiles, each with optional "name", "ipp", "distances",
+    "angles", "dot" and "weight" keys. "ipp" is the title of the IPP marker in the export.
+    Missing values fall back to the ones given.
+
+    Args:
+        path (str): The path to the profiles json file
+        distances (list): The default distances from the IPP, in km
+        angles (list): The default dispersion angles
+        dot (int): The default direction of travel
+        ipp_title (str): The default IPP title
+
+    Returns:
+        profiles (list): One dict per profile with name, ipp, distances, angles, dot and weight
+    """
+    with open(path) as f:
+        entries = json.load(f)
+    if not entries:
+        raise ValueError("No profiles found in the file")
+
+    profiles = []
+    for i, entry in enumerate(entries):
+        ipp = entry.get('ipp', ipp_title)
+        profiles.append({
+            'name': entry.get('name', f"{ipp} {i + 1}"),
+            'ipp': ipp,
+            'distances': entry.get('distances', distances),
+            'angles': entry.get('angles', angles),
+            'dot': entry.get('dot', dot),
+            'weight': float(entry.get('weight', 1)),
+        })
+
+    names = [profile['name'] for profile in profiles]
+    if len(set(names)) != len(names):
+        raise ValueError("Profile names must be unique")
+    weights = np.array([profile['weight'] for profile in profiles])
+    if (weights < 0).any() or weights.sum() <= 0:
+        raise ValueError("Profile weights must not be negative and must not all be zero")
+
+    return profiles
+
+
+def consensus_region_poa(regions_gdf, cell_layers, weights, names=None, grid_size=None, min_area=0.0):
+    """
+    Calculates the POA of every region under every profile, and their weighted consensus,
+    in a single overlay of the regions against the statistical areas of all the profiles.
+
+    Args:
+        regions_gdf (GeoDataFrame): The regions
+        cell_layers (list): The statistical areas of each profile
+        weights (list): The weight of each profile, normalized to sum to 1
+        names (list): The name of each profile, used for the columns
+        grid_size (float): The precision grid, in meters, the pieces are snapped to, None for full precision
+        min_area (float): The smallest piece to keep, in square meters
+
+    Returns:
+        table (DataFrame): The Region_POA of each region (rows) under each profile (columns),
+            with the weighted Consensus_POA last
+    """
+    names = list(names) if names is not None else [f"Profile {i + 1}" for i in range(len(cell_layers))]
+    weights = np.asarray(weights, dtype=float)
+    weights = weights / weights.sum()
+    n_regions = len(regions_gdf)
+
+    # Stack the statistical areas of every profile, remembering which profile each came from
+    cell_geoms = np.concatenate([gdf.geometry.to_numpy() for gdf in cell_layers])
+    cell_poa = np.concatenate([gdf['POA'].to_numpy(dtype=float) for gdf in cell_layers])
+    cell_profile = np.repeat(np.arange(len(cell_layers)), [len(gdf) for gdf in cell_layers])
+
+    # One index and one bulk intersection for every region / statistical area pair
+    region_geoms = regions_gdf.geometry.to_numpy()
+    tree = shapely.STRtree(cell_geoms)
+    region_pos, cell_pos = tree.query(region_geoms, predicate='intersects')
+    area = shapely.area(shapely.intersection(region_geoms[region_pos], cell_geoms[cell_pos], grid_size=grid_size))
+    area[area < min_area] = 0
+    region_area = shapely.area(region_geoms)[region_pos]
+
+    # The region portion is rounded like intersect_regions so each profile matches a single run
+    portion = np.round(np.divide(area, region_area, out=np.zeros_like(area), where=region_area > 0), 2)
+    totals = np.bincount(cell_profile[cell_pos] * n_regions + region_pos, weights=portion * cell_poa[cell_pos],
+                         minlength=len(cell_layers) * n_regions).reshape(len(cell_layers), n_regions)
+
+    table = pd.DataFrame(np.round(totals.T, 2), index=regions_gdf.index, columns=names)
+    table['Consensus_POA'] = np.round(weights @ totals, 2)
+
+    return table
@@ -6,10 +6,10 @@ import geopandas as gp
 import pandas as pd
 import numpy as np  
 from shapely.geometry import Point, Polygon
-from misc_func import set_gdf
+from misc_func import set_gdf, circle_segments
 
 
-def create_da_gdfs(ipp, dot, max_distance, angles, EPSG_LOCAL):
+def create_da_gdfs(ipp, dot, max_distance, angles, EPSG_LOCAL, tolerance=None, area_error=None):
     """
     Creates a geodataframe of dispersion angle sectors around an IPP.
 
@@ -19,6 +19,8 @@ def create_da_gdfs(ipp, dot, max_distance, angles, EPSG_LOCAL):
         max_distance (int): The maximum distance from the IPP
         angles (list): The dispersion angles, in degrees, as they appear in the LPB table
         EPSG_LOCAL (int): The local spatial coordinate reference system
+        tolerance (float): The largest gap, in meters, between the sector caps and the true circle, None for the default resolution
+        area_error (float): The largest relative area the sector caps may be short of the true circle, None for the default resolution
 
     Returns:
         gdf (GeoDataFrame): The geodataframe of dispersion angle sectors
@@ -69,7 +71,8 @@ def create_da_gdfs(ipp, dot, max_distance, angles, EPSG_LOCAL):
     sectors_gdf = set_gdf(sectors_gdf, EPSG_LOCAL)
 
     # Create a buffer around the ipp with a radius set to the max distance
-    ipp_buffer = Point(ipp_x, ipp_y).buffer(max_distance)
+    segments = circle_segments(max_distance, tolerance, area_error)
+    ipp_buffer = Point(ipp_x, ipp_y).buffer(max_distance, 16 if segments is None else int(np.ceil(segments / 4)))
     ipp_buffer = gp.GeoDataFrame({'geometry': [ipp_buffer]})
     ipp_buffer = set_gdf(ipp_buffer, EPSG_LOCAL=EPSG_LOCAL)
 
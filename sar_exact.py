@@ -0,0 +1,155 @@
+if __name__ == '__main__':
+    print("\n\rThis file is being run directly\n\r")
+
+
+import unit_conversions as uc
+import geopandas as gp
+import pandas as pd
+import numpy as np
+from shapely.geometry import Polygon
+from misc_func import set_gdf, circle_segments
+
+# Number of arc vertices used for a full circle when building cell geometry
+ARC_POINTS = 100
+
+
+def _exact_cells(distances, angles):
+    """
+    Expands the rings and half sectors to one row per statistical area, annulus major, pos before neg,
+    and calculates the area of each.
+
+    Returns:
+        radii (ndarray): The outer radius of each annulus, in meters
+        ring_sq (ndarray): The squared radius difference of each annulus, in square meters
+        widths (ndarray): The width of each half sector, in radians
+        ring_idx (ndarray): The annulus of each statistical area
+        sector_idx (ndarray): The half sector of each statistical area
+        area (ndarray): The area of each statistical area, in square meters
+    """
+    radii = np.asarray(uc.km_to_m(distances), dtype=float)
+    ring_sq = np.diff(np.concatenate(([0.0], radii)) ** 2)
+    widths = np.radians(np.diff(np.concatenate(([0.0], np.asarray(angles, dtype=float)))))
+
+    ring_idx = np.repeat(np.arange(len(radii)), 2 * len(widths))
+    sector_idx = np.tile(np.repeat(np.arange(len(widths)), 2), len(radii))
+
+    return radii, ring_sq, widths, ring_idx, sector_idx, 0.5 * widths[sector_idx] * ring_sq[ring_idx]
+
+
+def exact_cell_areas(distances, angles):
+    """
+    Calculates the area of every statistical area, in the row order of exact_statistical_table.
+
+    Args:
+        distances (list): The distances from the IPP, in km, as they appear in the LPB table
+        angles (list): The half dispersion angles, in degrees, either side of the direction of travel
+
+    Returns:
+        area (ndarray): The area of each statistical area, in square meters
+    """
+    return _exact_cells(distances, angles)[-1]
+
+
+def exact_statistical_table(distances, angles):
+    """
+    Calculates the statistical area table analytically from the ring radii and
+    sector angles, without building any geometry.
+
+    Every statistical area is the intersection of an annulus and a sector, so its area
+    is (sector angle / 2) * (outer radius^2 - inner radius^2) and its POA follows
+    directly from the annulus and sector POA. The direction of travel only turns the
+    geometry, so it doesn't change the table.
+
+    Args:
+        distances (list): The distances from the IPP, in km, as they appear in the LPB table
+        angles (list): The half dispersion angles, in degrees, either side of the direction of travel
+
+    Returns:
+        table (DataFrame): The statistical areas, indexed and titled like intersect_gdfs
+    """
+    titles = ['25%', '50%', '75%', '95%', '100%']
+    init_poa = np.array([25, 25, 25, 20, 5])
+
+    # One row per annulus and half sector, with the squared radius differences and sector widths
+    radii, ring_sq, widths, ring_idx, sector_idx, area = _exact_cells(distances, angles)
+    n_rings, n_sectors = len(radii), len(widths)
+    max_sq = radii.max() ** 2
+    sector_poa = np.where(init_poa == 5, init_poa, init_poa / 2)
+
+    # di POA = annulus POA * (sector angle / full circle)
+    di_poa = init_poa[ring_idx] * widths[sector_idx] / (2 * np.pi)
+    # da POA = sector POA * (annulus radius^2 difference / sector radius^2)
+    da_poa = np.where(widths[sector_idx] > 0, sector_poa[sector_idx] * ring_sq[ring_idx] / max_sq, 0.0)
+
+    table = pd.DataFrame({
+        'title': [
+            f"dipp {titles[i]} | da {titles[j]} {side}"
+            for i in range(n_rings) for j in range(n_sectors) for side in ('pos', 'neg')
+        ],
+        'di_dp_Area': np.round(area / 1e6, 2),
+        'di_POA': di_poa,
+        'da_POA': da_poa,
+        'POA': di_poa + da_poa,
+        # POA per km², left unrounded
+        'pDEN': np.divide(di_poa + da_poa, area / 1e6, out=np.zeros_like(area), where=area > 0),
+    })
+    table = table.set_index('title')
+
+    return table
+
+
+def create_exact_gdf(ipp, distances, angles, dot, EPSG_LOCAL, geometry=True, tolerance=None, area_error=None):
+    """
+    Creates the statistical areas with their exact POA values.
+    The geometry is only built when asked for, directly as annulus sectors.
+
+    Args:
+        ipp (GeoDataFrame): The IPP geodataframe
+        distances (list): The distances from the IPP, in km, as they appear in the LPB table
+        angles (list): The half dispersion angles, in degrees, either side of the direction of travel
+        dot (int): The direction of travel
+        EPSG_LOCAL (int): The local spatial coordinate reference system
+        geometry (bool): Whether to build the statistical area polygons
+        tolerance (float): The largest gap, in meters, between an arc and the true circle, None for ARC_POINTS
+        area_error (float): The largest relative area an arc may be short of the true circle, None for ARC_POINTS
+
+    Returns:
+        gdf (GeoDataFrame): The statistical areas, or a DataFrame if geometry is False
+    """
+    table = exact_statistical_table(distances, angles)
+    if not geometry:
+        return table
+
+    ipp_x, ipp_y = ipp.geometry.x.iloc[0], ipp.geometry.y.iloc[0]
+    radii = np.concatenate(([0.0], np.asarray(uc.km_to_m(distances), dtype=float)))
+    bounds = np.concatenate(([0.0], np.asarray(angles, dtype=float)))
+
+    polygons = []
+    for inner, outer in zip(radii[:-1], radii[1:]):
+        segments = circle_segments(outer, tolerance, area_error) or ARC_POINTS
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            # Positive half is clockwise of the direction of travel, negative is counter clockwise
+            for bearing_a, bearing_b in ((dot + start, dot + end), (dot - end, dot - start)):
+                polygons.append(_annulus_sector(ipp_x, ipp_y, inner, outer, bearing_a, bearing_b, segments))
+
+    gdf = gp.GeoDataFrame(table, geometry=polygons)
+    gdf = set_gdf(gdf, EPSG_LOCAL)
+
+    return gdf
+
+
+def _annulus_sector(x, y, inner, outer, bearing_a, bearing_b, segments=ARC_POINTS):
+    """
+    Builds the polygon of an annulus sector between two bearings, in degrees true north,
+    with its arcs split like a full circle of the given number of segments.
+    """
+    count = max(2, int(np.ceil(segments * abs(bearing_b - bearing_a) / 360)) + 1)
+    # Convert the bearings to math angles
+    angles = np.radians(90 - np.linspace(bearing_a, bearing_b, count))
+    outer_arc = np.column_stack((x + outer * np.cos(angles), y + outer * np.sin(angles)))
+    if inner > 0:
+        inner_arc = np.column_stack((x + inner * np.cos(angles[::-1]), y + inner * np.sin(angles[::-1])))
+    else:
+        inner_arc = np.array([[x, y]])
+
+    return Polygon(np.concatenate((outer_arc, inner_arc)))
@@ -0,0 +1,277 @@
+if __name__ == '__main__':
+    print("\n\rThis file is being run directly\n\r")
+
+
+import json
+from contextlib import nullcontext
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import geopandas as gp
+import shapely
+from pyproj import Transformer
+from sar_profile import stage, count
+
+# The number of characters read from the export at a time
+CHUNK_SIZE = 1 << 20
+
+_decoder = json.JSONDecoder()
+_whitespace = ' \t\n\r'
+
+
+@lru_cache(maxsize=None)
+def get_transformer(from_epsg, to_epsg):
+    """
+    Returns a cached transformer between two spatial coordinate reference systems, in x/y order.
+
+    Args:
+        from_epsg (int): The spatial coordinate reference system of the input coordinates
+        to_epsg (int): The spatial coordinate reference system of the output coordinates
+
+    Returns:
+        transformer (pyproj.Transformer): The transformer
+    """
+    return Transformer.from_crs(from_epsg, to_epsg, always_xy=True)
+
+
+class _Reader:
+    """
+    Reads a json file a chunk at a time and decodes one value at a time from it.
+    """
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size):
+        # Drop what has been decoded so the buffer only holds the value being read
+        chunk = self.f.read(size)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+        return bool(chunk)
+
+    def peek(self):
+        """
+        Skips whitespace and returns the next character, or '' at the end of the file.
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _whitespace:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill(self.chunk_size):
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at character {self.pos} of the json file")
+        self.pos += 1
+
+    def members(self):
+        """
+        Yields the keys of the next json object one at a time. The caller reads each
+        key's value before asking for the next key.
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.peek() == '}':
+                self.pos += 1
+                return
+            self.expect(',')
+
+    def array_text(self):
+        """
+        Returns the json text of the next array of numbers without decoding it.
+        """
+        if self.peek() != '[':
+            return json.dumps(self.value())
+        size = self.chunk_size
+        while True:
+            # An array of numbers ends before the next key or the end of its object
+            stop = min(self._find('"'), self._find('}'))
+            text = self.buffer[self.pos:stop]
+            end = text.rfind(']') + 1
+            if end and text.count('[', 0, end) == text.count(']', 0, end):
+                self.pos += end
+                return text[:end]
+            if stop < len(self.buffer) or self.eof:
+                # Not only numbers, decode it the slow way
+                return json.dumps(self.value())
+            self._fill(size)
+            size *= 2
+
+    def _find(self, char):
+        index = self.buffer.find(char, self.pos)
+        return len(self.buffer) if index < 0 else index
+
+    def value(self):
+        """
+        Decodes the next json value, reading more of the file until the value is complete.
+        """
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof or not self._fill(size):
+                    raise
+                # Grow the reads so a very long value isn't decoded over and over
+                size *= 2
+                continue
+            # A number may be cut off at the end of the buffer
+            if end == len(self.buffer) and not self.eof and self._fill(size):
+                continue
+            self.pos = end
+            return value
+
+
+def iter_features(file, chunk_size=CHUNK_SIZE):
+    """
+    Yields the features of a GeoJSON FeatureCollection one at a time, without loading the whole file.
+    The geometry coordinates are left as json text, so only the features that are kept pay to decode them.
+
+    Args:
+        file (str or file object): The path to the json file, or a text file object to read it from
+        chunk_size (int): The number of characters read at a time
+
+    Yields:
+        feature (dict): A GeoJSON feature, with its geometry's coordinates as json text
+    """
+    with (nullcontext(file) if hasattr(file, 'read') else open(file, encoding='utf-8')) as f:
+        reader = _Reader(f, chunk_size)
+        for key in reader.members():
+            if key != 'features':
+                reader.value()
+                continue
+
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.pos += 1
+                continue
+            while True:
+                yield _feature(reader)
+                if reader.peek() == ']':
+                    reader.pos += 1
+                    break
+                reader.expect(',')
+
+
+def _feature(reader):
+    """
+    Reads the next feature, leaving its geometry's coordinates as json text.
+    """
+    feature = {}
+    for key in reader.members():
+        if key != 'geometry' or reader.peek() != '{':
+            feature[key] = reader.value()
+            continue
+
+        geometry = {}
+        for geometry_key in reader.members():
+            geometry[geometry_key] = reader.array_text() if geometry_key == 'coordinates' else reader.value()
+        feature['geometry'] = geometry
+
+    return feature
+
+
+def read_export(file, EPSG_LOCAL, EPSG_WGS84=4326, ipp_title='IPP', chunk_size=CHUNK_SIZE, lines=False):
+    """
+    Reads the IPP and the region polygons of a SAR Topo export, and optionally its lines,
+    skipping every other feature, and reprojects them to the local coordinate reference system in one pass.
+
+    Args:
+        file (str or file object): The path to the json file, or a text file object to read it from
+        EPSG_LOCAL (int): The local spatial coordinate reference system
+        EPSG_WGS84 (int): The spatial coordinate reference system of the export
+        ipp_title (str or list): The title of the IPP feature, or the titles of several candidate IPPs
+        chunk_size (int): The number of characters read at a time
+        lines (bool): Whether to also keep the LineString and MultiLineString features, such as trails
+
+    Returns:
+        gdf (geopandas.GeoDataFrame): The IPP, region and line features with their properties, in file order
+    """
+    ipp_titles = {ipp_title} if isinstance(ipp_title, str) else set(ipp_title)
+    properties = []
+    others = {}
+    ring_coords, ring_index, polygon_index = [], [], []
+    n_rings = 0
+    line_coords, line_index, line_pos = [], [], []
+    line_types = ('LineString', 'MultiLineString') if lines else ()
+
+    with stage('load') as record:
+        for feature in iter_features(file, chunk_size):
+            geometry = feature.get('geometry') or {}
+            props = feature.get('properties') or {}
+            is_polygon = geometry.get('type') == 'Polygon'
+            is_line = geometry.get('type') in line_types
+            if not is_polygon and not is_line and props.get('title') not in ipp_titles:
+                continue
+
+            if 'coordinates' in geometry:
+                geometry['coordinates'] = json.loads(geometry['coordinates'])
+            # A line needs two vertices
+            if is_line and geometry['type'] == 'LineString' and len(geometry['coordinates']) < 2:
+                continue
+
+            if is_polygon:
+                # Collect the rings of every polygon into one coordinate array
+                for ring in geometry['coordinates']:
+                    ring_coords.append(_xy(ring))
+                    ring_index.append(np.full(len(ring), n_rings))
+                    polygon_index.append(len(properties))
+                    n_rings += 1
+            elif is_line and geometry['type'] == 'LineString':
+                # Collect the vertices of every line into one coordinate array
+                line_coords.append(_xy(geometry['coordinates']))
+                line_index.append(np.full(len(geometry['coordinates']), len(line_pos)))
+                line_pos.append(len(properties))
+            elif geometry.get('type') == 'Point':
+                others[len(properties)] = shapely.points(geometry['coordinates'][:2])
+            else:
+                others[len(properties)] = shapely.force_2d(shapely.from_geojson(json.dumps(geometry)))
+            properties.append(props)
+
+        geometries = np.empty(len(properties), dtype=object)
+        if n_rings:
+            rings = shapely.linearrings(np.concatenate(ring_coords), indices=np.concatenate(ring_index))
+            polygon_index = np.asarray(polygon_index)
+            polygon_pos = np.unique(polygon_index)
+            # The first ring of each polygon is its shell and the rest are its holes
+            geometries[polygon_pos] = shapely.polygons(rings, indices=np.searchsorted(polygon_pos, polygon_index))
+        if line_pos:
+            geometries[line_pos] = shapely.linestrings(np.concatenate(line_coords), indices=np.concatenate(line_index))
+        for pos, geometry in others.items():
+            geometries[pos] = geometry
+
+        attributes = pd.DataFrame(properties)
+        if 'title' not in attributes.columns:
+            attributes['title'] = None
+        gdf = gp.GeoDataFrame(attributes, geometry=geometries, crs=EPSG_WGS84)
+        count(record, gdf)
+
+    with stage('reproject'):
+        transformer = get_transformer(EPSG_WGS84, EPSG_LOCAL)
+        geometry = shapely.transform(gdf.geometry.to_numpy(), lambda xy: np.column_stack(transformer.transform(xy[:, 0], xy[:, 1])))
+        gdf = gdf.set_geometry(gp.GeoSeries(geometry, index=gdf.index, crs=EPSG_LOCAL))
+
+    return gdf
+
+
+def _xy(ring):
+    """
+    Returns the longitude and latitude of a ring's vertices, dropping any elevation or time.
+    """
+    try:
+        return np.asarray(ring, dtype=float)[:, :2]
+    except ValueError:
+        # The vertices don't all have the same number of members
+        return np.asarray([vertex[:2] for vertex in ring], dtype=float)
@@ -5,56 +5,76 @@ if __name__ == '__main__':
 import unit_conversions as uc
 import geopandas as gp
 import pandas as pd
+import numpy as np
+import shapely
 from misc_func import set_gdf
 
 
-def intersect_gdfs(gdf1, gdf2, EPSG_LOCAL):
+def intersect_gdfs(gdf1, gdf2, EPSG_LOCAL, include_math=False):
     '''
-    Intersects two geodataframes and returns the result
+    Intersects two geodataframes and returns the result.
+    Every row of gdf1 is paired with every row of gdf2 and the intersections
+    are computed in a single bulk shapely operation.
 
     Args: 
         gdf1 (GeoDataFrame): The first geodataframe
         gdf2 (GeoDataFrame): The second geodataframe
         EPSG_LOCAL (int): The local spatial coordinate reference system
+        include_math (bool): Whether to add the human readable di_math and da_math columns
     
     Returns:
         intersections_gdf (GeoDataFrame): The intersected geodataframe
     '''
-    intersections = []
-    i = 1
-
-    for title1, row1 in gdf1.iterrows():
-        j = 1
-        for title2, row2 in gdf2.iterrows():
-            # Intersect the two geometries and convert to a geodataframe
-            intersection = row1['geometry'].intersection(row2['geometry'])
-            intersection_gdf = gp.GeoDataFrame({'geometry': [intersection]})
-            #intersection_gdf['title'] = f"Int_{int_to_char(i)}{j}"
-            #intersection_gdf['description'] = f"Int_{int_to_char(i)}{j}"
-            intersection_gdf['title'] = f"dipp {title1} | da {title2}"
-            intersection_gdf['di_dp_Area'] = round(intersection.area / 1e6, 2)
-            #TODO Change this to generic so it works with any two gdfs
-            # di POA = di POA * (intersected portion area / annulus area)
-            # i.e. POA = 10 * .44 = 4.4
-            intersection_gdf['di_math'] = f"{row1['POA']} * ({round(intersection.area/1e6, 2)} / {round(row1['geometry'].area/1e6, 2)}) = {round(row1['POA'] * (intersection.area / row1['geometry'].area),2)}"
-            intersection_gdf['di_POA'] = row1['POA'] * (intersection.area / row1['geometry'].area)
-            # da POA = da POA * (intersected portion area / segment area)
-            # i.e. POA = 20 * .07 = 1.3
-            intersection_gdf['da_math'] = f"{row2['POA']} * ({round(intersection.area/1e6,2)} / {round(row2['geometry'].area/1e6, 2)}) = {round(row2['POA'] * (intersection.area / row2['geometry'].area),2)}"
-            intersection_gdf['da_POA'] = row2['POA'] * (intersection.area / row2['geometry'].area)
-            # POA = di POA + da POA
-            intersection_gdf['POA'] = intersection_gdf['di_POA'] + intersection_gdf['da_POA']
-            
-            set_gdf(intersection_gdf, EPSG_LOCAL)
-            intersections.append(intersection_gdf)
-            j += 1
-        i += 1
-    intersections_gdf = gp.GeoDataFrame(pd.concat(intersections))
-    set_gdf(intersections_gdf, EPSG_LOCAL)
+    # Index every (gdf1, gdf2) pair, gdf1 major so the row order matches the tables
+    idx1 = np.repeat(np.arange(len(gdf1)), len(gdf2))
+    idx2 = np.tile(np.arange(len(gdf2)), len(gdf1))
+
+    # Intersect all of the pairs at once
+    geoms1 = gdf1.geometry.to_numpy()
+    geoms2 = gdf2.geometry.to_numpy()
+    intersections = shapely.intersection(geoms1[idx1], geoms2[idx2])
+
+    # Areas of the intersections and of their parent polygons
+    area = shapely.area(intersections)
+    area1 = shapely.area(geoms1)[idx1]
+    area2 = shapely.area(geoms2)[idx2]
+    poa1 = gdf1['POA'].to_numpy()[idx1]
+    poa2 = gdf2['POA'].to_numpy()[idx2]
+
+    #TODO Change this to generic so it works with any two gdfs
+    # di POA = di POA * (intersected portion area / annulus area)
+    # i.e. POA = 10 * .44 = 4.4
+    di_poa = poa1 * (area / area1)
+    # da POA = da POA * (intersected portion area / segment area)
+    # i.e. POA = 20 * .07 = 1.3
+    da_poa = poa2 * (area / area2)
+
+    titles1 = gdf1.index.to_numpy()[idx1]
+    titles2 = gdf2.index.to_numpy()[idx2]
+
+    intersections_gdf = gp.GeoDataFrame({'geometry': intersections})
+    intersections_gdf['title'] = [f"dipp {title1} | da {title2}" for title1, title2 in zip(titles1, titles2)]
+    intersections_gdf['di_dp_Area'] = np.round(area / 1e6, 2)
+    if include_math:
+        intersections_gdf['di_math'] = [
+            f"{p} * ({round(a/1e6, 2)} / {round(a1/1e6, 2)}) = {round(d, 2)}"
+            for p, a, a1, d in zip(poa1, area, area1, di_poa)
+        ]
+    intersections_gdf['di_POA'] = di_poa
+    if include_math:
+        intersections_gdf['da_math'] = [
+            f"{p} * ({round(a/1e6, 2)} / {round(a2/1e6, 2)}) = {round(d, 2)}"
+            for p, a, a2, d in zip(poa2, area, area2, da_poa)
+        ]
+    intersections_gdf['da_POA'] = da_poa
+    # POA = di POA + da POA
+    intersections_gdf['POA'] = di_poa + da_poa
+
+    intersections_gdf = set_gdf(intersections_gdf, EPSG_LOCAL)
        
     return intersections_gdf
 
-def intersect_regions(regions_gdf, intersections_gdf, EPSG_LOCAL):
+def intersect_regions(regions_gdf, intersections_gdf, EPSG_LOCAL, return_region=False, grid_size=None, min_area=0.0):
     """
     Intersects region polygons with statistal area polygons and returns POA values
     as well as the bisected regions.
@@ -63,49 +83,57 @@ def intersect_regions(regions_gdf, intersections_gdf, EPSG_LOCAL):
         regions_gdf (GeoDataFrame): The regions to be intersected
         intersections_gdf (GeoDataFrame): The statistical areas to be intersected
         EPSG_LOCAL (int): The local spatial coordinate reference system
+        return_region (bool): Whether to add a 'region' column holding the position of each piece's region
+        grid_size (float): The precision grid, in meters, the pieces are snapped to, None for full precision
+        min_area (float): The smallest piece to keep, in square meters
 
     Returns:
         region_intersections_gdf (GeoDataFrame): The intersected regions
     """
-    region_intersections = []
-    poa_totals = {}
-
-    for region_idx, region in regions_gdf.iterrows():
-        poa_cumulative = 0
-
-        for intersection_idx, intersection in intersections_gdf.iterrows():
-            new_intersection = region.geometry.intersection(intersection.geometry)
-
-            if new_intersection.area > 0:
-                # Create a new Geodataframe for the intersection
-                intersection_gdf = gp.GeoDataFrame({'geometry': [new_intersection]})
-                set_gdf(intersection_gdf, EPSG_LOCAL)
-                intersection_gdf['title'] = f"{region_idx} | {intersection_idx}"
-
-                # Calculate the portion of this part of the region residing in the intersected area
-                region_portion = round(new_intersection.area / region['geometry'].area, 2)
-
-                # Multiply the region portion by the POA of the intersection to get the POA of the region in this intersection
-                intersection_gdf['math'] = f"({round(new_intersection.area / 1e6, 2)}km\u00b2 / {round(region['geometry'].area / 1e6, 2)}km\u00b2) * {round(intersection['POA'],2)} = {region_portion}"
-                intersect_POA = region_portion * intersection['POA']
-                intersection_gdf['Region_Portion_POA'] = round(intersect_POA,2)
-
-                # Append this row to the list
-                region_intersections.append(intersection_gdf)
-
-                # Add the intersect POA to the running total for this region
-                poa_cumulative = poa_cumulative + intersect_POA
-
-        # Append to the poa_totals dictionary
-        poa_totals[region_idx] = round(poa_cumulative,2)
-    
-    # Convert the list of intersections to a geodataframe
-    region_intersections_gdf = gp.GeoDataFrame(pd.concat(region_intersections))
-    set_gdf(region_intersections_gdf, EPSG_LOCAL)
-
-    # Add the POA totals to the region_intersections_gdf
-    for title, poa in poa_totals.items():
-        region_intersections_gdf.loc[region_intersections_gdf.index.str.contains(title), 'Region_POA'] = poa
+    region_geoms = regions_gdf.geometry.to_numpy()
+    cell_geoms = intersections_gdf.geometry.to_numpy()
+
+    # Only test the region / statistical area pairs whose bounding boxes overlap
+    tree = shapely.STRtree(cell_geoms)
+    region_pos, cell_pos = tree.query(region_geoms, predicate='intersects')
+    order = np.lexsort((cell_pos, region_pos))
+    region_pos, cell_pos = region_pos[order], cell_pos[order]
+
+    # Intersect the candidate pairs and keep the ones with an area of at least min_area
+    new_intersections = shapely.intersection(region_geoms[region_pos], cell_geoms[cell_pos], grid_size=grid_size)
+    area = shapely.area(new_intersections)
+    keep = area >= min_area if min_area else area > 0
+    dropped_area = float(area[~keep].sum())
+    region_pos, cell_pos = region_pos[keep], cell_pos[keep]
+    new_intersections, area = new_intersections[keep], area[keep]
+
+    region_area = shapely.area(region_geoms)[region_pos]
+    cell_poa = intersections_gdf['POA'].to_numpy()[cell_pos]
+    region_titles = regions_gdf.index.to_numpy()[region_pos]
+    cell_titles = intersections_gdf.index.to_numpy()[cell_pos]
+
+    # Calculate the portion of this part of the region residing in the intersected area
+    region_portion = np.round(area / region_area, 2)
+
+    # Multiply the region portion by the POA of the intersection to get the POA of the region in this intersection
+    intersect_poa = region_portion * cell_poa
+
+    region_intersections_gdf = gp.GeoDataFrame({'geometry': new_intersections})
+    region_intersections_gdf['title'] = [f"{region_title} | {cell_title}" for region_title, cell_title in zip(region_titles, cell_titles)]
+    region_intersections_gdf['math'] = [
+        f"({round(a / 1e6, 2)}km\u00b2 / {round(ra / 1e6, 2)}km\u00b2) * {round(poa, 2)} = {portion}"
+        for a, ra, poa, portion in zip(area, region_area, cell_poa, region_portion)
+    ]
+    region_intersections_gdf['Region_Portion_POA'] = np.round(intersect_poa, 2)
+
+    # Total the POA of each region, keyed on the region's position rather than its title
+    poa_totals = pd.Series(intersect_poa).groupby(region_pos).sum().round(2)
+    region_intersections_gdf['Region_POA'] = poa_totals.reindex(region_pos).to_numpy()
+    if return_region:
+        region_intersections_gdf['region'] = region_pos
+
+    region_intersections_gdf = set_gdf(region_intersections_gdf, EPSG_LOCAL)
+    region_intersections_gdf.attrs['dropped_area'] = dropped_area
     
     return region_intersections_gdf
     
\ No newline at end of file
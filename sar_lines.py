@@ -0,0 +1,70 @@
+if __name__ == '__main__':
+    print("\n\rThis file is being run directly\n\r")
+
+
+import geopandas as gp
+import pandas as pd
+import numpy as np
+import shapely
+from misc_func import set_gdf
+
+
+def intersect_lines(lines_gdf, intersections_gdf, EPSG_LOCAL, min_length=0.0):
+    """
+    Splits lines such as trails, roads and drainages along the statistical areas and
+    assigns each segment POA the way intersect_regions does for regions.
+
+    A segment's portion is its share of its line's length, rounded to two places, and its
+    POA is that portion times the statistical area POA. The Line_POA is the total of its
+    segments, so it only depends on where the line runs, not on any other line.
+
+    Args:
+        lines_gdf (GeoDataFrame): The lines, indexed by title
+        intersections_gdf (GeoDataFrame): The statistical areas
+        EPSG_LOCAL (int): The local spatial coordinate reference system
+        min_length (float): The shortest segment to keep, in meters
+
+    Returns:
+        line_segments_gdf (GeoDataFrame): The line segments, with their length, portion of
+            the line, segment POA and the total POA of their line
+    """
+    line_geoms = lines_gdf.geometry.to_numpy()
+    cell_geoms = intersections_gdf.geometry.to_numpy()
+
+    # Only split the line / statistical area pairs whose bounding boxes overlap
+    tree = shapely.STRtree(cell_geoms)
+    line_pos, cell_pos = tree.query(line_geoms, predicate='intersects')
+    order = np.lexsort((cell_pos, line_pos))
+    line_pos, cell_pos = line_pos[order], cell_pos[order]
+
+    # Lines that lie inside a single statistical area are kept whole,
+    # the rest of the candidate pairs are split in one bulk operation
+    shapely.prepare(cell_geoms)
+    segments = line_geoms[line_pos]
+    split = ~shapely.covers(cell_geoms[cell_pos], segments)
+    segments[split] = shapely.intersection(segments[split], cell_geoms[cell_pos][split])
+    length = shapely.length(segments)
+    keep = length >= min_length if min_length else length > 0
+    line_pos, cell_pos, segments, length = line_pos[keep], cell_pos[keep], segments[keep], length[keep]
+
+    # Each segment's share of its line, rounded like the region portion in intersect_regions
+    line_length = shapely.length(line_geoms)[line_pos]
+    line_portion = np.round(np.divide(length, line_length, out=np.zeros_like(length), where=line_length > 0), 2)
+    segment_poa = line_portion * intersections_gdf['POA'].to_numpy(dtype=float)[cell_pos]
+
+    line_titles = lines_gdf.index.to_numpy()[line_pos]
+    cell_titles = intersections_gdf.index.to_numpy()[cell_pos]
+
+    line_segments_gdf = gp.GeoDataFrame({'geometry': segments})
+    line_segments_gdf['title'] = [f"{line_title} | {cell_title}" for line_title, cell_title in zip(line_titles, cell_titles)]
+    line_segments_gdf['Length_km'] = np.round(length / 1e3, 3)
+    line_segments_gdf['Line_Portion'] = line_portion
+    line_segments_gdf['Segment_POA'] = np.round(segment_poa, 2)
+
+    # Total the POA of each line, keyed on the line's position rather than its title
+    poa_totals = pd.Series(segment_poa).groupby(line_pos).sum().round(2)
+    line_segments_gdf['Line_POA'] = poa_totals.reindex(line_pos).to_numpy()
+
+    line_segments_gdf = set_gdf(line_segments_gdf, EPSG_LOCAL)
+
+    return line_segments_gdf
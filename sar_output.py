@@ -0,0 +1,132 @@
+if __name__ == '__main__':
+    print("\n\rThis file is being run directly\n\r")
+
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import geopandas as gp
+import shapely
+from sar_export import get_transformer
+from sar_profile import stage, count, profiling
+
+# The file extension of each output format
+FORMATS = {
+    'GeoJSON': '.json',
+    'FlatGeobuf': '.fgb',
+    'GeoParquet': '.parquet',
+}
+
+# The name of the file holding every layer when they are combined
+COMBINED_NAME = 'POA_Layers'
+
+
+def reproject_layers(layers, EPSG_WGS84, precision=None):
+    """
+    Reprojects every layer in one pass over all of their coordinates.
+
+    Args:
+        layers (dict): The geodataframes keyed by output name, all in the same coordinate reference system
+        EPSG_WGS84 (int): The spatial coordinate reference system of the output
+        precision (int): The number of decimal places to round the coordinates to, None to keep them all
+
+    Returns:
+        layers (dict): The reprojected geodataframes keyed by output name
+    """
+    names = [name for name, gdf in layers.items() if gdf is not None]
+    if not names:
+        return dict(layers)
+
+    crs = {layers[name].crs for name in names}
+    if len(crs) > 1:
+        raise ValueError(f"The layers are in more than one coordinate reference system: {crs}")
+    transformer = get_transformer(crs.pop().to_epsg(), EPSG_WGS84)
+
+    def transform(xy):
+        xy = np.column_stack(transformer.transform(xy[:, 0], xy[:, 1]))
+        return xy if precision is None else np.round(xy, precision)
+
+    geometries = np.concatenate([layers[name].geometry.to_numpy() for name in names])
+    geometries = shapely.transform(geometries, transform)
+
+    reprojected = dict(layers)
+    start = 0
+    for name in names:
+        gdf = layers[name]
+        stop = start + len(gdf)
+        reprojected[name] = gdf.set_geometry(gp.GeoSeries(geometries[start:stop], index=gdf.index, crs=EPSG_WGS84))
+        start = stop
+
+    return reprojected
+
+
+def write_layer(gdf, path, output_format='GeoJSON', precision=None):
+    """
+    Writes a single layer to a file.
+
+    Args:
+        gdf (GeoDataFrame): The layer, already in the output coordinate reference system
+        path (str): The file to write
+        output_format (str): One of FORMATS
+        precision (int): The number of decimal places the coordinates were rounded to
+    """
+    if output_format == 'GeoParquet':
+        gdf.to_parquet(path)
+    elif output_format == 'GeoJSON' and precision is not None:
+        gdf.to_file(path, driver='GeoJSON', COORDINATE_PRECISION=precision)
+    else:
+        gdf.to_file(path, driver=output_format)
+
+
+def write_layers(layers, outpath, EPSG_WGS84, output_format='GeoJSON', combined=False, precision=None, workers=None):
+    """
+    Reprojects the layers in one pass and writes them, either one file per layer written
+    concurrently or as a single file with a 'layer' column.
+
+    Args:
+        layers (dict): The geodataframes keyed by output name
+        outpath (str): The directory to write the files to
+        EPSG_WGS84 (int): The spatial coordinate reference system of the output
+        output_format (str): One of FORMATS
+        combined (bool): Whether to write every layer into one file
+        precision (int): The number of decimal places to round the coordinates to, None to keep them all
+        workers (int): The number of layers to write at the same time, None for all of them.
+            The layers are always written one at a time while profiling
+
+    Returns:
+        paths (list): The files written
+    """
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown output format {output_format}, expected one of {list(FORMATS)}")
+
+    # Create the output directory if it doesn't exist
+    if not os.path.exists(outpath):
+        os.makedirs(outpath)
+
+    with stage('reproject outputs'):
+        layers = reproject_layers({name: gdf for name, gdf in layers.items() if gdf is not None}, EPSG_WGS84, precision)
+
+    if combined:
+        # The layers keep their own columns, missing ones are left empty
+        frames = [gdf.reset_index().assign(layer=name) for name, gdf in layers.items()]
+        combined_gdf = gp.GeoDataFrame(pd.concat(frames, ignore_index=True), crs=EPSG_WGS84)
+        layers = {COMBINED_NAME: combined_gdf}
+
+    paths = {name: os.path.join(outpath, name + FORMATS[output_format]) for name in layers}
+
+    def write(name):
+        with stage(f'write {name}') as record:
+            write_layer(layers[name], paths[name], output_format, precision)
+            count(record, layers[name])
+
+    # The writers spend most of their time outside the GIL, so the layers are written on threads.
+    # While profiling they are written one at a time so each write stage is measured on its own
+    if len(layers) > 1 and workers != 1 and not profiling():
+        with ThreadPoolExecutor(max_workers=workers or len(layers)) as pool:
+            list(pool.map(write, layers))
+    else:
+        for name in layers:
+            write(name)
+
+    return list(paths.values())
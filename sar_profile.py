@@ -0,0 +1,184 @@
+if __name__ == '__main__':
+    print("\n\rThis file is being run directly\n\r")
+
+
+import cProfile
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+import shapely
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, the resident set size is left out of the report
+    resource = None
+
+# The profiler the pipeline stages report to, None when profiling is off
+_active = None
+
+
+class StageProfiler:
+    """
+    Records the wall time, peak memory and feature/vertex counts of each pipeline stage.
+    The Python heap peak comes from tracemalloc, which doesn't see the memory GEOS and numpy
+    allocate in C, so the peak resident set size is reported alongside it where available.
+
+    Only one stage at a time owns the memory peak and the cProfile profiler. A stage opened
+    while another is still open, nested inside it or on another thread, only records its time.
+    """
+
+    def __init__(self, cprofile=False):
+        self.stages = []
+        self.profiles = {}
+        self.cprofile = cprofile
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._open = 0
+
+    @contextmanager
+    def stage(self, name):
+        record = {'stage': name}
+        with self._lock:
+            top_level = self._open == 0
+            self._open += 1
+            position = len(self.stages)
+            self.stages.append(record)
+
+        if not top_level:
+            record['nested'] = True
+            start = time.perf_counter()
+            try:
+                yield record
+            finally:
+                record['seconds'] = time.perf_counter() - start
+                with self._lock:
+                    self._open -= 1
+            return
+
+        rss_before = _max_rss()
+        tracemalloc.reset_peak()
+        profile = cProfile.Profile() if self.cprofile else None
+        start = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield record
+        finally:
+            if profile is not None:
+                profile.disable()
+            record['seconds'] = time.perf_counter() - start
+            record['peak_python_heap_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            if rss_before is not None:
+                record['max_rss_mb'] = _max_rss()
+                record['max_rss_growth_mb'] = record['max_rss_mb'] - rss_before
+            if profile is not None:
+                self.profiles[position] = profile
+            with self._lock:
+                self._open -= 1
+
+    def report(self):
+        """
+        Returns the stage records and the total wall time.
+        """
+        return {
+            'total_seconds': time.perf_counter() - self.started,
+            'stages': self.stages,
+        }
+
+    def write(self, path, cprofile_path=None):
+        """
+        Writes the report to a json file and, if recorded, the cProfile stats of the slowest stage.
+
+        Args:
+            path (str): The json report file
+            cprofile_path (str): The file to dump the slowest stage's cProfile stats to
+        """
+        report = self.report()
+        if cprofile_path is not None and self.profiles:
+            slowest = max(self.profiles, key=lambda idx: self.stages[idx]['seconds'])
+            self.profiles[slowest].dump_stats(cprofile_path)
+            report['cprofile'] = {'stage': self.stages[slowest]['stage'], 'file': cprofile_path}
+
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+def start_profiling(cprofile=False):
+    """
+    Turns on stage profiling for the rest of the run.
+
+    Args:
+        cprofile (bool): Whether to also run cProfile over every stage
+
+    Returns:
+        profiler (StageProfiler): The active profiler
+    """
+    global _active
+    tracemalloc.start()
+    _active = StageProfiler(cprofile=cprofile)
+    return _active
+
+
+def stop_profiling():
+    """
+    Turns off stage profiling.
+
+    Returns:
+        profiler (StageProfiler): The profiler that was active
+    """
+    global _active
+    profiler, _active = _active, None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return profiler
+
+
+def profiling():
+    """
+    Returns whether stage profiling is on.
+    """
+    return _active is not None
+
+
+@contextmanager
+def stage(name):
+    """
+    Marks a pipeline stage. Does nothing unless profiling is on.
+
+    Args:
+        name (str): The name of the stage
+    """
+    if _active is None:
+        yield None
+        return
+    with _active.stage(name) as record:
+        yield record
+
+
+def count(record, gdf):
+    """
+    Adds the feature and vertex counts of a geodataframe to a stage record.
+
+    Args:
+        record (dict): The stage record yielded by stage, None when profiling is off
+        gdf (GeoDataFrame): The stage's result
+    """
+    if record is None or gdf is None:
+        return
+    record['features'] = int(len(gdf))
+    record['vertices'] = int(shapely.get_num_coordinates(gdf.geometry.to_numpy()).sum())
+
+
+def _max_rss():
+    """
+    Returns the peak resident set size of the process so far, in megabytes.
+    """
+    if resource is None:
+        return None
+    # macOS reports bytes, Linux and the BSDs kilobytes
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2 ** 20 if sys.platform == 'darwin' else rss / 2 ** 10
@@ -0,0 +1,120 @@
+if __name__ == '__main__':
+    print("\n\rThis file is being run directly\n\r")
+
+
+import numpy as np
+import pandas as pd
+import geopandas as gp
+import shapely
+
+
+def polygon_parts(geoms):
+    """
+    Splits geometries into their polygons, dropping any points and lines.
+
+    Args:
+        geoms (ndarray): The geometries
+
+    Returns:
+        parts (ndarray): The polygons, in the order of the geometries they came from
+        index (ndarray): The position of the geometry each polygon came from
+    """
+    parts, index = shapely.get_parts(geoms, return_index=True)
+    # A repaired geometry can be a collection holding multipolygons, so keep splitting until only single parts are left
+    while True:
+        multi = shapely.get_type_id(parts) >= 4
+        if not multi.any():
+            break
+        sub_parts, sub_index = shapely.get_parts(parts[multi], return_index=True)
+        parts = np.concatenate((parts[~multi], sub_parts))
+        index = np.concatenate((index[~multi], index[multi][sub_index]))
+
+    polygon = shapely.get_type_id(parts) == 3
+    order = np.argsort(index[polygon], kind='stable')
+    return parts[polygon][order], index[polygon][order]
+
+
+def clean_regions(regions_gdf, grid_size=None, min_area=0.0, repair=True):
+    """
+    Prepares hand drawn regions for the overlay. Invalid regions are repaired, the vertices
+    are snapped to a precision grid and fragments below the area threshold are dropped.
+    Regions that need none of this are passed through untouched.
+
+    Args:
+        regions_gdf (GeoDataFrame): The regions
+        grid_size (float): The precision grid, in meters, None to keep the vertices as drawn
+        min_area (float): The smallest fragment of a region to keep, in square meters
+        repair (bool): Whether to repair self intersecting and otherwise invalid regions
+
+    Returns:
+        regions_gdf (GeoDataFrame): The cleaned regions, without any that were dropped entirely
+        report (DataFrame): Whether each region was repaired or dropped and the area dropped from it
+    """
+    geoms = regions_gdf.geometry.to_numpy().copy()
+    n_regions = len(geoms)
+
+    repaired = np.zeros(n_regions, dtype=bool)
+    if repair:
+        repaired = ~shapely.is_valid(geoms)
+        if repaired.any():
+            try:
+                # Rebuilding from the rings is much faster than tracing the linework
+                geoms[repaired] = shapely.make_valid(geoms[repaired], method='structure', keep_collapsed=False)
+            except (TypeError, shapely.errors.UnsupportedGEOSVersionError):
+                # Shapely before 2.1 or GEOS before 3.10 only has the linework method
+                geoms[repaired] = shapely.make_valid(geoms[repaired])
+    if grid_size:
+        geoms = shapely.set_precision(geoms, grid_size)
+
+    # Keep the polygons of each region that are at least min_area
+    parts, index = polygon_parts(geoms)
+    part_area = shapely.area(parts)
+    keep = part_area >= min_area if min_area else part_area > 0
+    kept_parts = np.bincount(index[keep], minlength=n_regions)
+    dropped_area = np.bincount(index[~keep], weights=part_area[~keep], minlength=n_regions)
+    dropped_parts = np.bincount(index[~keep], minlength=n_regions)
+    changed = repaired | (dropped_parts > 0) | (shapely.get_type_id(geoms) != 3)
+
+    # Rebuild only the regions that changed, a single polygon stays a polygon
+    rebuilt = changed & (kept_parts > 0)
+    if rebuilt.any():
+        single = rebuilt & (kept_parts == 1)
+        in_single = single[index] & keep
+        geoms[index[in_single]] = parts[in_single]
+
+        multi = rebuilt & (kept_parts > 1)
+        if multi.any():
+            in_multi = multi[index] & keep
+            positions, group = np.unique(index[in_multi], return_inverse=True)
+            geoms[positions] = shapely.multipolygons(parts[in_multi], indices=group)
+
+    removed = kept_parts == 0
+    report = pd.DataFrame({
+        'Repaired': repaired,
+        'Removed': removed,
+        'Dropped_Parts': dropped_parts,
+        'Dropped_Area': dropped_area,
+    }, index=regions_gdf.index)
+
+    regions_gdf = regions_gdf.set_geometry(gp.GeoSeries(geoms, index=regions_gdf.index, crs=regions_gdf.crs))[~removed]
+    shapely.prepare(regions_gdf.geometry.to_numpy())
+
+    return regions_gdf, report
+
+
+def summarize_cleaning(report):
+    """
+    Sums up a cleaning report.
+
+    Args:
+        report (DataFrame): The report from clean_regions
+
+    Returns:
+        summary (dict): The number of regions repaired and removed, the fragments dropped and their area
+    """
+    return {
+        'repaired': int(report['Repaired'].sum()),
+        'removed': int(report['Removed'].sum()),
+        'dropped_parts': int(report['Dropped_Parts'].sum()),
+        'dropped_area_m2': float(report['Dropped_Area'].sum()),
+    }
@@ -0,0 +1,150 @@
+if __name__ == '__main__':
+    print("\n\rThis file is being run directly\n\r")
+
+
+import numpy as np
+import shapely
+
+# The two character hex code of every color channel value
+_HEX = np.array([f"{value:02x}" for value in range(256)])
+
+# The width of an average label character, and the height of a label line, relative to the font size
+CHAR_WIDTH = 0.6
+LINE_HEIGHT = 1.2
+
+
+def poa_colors(values, cmap='autumn'):
+    """
+    Normalizes the POA values to a range of 0-1 and converts them to hex colors in one pass.
+
+    Args:
+        values (array): The POA values
+        cmap (str): The name of the matplotlib colormap
+
+    Returns:
+        colors (ndarray): The hex color of each value, i.e. '#ff8000'
+    """
+    # Loaded here so runs without plots or colors never import matplotlib
+    from matplotlib import colormaps
+
+    values = np.asarray(values, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        normalized = (values - values.min()) / (values.max() - values.min()) if len(values) else values
+    rgb = (colormaps[cmap](normalized)[:, :3] * 255).astype(int)
+
+    return np.char.add(np.char.add(np.char.add('#', _HEX[rgb[:, 0]]), _HEX[rgb[:, 1]]), _HEX[rgb[:, 2]])
+
+
+def label_points(gdf):
+    """
+    Returns a point inside each geometry to place its label on.
+
+    Args:
+        gdf (GeoDataFrame): The features to label
+
+    Returns:
+        x (ndarray): The x coordinate of each label
+        y (ndarray): The y coordinate of each label
+    """
+    points = shapely.point_on_surface(gdf.geometry.to_numpy())
+    return shapely.get_x(points), shapely.get_y(points)
+
+
+def declutter(x, y, widths, heights, priority):
+    """
+    Picks the labels to draw so that none of them overlap, keeping the highest priority ones.
+    Each label is only checked against the labels already kept in the neighbouring grid cells.
+
+    Args:
+        x (array): The x coordinate of each label's center, in pixels
+        y (array): The y coordinate of each label's center, in pixels
+        widths (array): The width of each label, in pixels
+        heights (array): The height of each label, in pixels
+        priority (array): The priority of each label, highest first
+
+    Returns:
+        keep (ndarray): Whether each label is drawn
+    """
+    keep = np.zeros(len(x), dtype=bool)
+    if not len(x):
+        return keep
+
+    # Two overlapping labels are never more than one grid cell apart
+    cell_w, cell_h = max(widths.max(), 1), max(heights.max(), 1)
+    grid = {}
+    for i in np.argsort(-np.asarray(priority), kind='stable'):
+        gx, gy = int(x[i] // cell_w), int(y[i] // cell_h)
+        clash = any(
+            abs(x[i] - x[j]) * 2 < widths[i] + widths[j] and abs(y[i] - y[j]) * 2 < heights[i] + heights[j]
+            for nx in (gx - 1, gx, gx + 1) for ny in (gy - 1, gy, gy + 1) for j in grid.get((nx, ny), ())
+        )
+        if not clash:
+            keep[i] = True
+            grid.setdefault((gx, gy), []).append(i)
+
+    return keep
+
+
+def draw_regions(ax, gdf, label_column='Region_Portion_POA', fontsize=8, declutter_labels=False):
+    """
+    Draws the colored regions and their POA labels on a matplotlib axes.
+
+    Args:
+        ax (matplotlib.axes.Axes): The axes to draw on
+        gdf (GeoDataFrame): The regions, with the fill, stroke, stroke-width and fill-opacity columns
+        label_column (str): The POA column to label the regions with
+        fontsize (int): The label font size, in points
+        declutter_labels (bool): Whether to leave out labels that would overlap a higher POA label
+
+    Returns:
+        labels (int): The number of labels drawn
+    """
+    gdf.plot(ax=ax, color=gdf['fill'], edgecolor=gdf['stroke'], linewidth=gdf['stroke-width'], alpha=gdf['fill-opacity'])
+
+    x, y = label_points(gdf)
+    text = gdf.index.astype(str) + " \n POA: " + gdf[label_column].astype(str)
+    keep = np.ones(len(gdf), dtype=bool)
+
+    if declutter_labels and len(gdf):
+        # The label sizes are known in points, so the overlap is checked in pixels
+        ax.apply_aspect()
+        pixels = ax.transData.transform(np.column_stack((x, y)))
+        scale = fontsize * ax.figure.dpi / 72
+        lines = text.str.split('\n')
+        widths = lines.map(lambda parts: max(len(part) for part in parts)).to_numpy() * CHAR_WIDTH * scale
+        heights = lines.map(len).to_numpy() * LINE_HEIGHT * scale
+        keep = declutter(pixels[:, 0], pixels[:, 1], widths, heights, gdf[label_column].to_numpy())
+
+    for xi, yi, label in zip(x[keep], y[keep], text[keep]):
+        ax.text(xi, yi, label, fontsize=fontsize, ha='center', va='center')
+
+    return int(keep.sum())
+
+
+def render_map(gdf, path, label_column='Region_Portion_POA', size=(12, 12), dpi=150, fontsize=8, declutter_labels=True):
+    """
+    Writes a map of the regions and their POA to an image file without opening a window.
+    The image format is taken from the file extension, i.e. .png or .svg.
+
+    Args:
+        gdf (GeoDataFrame): The regions, with the fill, stroke, stroke-width and fill-opacity columns
+        path (str): The image file to write
+        label_column (str): The POA column to label the regions with
+        size (tuple): The width and height of the map, in inches
+        dpi (int): The resolution of the map, in pixels per inch
+        fontsize (int): The label font size, in points
+        declutter_labels (bool): Whether to leave out labels that would overlap a higher POA label
+
+    Returns:
+        labels (int): The number of labels drawn
+    """
+    # The figure is drawn straight to the file, so no GUI backend is needed
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=size, dpi=dpi)
+    ax = fig.add_subplot()
+    ax.set_axis_off()
+    labels = draw_regions(ax, gdf, label_column, fontsize, declutter_labels)
+    fig.savefig(path, bbox_inches='tight')
+
+    return labels
@@ -0,0 +1,71 @@
+if __name__ == '__main__':
+    print("\n\rThis file is being run directly\n\r")
+
+
+import numpy as np
+import pandas as pd
+import shapely
+from sar_exact import exact_cell_areas, exact_statistical_table, create_exact_gdf
+from sar_raster import vector_region_poa
+
+# The tolerance, in meters, of the reference statistical areas
+REFERENCE_TOLERANCE = 0.01
+
+
+def resolution_report(intersects_gdf, regions_gdf, ipp, distances, angles, dot, EPSG_LOCAL, reference_tolerance=REFERENCE_TOLERANCE):
+    """
+    Measures how far the polygon statistical areas, and the Region_POA calculated from them,
+    are from the exact values.
+
+    The statistical area areas and POA are compared with the analytic values. The Region_POA,
+    rounded as in intersect_regions, is compared with the Region_POA from reference statistical
+    areas built to a fine tolerance, so the error is the one seen in the region output.
+
+    Args:
+        intersects_gdf (GeoDataFrame): The statistical areas the regions were intersected with
+        regions_gdf (GeoDataFrame): The regions
+        ipp (GeoDataFrame): The IPP geodataframe
+        distances (list): The distances from the IPP, in km
+        angles (list): The half dispersion angles, in degrees, either side of the direction of travel
+        dot (int): The direction of travel
+        EPSG_LOCAL (int): The local spatial coordinate reference system
+        reference_tolerance (float): The tolerance, in meters, of the reference statistical areas
+
+    Returns:
+        cells (DataFrame): The area, vertex count and POA error of each statistical area
+        regions (DataFrame): The Region_POA and its error for each region
+        summary (dict): The vertex count and the largest and mean errors
+    """
+    exact = exact_statistical_table(distances, angles)
+    exact['Exact_Area'] = exact_cell_areas(distances, angles)
+    exact = exact.reindex(intersects_gdf.index)
+
+    geometry = intersects_gdf.geometry.to_numpy()
+    cells = pd.DataFrame({
+        'Area': shapely.area(geometry),
+        'Exact_Area': exact['Exact_Area'].to_numpy(),
+        'Vertices': shapely.get_num_coordinates(geometry),
+        'POA': intersects_gdf['POA'].to_numpy(),
+        'Exact_POA': exact['POA'].to_numpy(),
+    }, index=intersects_gdf.index)
+    cells['Area_Error'] = np.divide(cells['Area'] - cells['Exact_Area'], cells['Exact_Area'],
+                                    out=np.zeros(len(cells)), where=cells['Exact_Area'].to_numpy() > 0)
+    cells['POA_Error'] = cells['POA'] - cells['Exact_POA']
+
+    reference_gdf = create_exact_gdf(ipp=ipp, distances=distances, angles=angles, dot=dot, EPSG_LOCAL=EPSG_LOCAL,
+                                     tolerance=reference_tolerance)
+    regions = pd.DataFrame({
+        'POA': vector_region_poa(regions_gdf, intersects_gdf),
+        'Exact_POA': vector_region_poa(regions_gdf, reference_gdf),
+    })
+    regions['POA_Error'] = regions['POA'] - regions['Exact_POA']
+
+    summary = {
+        'vertices': int(cells['Vertices'].sum()),
+        'max_area_error': float(cells['Area_Error'].abs().max()),
+        'mean_area_error': float(cells['Area_Error'].abs().mean()),
+        'max_region_poa_error': float(regions['POA_Error'].abs().max()),
+        'mean_region_poa_error': float(regions['POA_Error'].abs().mean()),
+    }
+
+    return cells, regions, summary
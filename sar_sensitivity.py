@@ -0,0 +1,233 @@
+if __name__ == '__main__':
+    print("\n\rThis file is being run directly\n\r")
+
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import unit_conversions as uc
+import pandas as pd
+import numpy as np
+import shapely
+
+INIT_POA = np.array([25, 25, 25, 20, 5])
+SECTOR_POA = np.where(INIT_POA == 5, INIT_POA, INIT_POA / 2)
+
+
+def decompose_regions(regions_gdf, ipp, radial_step=0.03, angular_step=1.0, min_radius=10):
+    """
+    Splits the regions once, along a polar grid centered on the IPP, so every scenario can reuse them.
+    The rings of the grid are spaced in proportion to their distance from the IPP, so the grid is
+    finest near the IPP where the probability density is highest.
+
+    Args:
+        regions_gdf (GeoDataFrame): The regions
+        ipp (GeoDataFrame): The IPP geodataframe
+        radial_step (float): The width of each ring of the grid, relative to its inner radius
+        angular_step (float): The width of each wedge of the grid, in degrees
+        min_radius (float): The radius, in meters, of the innermost ring of the grid
+
+    Returns:
+        pieces (dict): The region position, distance from the IPP, bearing from the IPP
+            and area of each piece, ordered by region, and the area of each region
+    """
+    ipp_x, ipp_y = ipp.geometry.x.iloc[0], ipp.geometry.y.iloc[0]
+
+    # The grid reaches the farthest corner of the regions' extent
+    minx, miny, maxx, maxy = regions_gdf.total_bounds
+    max_radius = max(np.hypot(x - ipp_x, y - ipp_y) for x in (minx, maxx) for y in (miny, maxy))
+    n_rings = max(1, int(np.ceil(np.log(max(max_radius, min_radius) / min_radius) / np.log1p(radial_step))))
+    radii = np.concatenate(([0.0], min_radius * (1 + radial_step) ** np.arange(n_rings + 1)))
+    bearings = np.arange(0, 360 + angular_step / 2, angular_step)
+
+    # Build every grid cell, with 5 points along each of its arcs
+    arc_bearings = bearings[:-1, np.newaxis] + angular_step * np.linspace(0, 1, 5)[np.newaxis, :]
+    arc_angles = np.radians(90 - arc_bearings)
+    outer_x = radii[1:, np.newaxis, np.newaxis] * np.cos(arc_angles)[np.newaxis, :, :]
+    outer_y = radii[1:, np.newaxis, np.newaxis] * np.sin(arc_angles)[np.newaxis, :, :]
+    inner_x = radii[:-1, np.newaxis, np.newaxis] * np.cos(arc_angles)[np.newaxis, :, ::-1]
+    inner_y = radii[:-1, np.newaxis, np.newaxis] * np.sin(arc_angles)[np.newaxis, :, ::-1]
+    xs = np.concatenate((outer_x, inner_x), axis=-1) + ipp_x
+    ys = np.concatenate((outer_y, inner_y), axis=-1) + ipp_y
+    cells = shapely.polygons(np.stack((xs, ys), axis=-1).reshape(-1, 10, 2))
+
+    # Intersect the regions with the grid cells they overlap
+    region_geoms = regions_gdf.geometry.to_numpy()
+    tree = shapely.STRtree(cells)
+    region_pos, cell_pos = tree.query(region_geoms, predicate='intersects')
+    pieces = shapely.intersection(region_geoms[region_pos], cells[cell_pos])
+    area = shapely.area(pieces)
+    keep = area > 0
+    region_pos, pieces, area = region_pos[keep], pieces[keep], area[keep]
+
+    # Locate each piece by its centroid, ordered by region
+    order = np.argsort(region_pos, kind='stable')
+    centroids = shapely.get_coordinates(shapely.centroid(pieces[order]))
+    dx, dy = centroids[:, 0] - ipp_x, centroids[:, 1] - ipp_y
+
+    return {
+        'region_pos': region_pos[order],
+        'distance': np.hypot(dx, dy),
+        'bearing': np.degrees(np.arctan2(dx, dy)) % 360,
+        'weight': area[order],
+        'region_area': shapely.area(region_geoms),
+    }
+
+
+def sample_scenarios(distances, angles, dot, runs, distance_error=0.2, angle_error=0.2, dot_error=20, seed=None):
+    """
+    Samples perturbed LPB inputs around the nominal values.
+    Distances and angles are scaled by lognormal factors and re-sorted so the rings and
+    sectors stay in order, the direction of travel is shifted by a normal offset.
+
+    Args:
+        distances (list): The nominal distances from the IPP, in km
+        angles (list): The nominal half dispersion angles, in degrees
+        dot (int): The nominal direction of travel
+        runs (int): The number of scenarios
+        distance_error (float): The standard deviation of the log distance factors
+        angle_error (float): The standard deviation of the log angle factors
+        dot_error (float): The standard deviation of the direction of travel, in degrees
+        seed (int): The random seed
+
+    Returns:
+        scenarios (dict): The distances (runs x 5), half dispersion angles (runs x 5) and direction of travel (runs)
+    """
+    rng = np.random.default_rng(seed)
+    distances = np.asarray(distances, dtype=float)
+    angles = np.asarray(angles, dtype=float)
+
+    sampled_distances = np.sort(distances * rng.lognormal(0, distance_error, (runs, len(distances))), axis=1)
+    sampled_angles = np.sort(np.clip(angles * rng.lognormal(0, angle_error, (runs, len(angles))), 0, 180), axis=1)
+    sampled_dot = (dot + rng.normal(0, dot_error, runs)) % 360
+
+    return {'distances': sampled_distances, 'angles': sampled_angles, 'dot': sampled_dot}
+
+
+def scenario_region_poa(pieces, n_regions, distances, angles, dot):
+    """
+    Calculates the Region_POA of a batch of scenarios at once, following intersect_regions.
+    Each piece belongs to the statistical area its centroid falls in. A region's portion of a
+    statistical area is the area of its pieces there over the region's area, rounded to two
+    places, times the statistical area POA.
+
+    Args:
+        pieces (dict): The region pieces, from decompose_regions
+        n_regions (int): The number of regions
+        distances (ndarray): The distances from the IPP, in km, one row per scenario
+        angles (ndarray): The half dispersion angles, in degrees, one row per scenario
+        dot (ndarray): The direction of travel of each scenario
+
+    Returns:
+        region_poa (ndarray): The Region_POA of each region (columns) in each scenario (rows)
+    """
+    radii = np.asarray(uc.km_to_m(distances), dtype=float)
+    half_angles = np.asarray(angles, dtype=float)
+
+    n_runs, n_rings, n_sectors = len(radii), radii.shape[1], half_angles.shape[1]
+
+    # Density, per square meter, of each annulus and each half sector
+    ring_sq = np.diff(np.concatenate((np.zeros((n_runs, 1)), radii), axis=1) ** 2, axis=1)
+    ring_den = np.divide(INIT_POA, np.pi * ring_sq, out=np.zeros_like(ring_sq), where=ring_sq > 0)
+    widths = np.radians(np.diff(np.concatenate((np.zeros((n_runs, 1)), half_angles), axis=1), axis=1))
+    sector_area = widths * radii[:, -1:] ** 2 / 2
+    sector_den = np.divide(SECTOR_POA, sector_area, out=np.zeros_like(sector_area), where=sector_area > 0)
+
+    # POA of every statistical area, its density times its area, with an extra empty ring
+    # and sector for pieces beyond the outer edges
+    n_cells = (n_rings + 1) * (n_sectors + 1)
+    table = np.zeros((n_runs, n_rings + 1, n_sectors + 1))
+    table[:, :n_rings, :n_sectors] = ((ring_den[:, :, np.newaxis] + sector_den[:, np.newaxis, :])
+                                      * ring_sq[:, :, np.newaxis] * widths[:, np.newaxis, :] / 2)
+    table = table.reshape(n_runs, n_cells)
+
+    # Find the statistical area of every piece, for every scenario, by counting the edges it lies beyond
+    distance = pieces['distance'].astype(np.float32)[np.newaxis, :]
+    relative = np.abs(pieces['bearing'].astype(np.float32)[np.newaxis, :] - dot.astype(np.float32)[:, np.newaxis])
+    relative = np.minimum(relative, 360 - relative)
+    cell_idx = np.zeros(relative.shape, dtype=np.uint8)
+    for k in range(n_rings):
+        cell_idx += distance >= radii[:, k:k + 1].astype(np.float32)
+    cell_idx *= n_sectors + 1
+    for k in range(n_sectors):
+        cell_idx += relative >= half_angles[:, k:k + 1].astype(np.float32)
+
+    # Area of each region in each statistical area, for every scenario
+    key = (np.arange(n_runs)[:, np.newaxis] * n_regions + pieces['region_pos'][np.newaxis, :]) * n_cells + cell_idx
+    weight = np.broadcast_to(pieces['weight'], key.shape)
+    cell_area = np.bincount(key.ravel(), weights=weight.ravel(), minlength=n_runs * n_regions * n_cells).reshape(n_runs, n_regions, n_cells)
+
+    # The region portion is rounded like intersect_regions so the nominal scenario matches a single run
+    region_area = pieces['region_area'][np.newaxis, :, np.newaxis]
+    portion = np.round(np.divide(cell_area, region_area, out=np.zeros_like(cell_area), where=region_area > 0), 2)
+    region_poa = np.einsum('rnc,rc->rn', portion, table)
+
+    return np.round(region_poa, 2)
+
+
+def sensitivity_analysis(regions_gdf, ipp, distances, angles, dot, runs=2000, radial_step=0.03, angular_step=1.0, batch_size=None,
+                         workers=None, distance_error=0.2, angle_error=0.2, dot_error=20, top_n=10, seed=None):
+    """
+    Reports how the region POA responds to uncertainty in the LPB inputs.
+    The regions are split along a polar grid once and the scenarios are evaluated in vectorized batches.
+
+    Args:
+        regions_gdf (GeoDataFrame): The regions
+        ipp (GeoDataFrame): The IPP geodataframe
+        distances (list): The nominal distances from the IPP, in km
+        angles (list): The nominal half dispersion angles, in degrees
+        dot (int): The nominal direction of travel
+        runs (int): The number of scenarios
+        radial_step (float): The width of each ring of the polar grid, relative to its inner radius
+        angular_step (float): The width of each wedge of the polar grid, in degrees
+        batch_size (int): The number of scenarios evaluated at once, sized to the number of pieces by default
+        workers (int): The number of worker processes the batches are spread across, None runs them in this process
+        distance_error (float): The standard deviation of the log distance factors
+        angle_error (float): The standard deviation of the log angle factors
+        dot_error (float): The standard deviation of the direction of travel, in degrees
+        top_n (int): The number of highest ranked regions tracked for rank stability
+        seed (int): The random seed
+
+    Returns:
+        report (DataFrame): Per region nominal POA, mean, standard deviation and percentiles of
+            the POA, rank statistics and how often the region is among the top_n regions
+    """
+    pieces = decompose_regions(regions_gdf, ipp, radial_step, angular_step)
+    n_regions = len(regions_gdf)
+    scenarios = sample_scenarios(distances, angles, dot, runs, distance_error, angle_error, dot_error, seed)
+
+    if batch_size is None:
+        # Keep each batch to roughly 10 million piece evaluations or region / statistical area totals
+        batch_size = max(1, int(1e7 // max(1, len(pieces['distance']), n_regions * (len(distances) + 1) * (len(angles) + 1))))
+
+    nominal = scenario_region_poa(pieces, n_regions, np.array([distances], dtype=float), np.array([angles], dtype=float), np.array([dot], dtype=float))[0]
+    batches = [
+        (scenarios['distances'][i:i + batch_size], scenarios['angles'][i:i + batch_size], scenarios['dot'][i:i + batch_size])
+        for i in range(0, runs, batch_size)
+    ]
+    run_batch = partial(scenario_region_poa, pieces, n_regions)
+    if workers is None or workers <= 1:
+        region_poa = np.concatenate([run_batch(*batch) for batch in batches])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            region_poa = np.concatenate(list(executor.map(run_batch, *zip(*batches))))
+
+    # Rank 1 is the region with the highest POA in a scenario
+    ranks = (-region_poa).argsort(axis=1).argsort(axis=1) + 1
+    nominal_rank = (-nominal).argsort().argsort() + 1
+
+    report = pd.DataFrame({
+        'Nominal_POA': nominal,
+        'Mean_POA': region_poa.mean(axis=0),
+        'Std_POA': region_poa.std(axis=0),
+        'P5_POA': np.percentile(region_poa, 5, axis=0),
+        'P50_POA': np.percentile(region_poa, 50, axis=0),
+        'P95_POA': np.percentile(region_poa, 95, axis=0),
+        'Nominal_Rank': nominal_rank,
+        'Mean_Rank': ranks.mean(axis=0),
+        'P5_Rank': np.percentile(ranks, 5, axis=0),
+        'P95_Rank': np.percentile(ranks, 95, axis=0),
+        'Same_Rank': (ranks == nominal_rank).mean(axis=0),
+        f'Top_{top_n}': (ranks <= top_n).mean(axis=0),
+    }, index=regions_gdf.index)
+
+    return report.sort_values('Nominal_Rank')
@@ -0,0 +1,300 @@
+import argparse
+import io
+import json
+import os
+import statistics
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import main as poa
+from sar_cache import cache_key
+from sar_intersections import intersect_regions
+from sar_output import reproject_layers
+
+# The number of recent requests the timing metrics are taken over
+METRICS_WINDOW = 1000
+
+# The statistical layers kept by this worker process, set up by init_worker
+_cache = None
+
+
+class StatisticalAreaCache:
+    '''
+    Keeps the most recently used statistical layers of a worker process in memory.
+    '''
+
+    def __init__(self, max_entries=32, cache_dir=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()
+
+    def get(self, ipp, distances, angles, dot, EPSG_LOCAL, exact, outputs, resolution=None):
+        '''
+        Returns the statistical layers, building them on a miss.
+
+        Returns:
+            layers (dict): The geodataframes keyed by output name
+            hit (bool): Whether the layers were already in memory
+        '''
+        key = cache_key(ipp, distances, angles, dot, EPSG_LOCAL, exact=exact, math='Statistical_Intersects' in outputs, **(resolution or {}))
+        layers = self.entries.get(key)
+        # An exact mode entry may not hold every layer this request returns
+        if layers is not None and not any(layers.get(name, True) is None for name in outputs):
+            self.entries.move_to_end(key)
+            return dict(layers), True
+
+        # The disk cache, when there is one, is checked before building them
+        layers = poa.statistical_areas(ipp, distances, angles, dot, EPSG_LOCAL, exact=exact, outputs=outputs, cache_dir=self.cache_dir, resolution=resolution)
+        self.entries[key] = layers
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+        return dict(layers), False
+
+
+class Metrics:
+    '''
+    Records the timing of recent requests.
+    '''
+
+    def __init__(self, window=METRICS_WINDOW):
+        self.requests = deque(maxlen=window)
+        self.lock = threading.Lock()
+        self.total = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.started = time.time()
+
+    def record(self, timing, error=False, cache_hit=False):
+        with self.lock:
+            self.total += 1
+            self.errors += error
+            self.cache_hits += cache_hit
+            self.requests.append(timing)
+
+    def summary(self):
+        '''
+        Returns the request counts, cache hits and the mean, median and 95th percentile of each stage.
+        '''
+        with self.lock:
+            requests = list(self.requests)
+            summary = {'uptime_seconds': time.time() - self.started, 'requests': self.total, 'errors': self.errors,
+                       'cache_hits': self.cache_hits, 'stages': {}}
+
+        stages = {}
+        for timing in requests:
+            for name, seconds in timing.items():
+                stages.setdefault(name, []).append(seconds)
+        for name, values in stages.items():
+            values.sort()
+            summary['stages'][name] = {
+                'count': len(values),
+                'mean': statistics.fmean(values),
+                'p50': values[len(values) // 2],
+                'p95': values[min(len(values) - 1, int(len(values) * 0.95))],
+            }
+        return summary
+
+
+def parse_parameters(query):
+    '''
+    Reads the LPB inputs and options of a request from its query string.
+    Missing values fall back to the variables in main.py.
+
+    Args:
+        query (str): The query string, i.e. "distances=1.1,3.1,5.8,18.3,20&dot=180"
+
+    Returns:
+        params (dict): The distances, angles, dot, epsg, exact, outputs, precision and geometry resolution of the request
+    '''
+    values = {key: items[-1] for key, items in parse_qs(query).items()}
+
+    def numbers(text):
+        if text.lower() == 'none':
+            return None
+        items = [float(item) for item in text.split(',')]
+        if len(items) != 5:
+            raise ValueError(f"Expected five values, got {text}")
+        return items
+
+    def number(text):
+        return None if text.lower() == 'none' else float(text)
+
+    outputs = values.get('outputs')
+    params = {
+        'distances': numbers(values['distances']) if 'distances' in values else poa.distances_from_ipp,
+        'angles': numbers(values['angles']) if 'angles' in values else poa.dispersion_angles,
+        'dot': number(values['dot']) if 'dot' in values else poa.direction_of_travel,
+        'epsg': int(values.get('epsg', poa.EPSG_LOCAL)),
+        'exact': values.get('exact', str(poa.EXACT_POA)).lower() in ('1', 'true', 'yes'),
+        'outputs': poa.selected_outputs() if outputs is None else [name for name in outputs.split(',') if name],
+        'precision': int(values['precision']) if 'precision' in values else poa.OUTPUT_PRECISION,
+        'resolution': poa.geometry_resolution(),
+    }
+    for name in ('tolerance', 'area_error'):
+        if name in values:
+            params['resolution'][name] = float(values[name])
+    if params['distances'] is None:
+        raise ValueError("The distances must be known")
+    unknown = set(params['outputs']) - set(poa.OUTPUT_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown outputs {sorted(unknown)}, expected some of {list(poa.OUTPUT_NAMES)}")
+    return params
+
+
+def init_worker(cache_entries, cache_dir):
+    '''
+    Sets up the statistical layer cache of a worker process.
+    '''
+    global _cache
+    _cache = StatisticalAreaCache(cache_entries, cache_dir)
+
+
+def calculate(body, params):
+    '''
+    Calculates the region POA of an export and serializes the results. Runs in a worker process.
+
+    Args:
+        body (str): The SAR Topo export, as GeoJSON text
+        params (dict): The request's parameters, from parse_parameters
+
+    Returns:
+        response (str): The json response
+        timing (dict): The seconds spent in each stage
+        hit (bool): Whether the statistical layers came from the worker's cache
+    '''
+    cache = _cache if _cache is not None else StatisticalAreaCache(0)
+    timing = {}
+    start = time.perf_counter()
+    ipp, regions = poa.load_export(io.StringIO(body), params['epsg'])
+    timing['load'] = time.perf_counter() - start
+
+    mark = time.perf_counter()
+    layers, hit = cache.get(ipp, params['distances'], params['angles'], params['dot'], params['epsg'], params['exact'], params['outputs'], params['resolution'])
+    timing['statistical_areas'] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    region_pieces = intersect_regions(regions, layers['Statistical_Intersects'], params['epsg'], return_region=True,
+                                    grid_size=poa.REGION_GRID_SIZE, min_area=poa.REGION_MIN_AREA)
+    layers['Regions_Bisected'] = region_pieces.drop(columns='region')
+    timing['region_overlay'] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    # One POA per region, in file order, keyed on position so repeated titles stay apart.
+    # A region outside every statistical area has no pieces and a POA of 0
+    region_poa = region_pieces.groupby('region', sort=True)['Region_POA'].first().reindex(range(len(regions)), fill_value=0.0)
+    region_titles = regions.index.to_numpy()
+    regions_json = [{'title': str(region_titles[pos]), 'Region_POA': float(value)} for pos, value in region_poa.items()]
+
+    layers = reproject_layers({name: layers[name] for name in params['outputs']}, poa.EPSG_WGS84, params['precision'])
+    # The layers are already GeoJSON text, so they are spliced into the response rather than parsed again
+    layers_json = ", ".join(f"{json.dumps(name)}: {gdf.reset_index().to_json(drop_id=True)}" for name, gdf in layers.items())
+    timing['serialize'] = time.perf_counter() - mark
+    timing['total'] = time.perf_counter() - start
+
+    response = (f'{{"regions": {json.dumps(regions_json)}, "layers": {{{layers_json}}}, '
+                f'"cache_hit": {json.dumps(hit)}, "timing": {json.dumps(timing)}}}')
+    return response, timing, hit
+
+
+def make_handler(pool, metrics):
+    '''
+    Builds the request handler class bound to the worker pool and metrics.
+    '''
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            path = urlsplit(self.path).path
+            if path == '/health':
+                self.send_json(200, '{"status": "ok"}')
+            elif path == '/metrics':
+                self.send_json(200, json.dumps(metrics.summary()))
+            else:
+                self.send_json(404, json.dumps({'error': f"Unknown path {path}"}))
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            if url.path != '/poa':
+                self.send_json(404, json.dumps({'error': f"Unknown path {url.path}"}))
+                return
+
+            start = time.perf_counter()
+            try:
+                params = parse_parameters(url.query)
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+                response, timing, hit = pool.submit(calculate, body, params).result()
+            except (ValueError, KeyError) as e:
+                metrics.record({'total': time.perf_counter() - start}, error=True)
+                self.send_json(400, json.dumps({'error': str(e)}))
+                return
+            except Exception as e:
+                metrics.record({'total': time.perf_counter() - start}, error=True)
+                self.send_json(500, json.dumps({'error': f"{type(e).__name__}: {e}"}))
+                return
+
+            # Include the time spent waiting for a free worker
+            timing['request'] = time.perf_counter() - start
+            metrics.record(timing, cache_hit=hit)
+            self.send_json(200, response)
+
+        def send_json(self, status, body):
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            # The request timing is kept in the metrics instead
+            pass
+
+    return Handler
+
+
+def serve(host='127.0.0.1', port=8765, workers=None, cache_entries=32, cache_dir=None):
+    '''
+    Runs the POA service until interrupted.
+
+    Args:
+        host (str): The address to listen on
+        port (int): The port to listen on
+        workers (int): The number of worker processes calculating requests at the same time, None for one per CPU
+        cache_entries (int): The number of statistical layer sets each worker keeps in memory
+        cache_dir (str): The statistical area cache directory shared by the workers, None to keep them in memory only
+    '''
+    workers = workers or os.cpu_count() or 1
+    metrics = Metrics()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(cache_entries, cache_dir)) as pool:
+        # Start every worker now so the first requests don't pay for the imports
+        list(pool.map(time.sleep, [0.1] * workers))
+        server = ThreadingHTTPServer((host, port), make_handler(pool, metrics))
+        print(f"Serving POA on http://{host}:{server.server_address[1]}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve region POA calculations over HTTP on this machine")
+    parser.add_argument('--host', default='127.0.0.1', help="The address to listen on")
+    parser.add_argument('--port', type=int, default=8765, help="The port to listen on")
+    parser.add_argument('-w', '--workers', type=int, help="The number of worker processes calculating requests at the same time, defaults to one per CPU")
+    parser.add_argument('--cache-entries', type=int, default=32, help="The number of statistical layer sets each worker keeps in memory")
+    parser.add_argument('--cache', default=poa.CACHE_PATH if poa.USE_CACHE else None, help="The directory to cache statistical areas in")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.workers, args.cache_entries, args.cache)
+
+
+if __name__ == '__main__':
+    main()
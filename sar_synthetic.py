@@ -0,0 +1,123 @@
+if __name__ == '__main__':
+    print("\n\rThis file is being run directly\n\r")
+
+
+import json
+import numpy as np
+from pyproj import Transformer
+
+PATTERNS = ('tiled', 'overlapping', 'scattered')
+
+
+def synthetic_export(n_regions, vertices=4, pattern='tiled', extent_km=20, n_lines=0, overlap=0.25,
+                     ipp=(-82.67705, 35.43385), EPSG_LOCAL=32617, EPSG_WGS84=4326, seed=0):
+    """
+    Builds a SAR Topo style FeatureCollection with one IPP marker and a set of region polygons.
+
+    The regions cover a square of 2 * extent_km around the IPP:
+        tiled: a grid of squares sharing their edges exactly
+        overlapping: the same grid with every square grown by the overlap fraction
+        scattered: star shaped polygons of varying size at random positions
+
+    Args:
+        n_regions (int): The number of region polygons
+        vertices (int): The number of vertices of each region
+        pattern (str): The layout of the regions, one of PATTERNS
+        extent_km (float): The distance, in km, the regions reach from the IPP
+        n_lines (int): The number of LineString tracks to add, each with vertices * 10 points
+        overlap (float): The fraction each square grows by in the overlapping pattern
+        ipp (tuple): The IPP longitude and latitude
+        EPSG_LOCAL (int): The local spatial coordinate reference system the layout is built in
+        EPSG_WGS84 (int): The spatial coordinate reference system of the export
+        seed (int): The random seed
+
+    Returns:
+        collection (dict): The GeoJSON FeatureCollection
+    """
+    if pattern not in PATTERNS:
+        raise ValueError(f"Unknown pattern {pattern}, expected one of {PATTERNS}")
+
+    rng = np.random.default_rng(seed)
+    to_local = Transformer.from_crs(EPSG_WGS84, EPSG_LOCAL, always_xy=True)
+    to_wgs84 = Transformer.from_crs(EPSG_LOCAL, EPSG_WGS84, always_xy=True)
+    ipp_x, ipp_y = to_local.transform(*ipp)
+    extent = extent_km * 1000
+
+    features = [_feature('IPP', 'Marker', {'type': 'Point', 'coordinates': list(ipp)})]
+
+    if pattern == 'scattered':
+        centers = rng.uniform(-extent, extent, (n_regions, 2)) + (ipp_x, ipp_y)
+        sizes = rng.uniform(0.2, 1.0, n_regions) * 2 * extent / np.sqrt(n_regions)
+        angles = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+        rings = []
+        for (cx, cy), size in zip(centers, sizes):
+            # One radius per vertex keeps the polygon star shaped, so it never crosses itself
+            radius = size * rng.uniform(0.5, 1, vertices)
+            rings.append(np.column_stack((cx + radius * np.cos(angles), cy + radius * np.sin(angles))))
+    else:
+        side = int(np.ceil(np.sqrt(n_regions)))
+        width = 2 * extent / side
+        grow = width * overlap / 2 if pattern == 'overlapping' else 0
+        # Neighboring squares are built from the same grid lines so their edges match exactly
+        lines_x = ipp_x - extent + np.arange(side + 1) * width
+        lines_y = ipp_y - extent + np.arange(side + 1) * width
+        rings = []
+        for k in range(n_regions):
+            col, row = k // side, k % side
+            rings.append(_square(lines_x[col] - grow, lines_y[row] - grow, lines_x[col + 1] + grow, lines_y[row + 1] + grow, vertices))
+
+    for k, ring in enumerate(rings):
+        lon, lat = to_wgs84.transform(ring[:, 0], ring[:, 1])
+        coords = np.column_stack((lon, lat)).tolist()
+        coords.append(coords[0])
+        features.append(_feature(f"Region {k}", 'Shape', {'type': 'Polygon', 'coordinates': [coords]}))
+
+    for k in range(n_lines):
+        # A random walk away from a random start, like a GPS track
+        steps = rng.normal(0, extent / 50, (vertices * 10, 2)).cumsum(axis=0)
+        track = rng.uniform(-extent, extent, 2) + (ipp_x, ipp_y) + steps
+        lon, lat = to_wgs84.transform(track[:, 0], track[:, 1])
+        features.append(_feature(f"Track {k}", 'Shape', {'type': 'LineString', 'coordinates': np.column_stack((lon, lat)).tolist()}))
+
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def write_synthetic_export(path, n_regions, **kwargs):
+    """
+    Writes a synthetic export to a json file. Takes the same options as synthetic_export.
+
+    Args:
+        path (str): The file to write
+        n_regions (int): The number of region polygons
+
+    Returns:
+        path (str): The file written
+    """
+    with open(path, 'w') as f:
+        json.dump(synthetic_export(n_regions, **kwargs), f)
+    return path
+
+
+def _square(x0, y0, x1, y1, vertices):
+    """
+    Builds a square with its vertices spread evenly along its edges, so neighboring squares share them.
+    """
+    per_edge = max(1, vertices // 4)
+    t = np.arange(per_edge) / per_edge
+    return np.concatenate((
+        np.column_stack((x0 + t * (x1 - x0), np.full(per_edge, y0))),
+        np.column_stack((np.full(per_edge, x1), y0 + t * (y1 - y0))),
+        np.column_stack((x1 - t * (x1 - x0), np.full(per_edge, y1))),
+        np.column_stack((np.full(per_edge, x0), y1 - t * (y1 - y0))),
+    ))
+
+
+def _feature(title, feature_class, geometry):
+    """
+    Wraps a geometry as a SAR Topo feature.
+    """
+    return {
+        'type': 'Feature',
+        'geometry': geometry,
+        'properties': {'title': title, 'class': feature_class, 'description': ''},
+    }
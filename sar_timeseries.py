@@ -0,0 +1,196 @@
+if __name__ == '__main__':
+    print("\n\rThis file is being run directly\n\r")
+
+
+import json
+import unit_conversions as uc
+import pandas as pd
+import numpy as np
+import shapely
+from sar_annulus import INIT_POA, create_annuli
+from sar_dispersions import create_da_gdfs
+
+
+def scale_distances(distances, hours, reference_hours=24, exponent=0.5):
+    """
+    Scales the LPB distances to the time the subject has been missing.
+    The distances grow with (hours / reference_hours) ** exponent and stop growing at the
+    reference time, since the LPB distances are where subjects are eventually found.
+
+    Args:
+        distances (list): The LPB distances from the IPP, in km
+        hours (list): The hours missing of each time step
+        reference_hours (float): The hours missing at which the full LPB distances are reached
+        exponent (float): How fast the distances grow, 0.5 for a random walk and 1 for steady travel
+
+    Returns:
+        distances (ndarray): The distances of each time step (rows), in km
+    """
+    hours = np.asarray(hours, dtype=float)
+    scale = np.minimum(1, (hours / reference_hours) ** exponent)
+    return scale[:, np.newaxis] * np.asarray(distances, dtype=float)[np.newaxis, :]
+
+
+def load_schedule(path):
+    """
+    Reads a schedule of distance tables, a json list of {"hours": h, "distances": [five distances in km]}.
+
+    Args:
+        path (str): The path to the schedule json file
+
+    Returns:
+        hours (ndarray): The hours missing of each time step
+        distances (ndarray): The distances of each time step (rows), in km
+    """
+    with open(path) as f:
+        entries = json.load(f)
+    if not entries:
+        raise ValueError("No time steps found in the schedule")
+
+    entries = sorted(entries, key=lambda entry: entry['hours'])
+    return np.array([entry['hours'] for entry in entries], dtype=float), np.array([entry['distances'] for entry in entries], dtype=float)
+
+
+def split_regions_by_sector(regions_gdf, sectors_gdf, ipp):
+    """
+    Intersects the regions with the dispersion angle sectors once, so every time step can reuse the pieces.
+
+    Args:
+        regions_gdf (GeoDataFrame): The regions
+        sectors_gdf (GeoDataFrame): The dispersion angle sectors, reaching the largest distance of any time step
+        ipp (GeoDataFrame): The IPP geodataframe
+
+    Returns:
+        pieces (dict): The geometry, region position, sector position and area of each piece, with the
+            nearest and farthest distance of each piece from the IPP
+    """
+    region_geoms = regions_gdf.geometry.to_numpy()
+    sector_geoms = sectors_gdf.geometry.to_numpy()
+
+    tree = shapely.STRtree(sector_geoms)
+    region_pos, sector_pos = tree.query(region_geoms, predicate='intersects')
+    geoms = shapely.intersection(region_geoms[region_pos], sector_geoms[sector_pos])
+    area = shapely.area(geoms)
+    keep = area > 0
+    region_pos, sector_pos, geoms, area = region_pos[keep], sector_pos[keep], geoms[keep], area[keep]
+
+    # The farthest point of a polygon from the IPP is always one of its vertices
+    ipp_point = ipp.geometry.iloc[0]
+    coords, index = shapely.get_coordinates(geoms, return_index=True)
+    vertex_distance = np.hypot(coords[:, 0] - ipp_point.x, coords[:, 1] - ipp_point.y)
+    max_distance = np.zeros(len(geoms))
+    np.maximum.at(max_distance, index, vertex_distance)
+
+    return {
+        'geometry': geoms,
+        'region_pos': region_pos,
+        'sector_pos': sector_pos,
+        'area': area,
+        'min_distance': shapely.distance(ipp_point, geoms),
+        'max_distance': max_distance,
+    }
+
+
+def annulus_bounds(annulus_geoms, ipp):
+    """
+    Returns how far the edges of each annulus polygon are from the IPP. Each ring of the polygon
+    lies between its nearest edge and its farthest vertex.
+
+    Args:
+        annulus_geoms (ndarray): The annulus polygons, from create_annuli
+        ipp (GeoDataFrame): The IPP geodataframe
+
+    Returns:
+        outer_in (ndarray): The nearest the outer ring comes to the IPP
+        outer_out (ndarray): The farthest vertex of the outer ring
+        hole_in (ndarray): The nearest the hole comes to the IPP, 0 without a hole
+        hole_out (ndarray): The farthest vertex of the hole, 0 without a hole
+    """
+    ipp_point = ipp.geometry.iloc[0]
+    exterior = shapely.get_exterior_ring(annulus_geoms)
+    interior = shapely.get_interior_ring(annulus_geoms, 0)
+    has_hole = ~shapely.is_missing(interior)
+
+    def farthest(rings):
+        coords, index = shapely.get_coordinates(rings, return_index=True)
+        distance = np.zeros(len(rings))
+        np.maximum.at(distance, index, np.hypot(coords[:, 0] - ipp_point.x, coords[:, 1] - ipp_point.y))
+        return distance
+
+    hole_in = np.zeros(len(annulus_geoms))
+    hole_out = np.zeros(len(annulus_geoms))
+    hole_in[has_hole] = shapely.distance(ipp_point, interior[has_hole])
+    hole_out[has_hole] = farthest(interior[has_hole])
+
+    return shapely.distance(ipp_point, exterior), farthest(exterior), hole_in, hole_out
+
+
+def time_series_poa(regions_gdf, ipp, distances, angles, dot, EPSG_LOCAL, hours=None, resolution=None):
+    """
+    Calculates the region POA for each time step of a schedule of distance tables.
+
+    The dispersion angle sectors and the region pieces inside them are built once. Each step
+    only rebuilds the annuli. A piece that lies wholly inside or outside an annulus is settled
+    by its distance from the IPP, so only the pieces crossing a ring are intersected.
+    The statistical area and region POA follow intersect_gdfs and intersect_regions.
+
+    Args:
+        regions_gdf (GeoDataFrame): The regions
+        ipp (GeoDataFrame): The IPP geodataframe
+        distances (ndarray): The distances from the IPP of each time step (rows), in km
+        angles (list): The half dispersion angles, in degrees, either side of the direction of travel
+        dot (int): The direction of travel
+        EPSG_LOCAL (int): The local spatial coordinate reference system
+        hours (list): The hours missing of each time step, used for the columns
+        resolution (dict): The tolerance or area_error of the rings and sector caps, None for the default resolution
+
+    Returns:
+        table (DataFrame): The Region_POA of each region (rows) at each time step (columns)
+    """
+    resolution = resolution or {}
+    distances = np.asarray(distances, dtype=float)
+    hours = np.arange(len(distances)) if hours is None else np.asarray(hours)
+
+    # The sectors reach the largest distance of any step
+    max_distance = max(uc.km_to_m(list(distances.max(axis=0))))
+    sectors_gdf = create_da_gdfs(angles=angles, ipp=ipp, dot=dot, max_distance=max_distance, EPSG_LOCAL=EPSG_LOCAL, **resolution)
+    sector_geoms = sectors_gdf.geometry.to_numpy()
+    sector_poa = sectors_gdf['POA'].to_numpy(dtype=float)
+    n_regions = len(regions_gdf)
+
+    pieces = split_regions_by_sector(regions_gdf, sectors_gdf, ipp)
+    region_area = shapely.area(regions_gdf.geometry.to_numpy())[pieces['region_pos']]
+
+    # The annulus POA doesn't change between steps, only the rings do
+    annulus_poa = np.array(INIT_POA, dtype=float)
+    ipp_x, ipp_y = ipp.geometry.x.iloc[0], ipp.geometry.y.iloc[0]
+
+    table = np.zeros((n_regions, len(distances)))
+    for step, step_distances in enumerate(distances):
+        annulus_geoms = np.array(create_annuli(ipp_x, ipp_y, uc.km_to_m(list(step_distances)), **resolution), dtype=object)
+
+        # The statistical area of every annulus and sector, as in intersect_gdfs
+        cell_area = shapely.area(shapely.intersection(annulus_geoms[:, np.newaxis], sector_geoms[np.newaxis, :]))
+        annulus_area = shapely.area(annulus_geoms)[:, np.newaxis]
+        # Within this step's outer ring, a sector is the sum of its statistical areas
+        sector_area = cell_area.sum(axis=0)[np.newaxis, :]
+        cell_poa = (annulus_poa[:, np.newaxis] * np.divide(cell_area, annulus_area, out=np.zeros_like(cell_area), where=annulus_area > 0)
+                    + sector_poa[np.newaxis, :] * np.divide(cell_area, sector_area, out=np.zeros_like(cell_area), where=sector_area > 0))
+
+        outer_in, outer_out, hole_in, hole_out = annulus_bounds(annulus_geoms, ipp)
+        poa = np.zeros(len(pieces['area']))
+        for ring, annulus in enumerate(annulus_geoms):
+            inside = (pieces['min_distance'] >= hole_out[ring]) & (pieces['max_distance'] <= outer_in[ring])
+            outside = (pieces['max_distance'] <= hole_in[ring]) | (pieces['min_distance'] >= outer_out[ring])
+            crossing = ~inside & ~outside
+
+            area = np.where(inside, pieces['area'], 0.0)
+            area[crossing] = shapely.area(shapely.intersection(pieces['geometry'][crossing], annulus))
+
+            # The region portion is rounded like intersect_regions so each step matches a single run
+            portion = np.round(area / region_area, 2)
+            poa += portion * cell_poa[ring, pieces['sector_pos']]
+
+        table[:, step] = np.bincount(pieces['region_pos'], weights=poa, minlength=n_regions)
+
+    return pd.DataFrame(np.round(table, 2), index=regions_gdf.index, columns=pd.Index(hours, name='hours'))
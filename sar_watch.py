@@ -0,0 +1,170 @@
+if __name__ == '__main__':
+    print("\n\rThis file is being run directly\n\r")
+
+
+import hashlib
+import json
+import os
+import time
+import pandas as pd
+import geopandas as gp
+import shapely
+from sar_intersections import intersect_regions
+from sar_output import reproject_layers
+
+
+def region_keys(regions_gdf):
+    """
+    Identifies each region by its title and the hash of its geometry.
+    Repeated titles are numbered in file order so every region has its own key.
+
+    Args:
+        regions_gdf (GeoDataFrame): The regions, indexed by title
+
+    Returns:
+        keys (list): The key of each region, in order
+        hashes (list): The geometry hash of each region, in order
+    """
+    titles = pd.Series(regions_gdf.index.astype(str))
+    occurrence = titles.groupby(titles).cumcount()
+    keys = [title if n == 0 else f"{title}#{n}" for title, n in zip(titles, occurrence)]
+    hashes = [hashlib.sha1(wkb).hexdigest() for wkb in shapely.to_wkb(regions_gdf.geometry.to_numpy())]
+
+    return keys, hashes
+
+
+def serialize_features(region_intersections_gdf, EPSG_WGS84, precision=None):
+    """
+    Converts region pieces to GeoJSON feature strings in WGS84.
+
+    Args:
+        region_intersections_gdf (GeoDataFrame): The region pieces, indexed by title
+        EPSG_WGS84 (int): The spatial coordinate reference system of the output
+        precision (int): The number of decimal places to round the coordinates to, None to keep them all
+
+    Returns:
+        features (list): One GeoJSON feature string per piece
+    """
+    if region_intersections_gdf.empty:
+        return []
+    region_intersections_gdf = reproject_layers({'pieces': region_intersections_gdf}, EPSG_WGS84, precision)['pieces']
+    collection = json.loads(region_intersections_gdf.reset_index().to_json(drop_id=True))
+    return [json.dumps(feature) for feature in collection['features']]
+
+
+def update_regions(state, regions_gdf, intersections_gdf, EPSG_LOCAL, EPSG_WGS84, grid_size=None, min_area=0.0, precision=None, serialize=True):
+    """
+    Recomputes the region overlay for the added and changed regions only, reusing the
+    pieces and serialized features of the regions that did not change.
+
+    Args:
+        state (dict): The previous run's region hashes, pieces and features, empty for the first run
+        regions_gdf (GeoDataFrame): The regions
+        intersections_gdf (GeoDataFrame): The statistical areas
+        EPSG_LOCAL (int): The local spatial coordinate reference system
+        EPSG_WGS84 (int): The spatial coordinate reference system of the output
+        grid_size (float): The precision grid, in meters, the pieces are snapped to, None for full precision
+        min_area (float): The smallest piece to keep, in square meters
+        precision (int): The number of decimal places to round the feature coordinates to, None to keep them all
+        serialize (bool): Whether to keep GeoJSON features of the pieces for write_features
+
+    Returns:
+        state (dict): The region CRS, hashes, pieces and features for the next run
+        changes (dict): The keys of the added, changed and removed regions
+    """
+    keys, hashes = region_keys(regions_gdf)
+    previous = state.get('hashes', {})
+
+    added = [key for key in keys if key not in previous]
+    changed = [key for key, geometry_hash in zip(keys, hashes) if key in previous and previous[key] != geometry_hash]
+    removed = [key for key in previous if key not in set(keys)]
+
+    pieces = {key: state['pieces'][key] for key in keys if key not in added and key not in changed}
+    features = {key: state['features'][key] for key in pieces} if serialize else {}
+
+    # Overlay the added and changed regions in one batch, then split the pieces back out per region
+    dirty = [pos for pos, key in enumerate(keys) if key in set(added) | set(changed)]
+    if dirty:
+        subset = regions_gdf.iloc[dirty]
+        subset_pieces = intersect_regions(subset, intersections_gdf, EPSG_LOCAL, return_region=True, grid_size=grid_size, min_area=min_area)
+        for region_pos, group in subset_pieces.groupby('region', sort=False):
+            key = keys[dirty[region_pos]]
+            pieces[key] = group.drop(columns='region')
+        for pos in dirty:
+            key = keys[pos]
+            if key not in pieces:
+                pieces[key] = subset_pieces.iloc[0:0].drop(columns='region')
+            if serialize:
+                features[key] = serialize_features(pieces[key], EPSG_WGS84, precision)
+
+    state = {
+        'crs': regions_gdf.crs,
+        'keys': keys,
+        'hashes': dict(zip(keys, hashes)),
+        'pieces': pieces,
+        'features': features,
+    }
+    return state, {'added': added, 'changed': changed, 'removed': removed}
+
+
+def collect_pieces(state):
+    """
+    Joins the pieces of every region, in region order, into a single layer.
+
+    Args:
+        state (dict): The state from update_regions
+
+    Returns:
+        region_intersections_gdf (GeoDataFrame): The region pieces, indexed by title, empty without any regions
+    """
+    if not state.get('keys'):
+        return gp.GeoDataFrame(geometry=[], crs=state.get('crs'))
+    return pd.concat([state['pieces'][key] for key in state['keys']])
+
+
+def write_features(features, keys, path):
+    """
+    Writes the serialized features of the regions, in region order, as a FeatureCollection.
+
+    Args:
+        features (dict): The feature strings of each region
+        keys (list): The region keys, in the order to write them
+        path (str): The file to write
+    """
+    body = ",\n".join(feature for key in keys for feature in features[key])
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        f.write('{"type": "FeatureCollection", "features": [\n' + body + '\n]}\n')
+    os.replace(tmp_path, path)
+
+
+def wait_for_change(file, last_stat, interval):
+    """
+    Polls the file until its modification time or size changes and stays unchanged
+    for one more interval, so a file still being written is not read.
+
+    Args:
+        file (str): The file to watch
+        last_stat (tuple): The (mtime, size) of the file when it was last read
+        interval (float): The polling interval, in seconds
+
+    Returns:
+        stat (tuple): The new (mtime, size) of the file
+    """
+    while True:
+        time.sleep(interval)
+        try:
+            stat = os.stat(file)
+        except FileNotFoundError:
+            continue
+        current = (stat.st_mtime_ns, stat.st_size)
+        if current == last_stat:
+            continue
+
+        time.sleep(interval)
+        try:
+            stat = os.stat(file)
+        except FileNotFoundError:
+            continue
+        if (stat.st_mtime_ns, stat.st_size) == current:
+            return current
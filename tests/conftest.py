@@ -0,0 +1,42 @@
+import os
+import sys
+import types
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import main as poa
+from sar_synthetic import write_synthetic_export
+
+SAMPLE = os.path.join(ROOT, 'POA-Test1.json')
+
+
+@pytest.fixture(scope='session')
+def synthetic(tmp_path_factory):
+    """
+    A synthetic export of scattered regions and tracks, all inside the outer ring.
+    """
+    path = tmp_path_factory.mktemp('exports') / 'synthetic.json'
+    return write_synthetic_export(str(path), 150, vertices=12, pattern='scattered', extent_km=12, n_lines=20, seed=3)
+
+
+@pytest.fixture(params=['sample', 'synthetic'])
+def export(request, synthetic):
+    """
+    The sample export, then the synthetic one.
+    """
+    return SAMPLE if request.param == 'sample' else synthetic
+
+
+@pytest.fixture
+def settings():
+    """
+    Restores the variables at the top of main.py that configure replaces.
+    """
+    saved = {
+        name: value for name, value in vars(poa).items()
+        if not name.startswith('_') and not callable(value) and not isinstance(value, types.ModuleType)
+    }
+    yield poa
+    vars(poa).update(saved)
@@ -0,0 +1,48 @@
+import json
+import os
+import geopandas as gp
+import numpy as np
+import main as poa
+from sar_batch import load_incidents, run_batch
+from conftest import SAMPLE
+
+OUTPUTS = ['Regions_Bisected', 'DIPP_Annuli']
+
+
+def test_two_incident_manifest(tmp_path, synthetic):
+    manifest = tmp_path / 'manifest.json'
+    manifest.write_text(json.dumps([
+        {'name': 'sample', 'file': SAMPLE},
+        {'name': 'near', 'file': synthetic, 'distances': [d / 2 for d in poa.distances_from_ipp], 'dot': 90},
+    ]))
+    incidents = load_incidents(str(manifest))
+    assert [incident['name'] for incident in incidents] == ['sample', 'near']
+    assert incidents[0]['distances'] == poa.distances_from_ipp and incidents[1]['dot'] == 90
+
+    outpath = tmp_path / 'output'
+    summary = run_batch(incidents, str(outpath), workers=2, outputs=OUTPUTS)
+
+    assert list(summary['name']) == ['sample', 'near']
+    assert list(summary['status']) == ['ok', 'ok']
+    assert sorted(os.listdir(outpath)) == ['near', 'sample', 'summary.csv']
+    for incident in incidents:
+        assert sorted(os.listdir(outpath / incident['name'])) == sorted(name + '.json' for name in OUTPUTS)
+
+    # Each incident matches a single run with its own inputs
+    for incident, row in zip(incidents, summary.itertuples()):
+        layers = poa.calculate_poa(incident['file'], incident['distances'], incident['angles'], incident['dot'], incident['epsg'], outputs=OUTPUTS)
+        assert row.region_pieces == len(layers['Regions_Bisected'])
+        assert row.max_Region_POA == layers['Regions_Bisected']['Region_POA'].max()
+        written = gp.read_file(outpath / incident['name'] / 'Regions_Bisected.json')
+        np.testing.assert_allclose(written['Region_POA'], layers['Regions_Bisected']['Region_POA'])
+
+
+def test_failed_incident_is_reported(tmp_path):
+    manifest = tmp_path / 'manifest.json'
+    manifest.write_text(json.dumps([{'name': 'sample', 'file': SAMPLE}, {'file': 'missing.json'}]))
+
+    summary = run_batch(load_incidents(str(manifest)), str(tmp_path / 'output'), workers=2, outputs=OUTPUTS)
+
+    assert list(summary['name']) == ['sample', 'missing']
+    assert list(summary['status']) == ['ok', 'failed']
+    assert 'ValueError' in summary['error'].iloc[1]
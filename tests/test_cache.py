@@ -0,0 +1,92 @@
+import os
+import time
+import pytest
+import main as poa
+from geopandas.testing import assert_geodataframe_equal
+from sar_cache import cache_key, load_cached, store_cached, evict, STALE_TMP_SECONDS
+from conftest import SAMPLE
+
+MAX_BYTES = 2 ** 30
+
+
+@pytest.fixture(scope='module')
+def statistical():
+    ipp, _ = poa.load_export(SAMPLE, poa.EPSG_LOCAL)
+    layers = poa.statistical_areas(ipp, poa.distances_from_ipp, poa.dispersion_angles, poa.direction_of_travel, poa.EPSG_LOCAL)
+    return ipp, layers
+
+
+def key_of(ipp, distances=None, EPSG_LOCAL=None):
+    return cache_key(ipp, distances or poa.distances_from_ipp, poa.dispersion_angles, poa.direction_of_travel, EPSG_LOCAL or poa.EPSG_LOCAL)
+
+
+def test_store_then_load(tmp_path, statistical):
+    ipp, layers = statistical
+    key = key_of(ipp)
+    store_cached(str(tmp_path), key, layers, MAX_BYTES)
+
+    cached = load_cached(str(tmp_path), key)
+    assert cached.keys() == layers.keys()
+    for name, gdf in layers.items():
+        if gdf is None:
+            assert cached[name] is None
+        else:
+            assert_geodataframe_equal(cached[name], gdf)
+    assert os.listdir(tmp_path) == [key + '.pkl']
+
+
+def test_unknown_key_is_a_miss(tmp_path, statistical):
+    assert load_cached(str(tmp_path), key_of(statistical[0])) is None
+
+
+@pytest.mark.parametrize('damage', ['truncate', 'garbage'])
+def test_unreadable_entry_is_a_miss_and_removed(tmp_path, statistical, damage):
+    ipp, layers = statistical
+    key = key_of(ipp)
+    store_cached(str(tmp_path), key, layers, MAX_BYTES)
+    path = tmp_path / (key + '.pkl')
+    body = path.read_bytes()
+    path.write_bytes(body[:len(body) // 2] if damage == 'truncate' else b'not a pickle')
+
+    assert load_cached(str(tmp_path), key) is None
+    assert not path.exists()
+
+
+def test_key_changes_with_the_inputs(statistical):
+    ipp = statistical[0]
+    moved = ipp.copy()
+    moved.geometry = moved.geometry.translate(xoff=1)
+    # Reprojection noise below a centimeter still hits the cache
+    jittered = ipp.copy()
+    jittered.geometry = jittered.geometry.translate(xoff=1e-4)
+
+    key = key_of(ipp)
+    assert key_of(jittered) == key
+    assert key_of(moved) != key
+    assert key_of(ipp, distances=[d * 2 for d in poa.distances_from_ipp]) != key
+    assert key_of(ipp, EPSG_LOCAL=32616) != key
+
+
+def test_evict_removes_the_oldest_entries(tmp_path):
+    now = time.time()
+    for age, name in enumerate(['newest', 'middle', 'oldest']):
+        path = tmp_path / (name + '.pkl')
+        path.write_bytes(b'x' * 100)
+        os.utime(path, (now - age * 60, now - age * 60))
+
+    evict(str(tmp_path), 250)
+
+    assert sorted(os.listdir(tmp_path)) == ['middle.pkl', 'newest.pkl']
+
+
+def test_evict_removes_stale_temporary_files(tmp_path):
+    now = time.time()
+    stale = tmp_path / 'interrupted.tmp'
+    stale.write_bytes(b'x')
+    os.utime(stale, (now - 2 * STALE_TMP_SECONDS, now - 2 * STALE_TMP_SECONDS))
+    # A write still in progress keeps its file
+    (tmp_path / 'writing.tmp').write_bytes(b'x')
+
+    evict(str(tmp_path), MAX_BYTES)
+
+    assert os.listdir(tmp_path) == ['writing.tmp']
@@ -0,0 +1,57 @@
+import json
+import numpy as np
+import pytest
+import main as poa
+from sar_intersections import intersect_regions
+from sar_consensus import load_profiles, consensus_region_poa
+
+
+@pytest.fixture
+def incident(export):
+    ipp, regions = poa.load_export(export, poa.EPSG_LOCAL)
+    layers = poa.statistical_areas(ipp, poa.distances_from_ipp, poa.dispersion_angles, poa.direction_of_travel, poa.EPSG_LOCAL)
+    return ipp, regions, layers['Statistical_Intersects']
+
+
+def region_poa(regions, intersects_gdf):
+    region_intersections_gdf = intersect_regions(regions, intersects_gdf, poa.EPSG_LOCAL)
+    titles = region_intersections_gdf.index.str.split(' | ', regex=False).str[0]
+    # Regions outside every statistical area have no pieces
+    return region_intersections_gdf['Region_POA'].groupby(titles).first().reindex(regions.index, fill_value=0.0)
+
+
+def test_single_profile_matches_intersect_regions(incident):
+    _, regions, intersects_gdf = incident
+
+    table = consensus_region_poa(regions, [intersects_gdf], [1], ['Only'])
+
+    expected = region_poa(regions, intersects_gdf)
+    np.testing.assert_allclose(table['Only'], expected)
+    np.testing.assert_allclose(table['Consensus_POA'], expected)
+
+
+def test_consensus_weights_the_profiles(incident):
+    ipp, regions, intersects_gdf = incident
+    near = poa.statistical_areas(ipp, [d / 2 for d in poa.distances_from_ipp], poa.dispersion_angles, poa.direction_of_travel, poa.EPSG_LOCAL)['Statistical_Intersects']
+
+    table = consensus_region_poa(regions, [intersects_gdf, near], [3, 1], ['Far', 'Near'])
+
+    np.testing.assert_allclose(table['Far'], region_poa(regions, intersects_gdf))
+    np.testing.assert_allclose(table['Near'], region_poa(regions, near))
+    # The consensus weights the unrounded profile totals, so it can differ from the rounded columns by a rounding step
+    np.testing.assert_allclose(table['Consensus_POA'], 0.75 * table['Far'] + 0.25 * table['Near'], atol=0.01)
+
+
+def test_load_profiles_fills_in_the_defaults(tmp_path):
+    path = tmp_path / 'profiles.json'
+    path.write_text(json.dumps([{'name': 'hiker', 'weight': 2}, {'ipp': 'PLS', 'distances': [1, 2, 3, 4, 5]}]))
+
+    profiles = load_profiles(str(path), poa.distances_from_ipp, poa.dispersion_angles, poa.direction_of_travel)
+
+    assert profiles[0] == {'name': 'hiker', 'ipp': 'IPP', 'distances': poa.distances_from_ipp, 'angles': poa.dispersion_angles,
+                           'dot': poa.direction_of_travel, 'weight': 2.0}
+    assert profiles[1]['name'] == 'PLS 2' and profiles[1]['distances'] == [1, 2, 3, 4, 5] and profiles[1]['weight'] == 1.0
+
+    path.write_text(json.dumps([{'weight': 0}]))
+    with pytest.raises(ValueError):
+        load_profiles(str(path), poa.distances_from_ipp, poa.dispersion_angles, poa.direction_of_travel)
@@ -0,0 +1,66 @@
+import json
+import os
+import geopandas as gp
+import numpy as np
+import pytest
+from conftest import SAMPLE
+
+# A neighbouring UTM zone, so layers built in the wrong zone land far from the IPP
+EPSG_OTHER = 32616
+
+MODES = {
+    'overlay': [],
+    'lines': ['--lines'],
+    'raster': ['--raster'],
+    'sensitivity': ['--sensitivity', '--sensitivity-runs', '20'],
+    'time series': ['--time-series', '6', '24'],
+    'resolution report': ['--resolution-report'],
+    'consensus': ['--consensus', 'PROFILES'],
+    'watch': ['--watch'],
+}
+
+
+@pytest.fixture
+def ipp_lonlat():
+    ipp = gp.read_file(SAMPLE).query("title == 'IPP'").geometry.iloc[0]
+    return ipp.x, ipp.y
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_epsg_local_reaches_every_mode(settings, tmp_path, monkeypatch, ipp_lonlat, mode):
+    poa = settings
+    profiles = tmp_path / 'profiles.json'
+    profiles.write_text(json.dumps([{'name': 'near', 'distances': [1, 2, 3, 4, 5]}, {'name': 'far'}]))
+    extra = [str(profiles) if arg == 'PROFILES' else arg for arg in MODES[mode]]
+    poa.configure(poa.parse_arguments([SAMPLE, '--path', str(tmp_path), '--no-show-plots', '--epsg-local', str(EPSG_OTHER)] + extra))
+
+    # Record the CRS every mode loads the export in
+    loaded = []
+    load_export = poa.load_export
+
+    def spy(*args, **kwargs):
+        result = load_export(*args, **kwargs)
+        loaded.append(result[1].crs.to_epsg())
+        return result
+
+    def stop(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(poa, 'load_export', spy)
+    monkeypatch.setattr(poa, 'wait_for_change', stop)
+    poa.main()
+
+    assert loaded and set(loaded) == {EPSG_OTHER}
+
+    # The written layers surround the IPP and the region pieces lie on the regions
+    if mode in ('overlay', 'watch'):
+        outpath = poa.output_path()
+        annuli = gp.read_file(os.path.join(outpath, 'DIPP_Annuli.json'))
+        center = annuli.geometry.iloc[0].centroid
+        np.testing.assert_allclose((center.x, center.y), ipp_lonlat, atol=1e-3)
+
+        export = gp.read_file(SAMPLE)
+        regions = export[export.geometry.geom_type == 'Polygon']
+        pieces = gp.read_file(os.path.join(outpath, 'Regions_Bisected.json'))
+        assert not pieces.empty
+        np.testing.assert_allclose(pieces.total_bounds, regions.total_bounds, atol=1e-5)
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import main as poa
+from sar_intersections import intersect_gdfs
+from sar_exact import exact_statistical_table, exact_cell_areas, create_exact_gdf
+from conftest import SAMPLE
+
+
+def polygon_table():
+    _, dipp_gdf, _, da_gdf = poa.set_variables(poa.distances_from_ipp, poa.dispersion_angles, poa.direction_of_travel, SAMPLE, poa.EPSG_LOCAL)
+    return intersect_gdfs(dipp_gdf, da_gdf, poa.EPSG_LOCAL)
+
+
+def test_exact_table_matches_the_polygon_table():
+    angles, _ = poa.format_angles(poa.dispersion_angles, poa.direction_of_travel)
+    intersects_gdf = polygon_table()
+    table = exact_statistical_table(poa.distances_from_ipp, angles)
+
+    assert sorted(table.index) == sorted(intersects_gdf.index)
+    table = table.reindex(intersects_gdf.index)
+    # The polygons only approximate the circles, which moves the ring POA share slightly
+    for column in ('di_POA', 'da_POA', 'POA'):
+        np.testing.assert_allclose(table[column], intersects_gdf[column], atol=1e-4)
+
+    area = pd.Series(exact_cell_areas(poa.distances_from_ipp, angles), index=exact_statistical_table(poa.distances_from_ipp, angles).index)
+    np.testing.assert_allclose(area.reindex(intersects_gdf.index), intersects_gdf.geometry.area, rtol=2e-3)
+
+
+def test_exact_geometry_turns_with_the_direction_of_travel():
+    ipp, _ = poa.load_export(SAMPLE, poa.EPSG_LOCAL)
+    angles, dot = poa.format_angles(poa.dispersion_angles, poa.direction_of_travel)
+    gdf = create_exact_gdf(ipp, poa.distances_from_ipp, angles, dot, poa.EPSG_LOCAL)
+    turned = create_exact_gdf(ipp, poa.distances_from_ipp, angles, dot + 90, poa.EPSG_LOCAL)
+
+    pd.testing.assert_frame_equal(pd.DataFrame(gdf.drop(columns='geometry')), pd.DataFrame(turned.drop(columns='geometry')))
+    np.testing.assert_allclose(gdf.geometry.area, turned.geometry.area, rtol=1e-6)
+    assert not gdf.geometry.geom_equals_exact(turned.geometry, tolerance=1).any()
@@ -0,0 +1,36 @@
+import io
+import geopandas as gp
+import shapely
+import pytest
+import main as poa
+from sar_export import read_export
+
+
+def expected_features(path, lines=False):
+    """
+    The IPP, regions and, optionally, lines of an export read whole by geopandas.
+    """
+    gdf = gp.read_file(path).to_crs(epsg=poa.EPSG_LOCAL)
+    types = ['Polygon'] + (['LineString'] if lines else [])
+    gdf = gdf[(gdf['title'] == 'IPP') | gdf.geometry.geom_type.isin(types)]
+    return gdf.reset_index(drop=True)
+
+
+def assert_same_features(gdf, expected):
+    assert list(gdf['title']) == list(expected['title'])
+    assert gdf.crs.to_epsg() == poa.EPSG_LOCAL
+    geometries = shapely.force_2d(expected.geometry.to_numpy())
+    assert shapely.equals_exact(gdf.geometry.to_numpy(), geometries, tolerance=1e-6).all()
+
+
+@pytest.mark.parametrize('lines', [False, True])
+def test_read_export_matches_read_file(export, lines):
+    gdf = read_export(export, poa.EPSG_LOCAL, lines=lines)
+    assert_same_features(gdf, expected_features(export, lines))
+
+
+def test_read_export_from_file_object_in_small_chunks(export):
+    with open(export) as f:
+        body = f.read()
+    gdf = read_export(io.StringIO(body), poa.EPSG_LOCAL, chunk_size=97)
+    assert_same_features(gdf, expected_features(export))
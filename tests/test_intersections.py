@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+import main as poa
+from sar_intersections import intersect_gdfs, intersect_regions
+
+
+def reference_intersect_gdfs(gdf1, gdf2):
+    """
+    The row by row statistical area overlay the vectorized one replaced.
+    """
+    rows = []
+    for title1, row1 in gdf1.iterrows():
+        for title2, row2 in gdf2.iterrows():
+            intersection = row1.geometry.intersection(row2.geometry)
+            di_poa = row1['POA'] * (intersection.area / row1.geometry.area)
+            da_poa = row2['POA'] * (intersection.area / row2.geometry.area)
+            rows.append((f"dipp {title1} | da {title2}", intersection.area, di_poa, da_poa))
+    return rows
+
+
+def reference_intersect_regions(regions_gdf, intersections_gdf):
+    """
+    The row by row region overlay the vectorized one replaced.
+    """
+    rows = []
+    totals = {}
+    for region_idx, region in regions_gdf.iterrows():
+        cumulative = 0
+        for intersection_idx, intersection in intersections_gdf.iterrows():
+            piece = region.geometry.intersection(intersection.geometry)
+            if piece.area > 0:
+                portion = round(piece.area / region.geometry.area, 2)
+                rows.append((f"{region_idx} | {intersection_idx}", piece.area, round(portion * intersection['POA'], 2), region_idx))
+                cumulative += portion * intersection['POA']
+        totals[region_idx] = round(cumulative, 2)
+    return rows, totals
+
+
+@pytest.fixture
+def layers(export):
+    regions, dipp_gdf, _, da_gdf = poa.set_variables(poa.distances_from_ipp, poa.dispersion_angles, poa.direction_of_travel, export, poa.EPSG_LOCAL)
+    return regions, dipp_gdf, da_gdf
+
+
+def test_intersect_gdfs_matches_row_by_row(layers):
+    _, dipp_gdf, da_gdf = layers
+    intersects_gdf = intersect_gdfs(dipp_gdf, da_gdf, poa.EPSG_LOCAL)
+    expected = reference_intersect_gdfs(dipp_gdf, da_gdf)
+
+    assert list(intersects_gdf.index) == [title for title, _, _, _ in expected]
+    np.testing.assert_allclose(intersects_gdf.geometry.area, [area for _, area, _, _ in expected])
+    np.testing.assert_allclose(intersects_gdf['di_POA'], [di for _, _, di, _ in expected])
+    np.testing.assert_allclose(intersects_gdf['da_POA'], [da for _, _, _, da in expected])
+    np.testing.assert_allclose(intersects_gdf['POA'], [di + da for _, _, di, da in expected])
+
+
+def test_intersect_regions_matches_row_by_row(layers):
+    regions, dipp_gdf, da_gdf = layers
+    intersects_gdf = intersect_gdfs(dipp_gdf, da_gdf, poa.EPSG_LOCAL)
+    region_intersections_gdf = intersect_regions(regions, intersects_gdf, poa.EPSG_LOCAL)
+    expected, totals = reference_intersect_regions(regions, intersects_gdf)
+
+    assert list(region_intersections_gdf.index) == [title for title, _, _, _ in expected]
+    np.testing.assert_allclose(region_intersections_gdf.geometry.area, [area for _, area, _, _ in expected])
+    np.testing.assert_allclose(region_intersections_gdf['Region_Portion_POA'], [poa_value for _, _, poa_value, _ in expected])
+    np.testing.assert_allclose(region_intersections_gdf['Region_POA'], [totals[region] for _, _, _, region in expected])
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import geopandas as gp
+import shapely
+import pytest
+import main as poa
+from sar_lines import intersect_lines
+
+
+@pytest.fixture(scope='module')
+def lines_and_areas(synthetic):
+    ipp, _, lines = poa.load_export(synthetic, poa.EPSG_LOCAL, lines=True)
+    layers = poa.statistical_areas(ipp, poa.distances_from_ipp, poa.dispersion_angles, poa.direction_of_travel, poa.EPSG_LOCAL)
+    return lines, layers['Statistical_Intersects']
+
+
+def line_titles(line_segments_gdf):
+    return line_segments_gdf.index.str.split(' | ', regex=False).str[0]
+
+
+def test_segments_cover_each_line_once(lines_and_areas):
+    lines, intersects_gdf = lines_and_areas
+    line_segments_gdf = intersect_lines(lines, intersects_gdf, poa.EPSG_LOCAL)
+    by_line = line_segments_gdf.groupby(line_titles(line_segments_gdf))
+
+    # Every track lies inside the outer ring, so its segments add back up to the whole line
+    line_km = pd.Series(shapely.length(lines.geometry.to_numpy()) / 1e3, index=lines.index)
+    np.testing.assert_allclose(by_line['Length_km'].sum(), line_km.reindex(by_line.groups.keys()), atol=1e-3 * by_line.size().max())
+    assert (by_line['Line_Portion'].sum() - 1).abs().max() <= 0.005 * by_line.size().max()
+
+
+def test_line_poa_is_the_total_of_its_segments(lines_and_areas):
+    lines, intersects_gdf = lines_and_areas
+    line_segments_gdf = intersect_lines(lines, intersects_gdf, poa.EPSG_LOCAL)
+    by_line = line_segments_gdf.groupby(line_titles(line_segments_gdf))
+
+    # The segment POA is rounded for output, the line total is not
+    assert (by_line['Segment_POA'].sum() - by_line['Line_POA'].first()).abs().max() <= 0.005 * by_line.size().max()
+    # A line's POA is its length weighted average statistical area POA, so it can't exceed the highest one
+    assert by_line['Line_POA'].first().max() <= intersects_gdf['POA'].max() + 0.01
+
+
+def test_segments_do_not_depend_on_other_lines(lines_and_areas):
+    lines, intersects_gdf = lines_and_areas
+    line_segments_gdf = intersect_lines(lines, intersects_gdf, poa.EPSG_LOCAL)
+    subset_gdf = intersect_lines(lines.iloc[:5], intersects_gdf, poa.EPSG_LOCAL)
+
+    columns = ['Length_km', 'Line_Portion', 'Segment_POA', 'Line_POA']
+    pd.testing.assert_frame_equal(pd.DataFrame(subset_gdf[columns]), pd.DataFrame(line_segments_gdf.loc[subset_gdf.index, columns]))
+
+
+def test_line_inside_one_statistical_area_takes_its_poa(lines_and_areas):
+    _, intersects_gdf = lines_and_areas
+    area = intersects_gdf.iloc[intersects_gdf['POA'].to_numpy().argmax()]
+    point = area.geometry.representative_point()
+    stub = gp.GeoDataFrame({'title': ['Stub'], 'geometry': [shapely.LineString([(point.x - 1, point.y), (point.x + 1, point.y)])]},
+                           crs=poa.EPSG_LOCAL).set_index('title')
+
+    line_segments_gdf = intersect_lines(stub, intersects_gdf, poa.EPSG_LOCAL)
+
+    assert len(line_segments_gdf) == 1
+    assert line_segments_gdf['Line_Portion'].iloc[0] == 1
+    assert line_segments_gdf['Segment_POA'].iloc[0] == round(area['POA'], 2)
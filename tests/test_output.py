@@ -0,0 +1,92 @@
+import os
+import geopandas as gp
+import numpy as np
+import shapely
+import pytest
+import main as poa
+from sar_output import FORMATS, COMBINED_NAME, reproject_layers, write_layers
+from sar_profile import start_profiling, stop_profiling
+from conftest import SAMPLE
+
+NAMES = ['Regions_Bisected', 'Statistical_Intersects', 'DIPP_Annuli']
+POA_COLUMNS = {'Regions_Bisected': 'Region_POA', 'Statistical_Intersects': 'POA', 'DIPP_Annuli': 'POA'}
+
+
+@pytest.fixture(scope='module')
+def layers():
+    layers = poa.calculate_poa(SAMPLE, poa.distances_from_ipp, poa.dispersion_angles, poa.direction_of_travel, poa.EPSG_LOCAL, outputs=NAMES)
+    return {name: layers[name] for name in NAMES}
+
+
+def formats():
+    # GeoParquet needs pyarrow
+    available = ['GeoJSON', 'FlatGeobuf']
+    try:
+        import pyarrow
+        available.append('GeoParquet')
+    except ImportError:
+        pass
+    return available
+
+
+def read_layer(path, output_format):
+    return gp.read_parquet(path) if output_format == 'GeoParquet' else gp.read_file(path)
+
+
+def assert_same_layer(written, expected, name, tolerance):
+    # FlatGeobuf writes the features in the order of its spatial index
+    assert written.crs.to_epsg() == poa.EPSG_WGS84
+    written = written.set_index('title').loc[expected.index]
+    assert shapely.equals_exact(written.geometry.to_numpy(), expected.geometry.to_numpy(), tolerance=tolerance).all()
+    np.testing.assert_allclose(written[POA_COLUMNS[name]], expected[POA_COLUMNS[name]])
+
+
+@pytest.mark.parametrize('output_format', formats())
+def test_separate_layers_roundtrip(tmp_path, layers, output_format):
+    paths = write_layers(layers, str(tmp_path), poa.EPSG_WGS84, output_format)
+
+    assert paths == [os.path.join(tmp_path, name + FORMATS[output_format]) for name in NAMES]
+    expected = reproject_layers(layers, poa.EPSG_WGS84)
+    for name, path in zip(NAMES, paths):
+        written = read_layer(path, output_format)
+        assert sorted(written['title']) == sorted(expected[name].index)
+        assert_same_layer(written, expected[name], name, 1e-9)
+
+
+@pytest.mark.parametrize('output_format', formats())
+def test_combined_layers_roundtrip(tmp_path, layers, output_format):
+    paths = write_layers(layers, str(tmp_path), poa.EPSG_WGS84, output_format, combined=True, precision=6)
+
+    assert paths == [os.path.join(tmp_path, COMBINED_NAME + FORMATS[output_format])]
+    written = read_layer(paths[0], output_format)
+    expected = reproject_layers(layers, poa.EPSG_WGS84, precision=6)
+    assert sorted(written['layer'].unique()) == sorted(NAMES)
+    for name in NAMES:
+        part = written[written['layer'] == name]
+        assert sorted(part['title']) == sorted(expected[name].index)
+        assert_same_layer(part, expected[name], name, 1e-6)
+    # Columns a layer doesn't have are left empty
+    assert written.loc[written['layer'] == 'DIPP_Annuli', 'Region_POA'].isna().all()
+
+
+def test_coordinates_are_rounded_to_the_precision(tmp_path, layers):
+    path = write_layers(layers, str(tmp_path), poa.EPSG_WGS84, precision=4)[0]
+    coords = shapely.get_coordinates(gp.read_file(path).geometry.to_numpy())
+    np.testing.assert_allclose(coords, np.round(coords, 4), atol=1e-12)
+
+
+def test_layers_are_written_one_at_a_time_while_profiling(tmp_path, layers):
+    profiler = start_profiling()
+    try:
+        write_layers(layers, str(tmp_path), poa.EPSG_WGS84)
+    finally:
+        stop_profiling()
+
+    writes = [record for record in profiler.report()['stages'] if record['stage'].startswith('write ')]
+    assert [record['stage'] for record in writes] == [f'write {name}' for name in NAMES]
+    assert not any(record.get('nested') for record in writes)
+
+
+def test_unknown_format(tmp_path, layers):
+    with pytest.raises(ValueError):
+        write_layers(layers, str(tmp_path), poa.EPSG_WGS84, 'Shapefile')
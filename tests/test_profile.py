@@ -0,0 +1,42 @@
+import threading
+from types import SimpleNamespace
+import pytest
+import sar_profile
+from sar_profile import start_profiling, stop_profiling, stage
+
+
+@pytest.fixture
+def profiler():
+    yield start_profiling(cprofile=True)
+    stop_profiling()
+
+
+@pytest.mark.parametrize('platform, maxrss, expected', [('darwin', 300 * 2 ** 20, 300), ('linux', 300 * 2 ** 10, 300)])
+def test_max_rss_units(monkeypatch, platform, maxrss, expected):
+    usage = SimpleNamespace(ru_maxrss=maxrss)
+    monkeypatch.setattr(sar_profile, 'resource', SimpleNamespace(RUSAGE_SELF=0, getrusage=lambda who: usage))
+    monkeypatch.setattr(sar_profile.sys, 'platform', platform)
+    assert sar_profile._max_rss() == expected
+
+
+def test_nested_and_threaded_stages_only_record_time(profiler):
+    def worker():
+        with stage('thread'):
+            pass
+
+    with stage('outer'):
+        with stage('inner'):
+            pass
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+    with stage('next'):
+        pass
+
+    stages = {record['stage']: record for record in profiler.report()['stages']}
+    assert list(stages) == ['outer', 'inner', 'thread', 'next']
+    for name in ('outer', 'next'):
+        assert 'peak_python_heap_mb' in stages[name] and not stages[name].get('nested')
+    for name in ('inner', 'thread'):
+        assert stages[name]['nested'] and set(stages[name]) == {'stage', 'nested', 'seconds'}
+    assert sorted(profiler.profiles) == [0, 3]
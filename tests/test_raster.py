@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+import main as poa
+from sar_exact import create_exact_gdf
+from sar_intersections import intersect_regions
+from sar_raster import render_statistical_areas, raster_region_poa, vector_region_poa, compare_raster_to_vector
+
+# The tolerance documented in raster_region_poa, for 25 m cells
+MAX_DIFFERENCE = 0.25
+MEAN_DIFFERENCE = 0.01
+
+
+@pytest.fixture(scope='module')
+def incident(synthetic):
+    ipp, regions = poa.load_export(synthetic, poa.EPSG_LOCAL)
+    angles, dot = poa.format_angles(poa.dispersion_angles, poa.direction_of_travel)
+    intersects_gdf = create_exact_gdf(ipp=ipp, distances=poa.distances_from_ipp, angles=angles, dot=dot, EPSG_LOCAL=poa.EPSG_LOCAL)
+    return ipp, regions, angles, dot, intersects_gdf
+
+
+def test_vector_region_poa_matches_intersect_regions(incident):
+    _, regions, _, _, intersects_gdf = incident
+    vector_poa = vector_region_poa(regions, intersects_gdf)
+
+    region_intersections_gdf = intersect_regions(regions, intersects_gdf, poa.EPSG_LOCAL)
+    titles = region_intersections_gdf.index.str.split(' | ', regex=False).str[0]
+    expected = region_intersections_gdf['Region_POA'].groupby(titles).first()
+    np.testing.assert_allclose(vector_poa.reindex(expected.index), expected)
+
+
+def test_raster_region_poa_is_within_the_documented_tolerance(incident):
+    ipp, regions, angles, dot, intersects_gdf = incident
+    grid, x_centers, y_centers, area_poa = render_statistical_areas(ipp, poa.distances_from_ipp, angles, dot, regions.total_bounds, 25)
+    raster_poa = raster_region_poa(regions, grid, x_centers, y_centers, area_poa)
+
+    report, summary = compare_raster_to_vector(raster_poa, vector_region_poa(regions, intersects_gdf))
+
+    assert len(report) == len(regions) and not report.isna().any().any()
+    assert summary['cell_size'] == 25
+    assert summary['max_abs_difference'] <= MAX_DIFFERENCE
+    assert summary['mean_abs_difference'] <= MEAN_DIFFERENCE
@@ -0,0 +1,59 @@
+import geopandas as gp
+import shapely
+import pytest
+from shapely.geometry import Polygon, MultiPolygon
+from sar_regions import clean_regions, summarize_cleaning
+
+EPSG_LOCAL = 32617
+
+
+def box(x, y, size):
+    return Polygon([(x, y), (x + size, y), (x + size, y + size), (x, y + size)])
+
+
+@pytest.fixture
+def regions():
+    geometries = {
+        'Square': box(0, 0, 100),
+        # A bow tie drawn by crossing the last two vertices
+        'BowTie': Polygon([(200, 0), (300, 100), (300, 0), (200, 100)]),
+        # A region with a one square meter sliver left over from an edit
+        'Sliver': MultiPolygon([box(400, 0, 100), box(520, 0, 1)]),
+        'Speck': box(600, 0, 2),
+    }
+    return gp.GeoDataFrame({'title': list(geometries)}, geometry=list(geometries.values()), crs=EPSG_LOCAL).set_index('title')
+
+
+def test_invalid_region_is_repaired(regions):
+    assert not regions.geometry['BowTie'].is_valid
+
+    cleaned, report = clean_regions(regions)
+
+    bow_tie = cleaned.geometry['BowTie']
+    assert bow_tie.is_valid and bow_tie.geom_type == 'MultiPolygon'
+    # Both triangles of the bow tie are kept
+    assert bow_tie.area == pytest.approx(5000)
+    assert report['Repaired'].to_dict() == {'Square': False, 'BowTie': True, 'Sliver': False, 'Speck': False}
+
+
+def test_fragments_below_min_area_are_dropped(regions):
+    cleaned, report = clean_regions(regions, min_area=10)
+
+    assert list(cleaned.index) == ['Square', 'BowTie', 'Sliver']
+    assert cleaned.geometry['Sliver'].equals(box(400, 0, 100))
+    # A region that needed nothing is passed through as it was
+    assert cleaned.geometry['Square'] is regions.geometry['Square']
+    assert report.loc['Sliver', 'Dropped_Parts'] == 1 and report.loc['Sliver', 'Dropped_Area'] == pytest.approx(1)
+    assert report.loc['Speck', 'Removed']
+
+    assert summarize_cleaning(report) == {'repaired': 1, 'removed': 1, 'dropped_parts': 2, 'dropped_area_m2': pytest.approx(5)}
+
+
+def test_vertices_are_snapped_to_the_grid():
+    regions = gp.GeoDataFrame({'title': ['Drawn']}, geometry=[Polygon([(0.3, 0.2), (100.4, 0.1), (99.8, 100.3), (0.1, 99.6)])], crs=EPSG_LOCAL).set_index('title')
+
+    cleaned, _ = clean_regions(regions, grid_size=1)
+
+    coords = shapely.get_coordinates(cleaned.geometry.to_numpy())
+    assert (coords == coords.round()).all()
+    assert cleaned.geometry['Drawn'].equals(box(0, 0, 100))
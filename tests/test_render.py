@@ -0,0 +1,58 @@
+import numpy as np
+from matplotlib import colormaps, colors
+from sar_render import declutter, poa_colors
+
+
+def reference_declutter(x, y, widths, heights, priority):
+    """
+    Checks every label against every kept label, highest priority first.
+    """
+    keep = np.zeros(len(x), dtype=bool)
+    for i in np.argsort(-np.asarray(priority), kind='stable'):
+        kept = np.flatnonzero(keep)
+        clash = (np.abs(x[i] - x[kept]) * 2 < widths[i] + widths[kept]) & (np.abs(y[i] - y[kept]) * 2 < heights[i] + heights[kept])
+        keep[i] = not clash.any()
+    return keep
+
+
+def test_overlapping_labels_keep_the_highest_priority():
+    x = np.array([100.0, 105.0, 110.0, 400.0])
+    y = np.array([100.0, 102.0, 98.0, 100.0])
+    widths = np.full(4, 40.0)
+    heights = np.full(4, 12.0)
+
+    keep = declutter(x, y, widths, heights, priority=np.array([1.0, 5.0, 3.0, 0.0]))
+
+    assert keep.tolist() == [False, True, False, True]
+
+
+def test_labels_that_only_touch_are_all_kept():
+    x = np.array([0.0, 40.0, 80.0, 0.0])
+    y = np.array([0.0, 0.0, 0.0, 12.0])
+
+    keep = declutter(x, y, np.full(4, 40.0), np.full(4, 12.0), priority=np.ones(4))
+
+    assert keep.all()
+
+
+def test_declutter_matches_checking_every_label():
+    rng = np.random.default_rng(5)
+    n = 2000
+    x, y = rng.uniform(0, 1500, n), rng.uniform(0, 1500, n)
+    widths, heights = rng.uniform(10, 80, n), rng.uniform(8, 16, n)
+    priority = rng.integers(0, 20, n)
+
+    keep = declutter(x, y, widths, heights, priority)
+
+    assert keep.tolist() == reference_declutter(x, y, widths, heights, priority).tolist()
+    assert 0 < keep.sum() < n
+    assert not declutter(np.array([]), np.array([]), np.array([]), np.array([]), np.array([])).any()
+
+
+def test_poa_colors_match_the_colormap():
+    values = np.array([0.0, 2.5, 7.5, 10.0, 4.0])
+    cmap = colormaps['autumn']
+    expected = [colors.to_hex([int(channel * 255) / 255 for channel in cmap(value / 10)[:3]]) for value in values]
+
+    assert poa_colors(values).tolist() == expected
+    assert poa_colors([]).tolist() == []
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+import main as poa
+from misc_func import circle_segments
+from sar_resolution import resolution_report
+
+# From the coarsest to the finest rings and sector caps
+RESOLUTIONS = [{'tolerance': 50}, {'tolerance': 10}, {'tolerance': 2}, {'area_error': 1e-4}]
+
+
+@pytest.fixture(scope='module')
+def summaries(synthetic):
+    ipp, regions = poa.load_export(synthetic, poa.EPSG_LOCAL)
+    angles, dot = poa.format_angles(poa.dispersion_angles, poa.direction_of_travel)
+    summaries = []
+    for resolution in RESOLUTIONS:
+        intersects_gdf = poa.statistical_areas(ipp, poa.distances_from_ipp, poa.dispersion_angles, poa.direction_of_travel, poa.EPSG_LOCAL,
+                                               resolution=resolution)['Statistical_Intersects']
+        summaries.append(resolution_report(intersects_gdf, regions, ipp, poa.distances_from_ipp, angles, dot, poa.EPSG_LOCAL)[2])
+    return summaries
+
+
+def test_error_falls_as_the_segments_increase(summaries):
+    vertices = [summary['vertices'] for summary in summaries]
+    assert vertices == sorted(vertices) and len(set(vertices)) == len(vertices)
+
+    for name in ('max_area_error', 'mean_area_error', 'mean_region_poa_error'):
+        errors = [summary[name] for summary in summaries]
+        assert errors == sorted(errors, reverse=True), name
+    errors = [summary['max_region_poa_error'] for summary in summaries]
+    assert errors == sorted(errors, reverse=True)
+
+
+@pytest.mark.parametrize('radius', [100, 5000, 20000])
+def test_circle_segments_meet_their_limits(radius):
+    for tolerance in (10, 1, 0.1):
+        segments = circle_segments(radius, tolerance=tolerance)
+        assert radius * (1 - np.cos(np.pi / segments)) <= tolerance or segments == 8
+    for area_error in (1e-2, 1e-3, 1e-4):
+        segments = circle_segments(radius, area_error=area_error)
+        assert 1 - segments * np.sin(2 * np.pi / segments) / (2 * np.pi) <= area_error
+        # One fewer segment would not be enough
+        assert 1 - (segments - 1) * np.sin(2 * np.pi / (segments - 1)) / (2 * np.pi) > area_error
+    assert circle_segments(radius) is None
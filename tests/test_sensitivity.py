@@ -0,0 +1,67 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import main as poa
+from sar_intersections import intersect_regions
+from sar_sensitivity import sensitivity_analysis
+from conftest import SAMPLE
+
+# Errors of the distances and angles, with ten times as many degrees for the direction of travel
+ERRORS = [0.2, 0.05, 0.01, 0.0]
+
+
+@pytest.fixture
+def incident(export):
+    ipp, regions = poa.load_export(export, poa.EPSG_LOCAL)
+    angles, dot = poa.format_angles(poa.dispersion_angles, poa.direction_of_travel)
+    return ipp, regions, angles, dot
+
+
+def deterministic_region_poa(ipp, regions):
+    intersects_gdf = poa.statistical_areas(ipp, poa.distances_from_ipp, poa.dispersion_angles, poa.direction_of_travel, poa.EPSG_LOCAL)['Statistical_Intersects']
+    region_intersections_gdf = intersect_regions(regions, intersects_gdf, poa.EPSG_LOCAL)
+    titles = region_intersections_gdf.index.str.split(' | ', regex=False).str[0]
+    return region_intersections_gdf['Region_POA'].groupby(titles).first().reindex(regions.index, fill_value=0.0)
+
+
+def analyse(incident, error, **kwargs):
+    ipp, regions, angles, dot = incident
+    report = sensitivity_analysis(regions, ipp, poa.distances_from_ipp, angles, dot, runs=100,
+                                  distance_error=error, angle_error=error, dot_error=error * 100, **kwargs)
+    return report.reindex(regions.index)
+
+
+def test_same_seed_same_report(incident):
+    report = analyse(incident, 0.2, seed=7)
+    pd.testing.assert_frame_equal(report, analyse(incident, 0.2, seed=7))
+    assert not report['Mean_POA'].equals(analyse(incident, 0.2, seed=8)['Mean_POA'])
+
+
+def test_scenario_means_converge_to_the_region_poa(incident):
+    ipp, regions, _, _ = incident
+    expected = deterministic_region_poa(ipp, regions)
+
+    reports = [analyse(incident, error, seed=1) for error in ERRORS]
+    errors = [(report['Mean_POA'] - expected).abs().mean() for report in reports]
+    assert errors == sorted(errors, reverse=True)
+
+    # Without any uncertainty every scenario is the nominal one, which only differs from
+    # the overlay where the polar grid approximates a region's edge
+    report = reports[-1]
+    np.testing.assert_allclose(report['Mean_POA'], report['Nominal_POA'])
+    assert (report['Std_POA'] < 1e-9).all()
+    assert (report['Nominal_POA'] - expected).abs().mean() <= 0.02
+    assert (report['Nominal_POA'] - expected).abs().max() <= 0.3
+
+
+def test_seed_option_reaches_the_report(settings, tmp_path):
+    poa = settings
+    reports = []
+    for _ in range(2):
+        poa.configure(poa.parse_arguments([SAMPLE, '--path', str(tmp_path), '--no-show-plots', '--sensitivity',
+                                           '--sensitivity-runs', '50', '--seed', '11']))
+        assert poa.SENSITIVITY_SEED == 11
+        poa.main()
+        reports.append(pd.read_csv(os.path.join(poa.output_path(), 'POA_Sensitivity.csv')))
+    pd.testing.assert_frame_equal(*reports)
@@ -0,0 +1,85 @@
+import json
+import http.client
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+import numpy as np
+import pytest
+import main as poa
+import sar_service
+from sar_intersections import intersect_regions
+from sar_service import Metrics, make_handler, init_worker
+from conftest import SAMPLE
+
+
+@pytest.fixture
+def body():
+    """
+    The sample export with one more region well outside the outer ring.
+    """
+    with open(SAMPLE) as f:
+        export = json.load(f)
+    far = [[-82.2, 35.8], [-82.19, 35.8], [-82.19, 35.81], [-82.2, 35.81], [-82.2, 35.8]]
+    export['features'].append({'type': 'Feature', 'properties': {'title': 'Far'}, 'geometry': {'type': 'Polygon', 'coordinates': [far]}})
+    return json.dumps(export)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """
+    The service on a free local port, calculating in threads instead of worker processes.
+    """
+    monkeypatch.setattr(sar_service, '_cache', None)
+    init_worker(4, None)
+    metrics = Metrics()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(pool, metrics))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server.server_address[1]
+        server.shutdown()
+        server.server_close()
+
+
+def request(port, method, path, body=None):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    connection.request(method, path, body=body.encode() if body else None)
+    response = connection.getresponse()
+    result = response.status, json.loads(response.read())
+    connection.close()
+    return result
+
+
+def test_poa_and_metrics(service, body):
+    status, result = request(service, 'POST', '/poa?outputs=Regions_Bisected,DIPP_Annuli', body)
+
+    assert status == 200
+    assert [region['title'] for region in result['regions']] == ['RegA', 'RegB', 'Far']
+    ipp, regions = poa.load_export(SAMPLE, poa.EPSG_LOCAL)
+    intersects_gdf = poa.statistical_areas(ipp, poa.distances_from_ipp, poa.dispersion_angles, poa.direction_of_travel, poa.EPSG_LOCAL)['Statistical_Intersects']
+    region_intersections_gdf = intersect_regions(regions, intersects_gdf, poa.EPSG_LOCAL)
+    expected = region_intersections_gdf.groupby(region_intersections_gdf.index.str.split(' | ', regex=False).str[0])['Region_POA'].first()
+    np.testing.assert_allclose([region['Region_POA'] for region in result['regions']], list(expected[['RegA', 'RegB']]) + [0.0])
+
+    assert set(result['layers']) == {'Regions_Bisected', 'DIPP_Annuli'}
+    assert result['layers']['Regions_Bisected']['type'] == 'FeatureCollection'
+    assert len(result['layers']['Regions_Bisected']['features']) == len(region_intersections_gdf)
+    assert result['cache_hit'] is False
+
+    # The second request with the same IPP and inputs reuses the statistical areas
+    status, result = request(service, 'POST', '/poa?outputs=Regions_Bisected,DIPP_Annuli', body)
+    assert status == 200 and result['cache_hit'] is True
+
+    status, result = request(service, 'POST', '/poa?distances=1,2', body)
+    assert status == 400 and 'five values' in result['error']
+
+    status, metrics = request(service, 'GET', '/metrics')
+    assert status == 200
+    assert (metrics['requests'], metrics['errors'], metrics['cache_hits']) == (3, 1, 1)
+    assert metrics['stages']['region_overlay']['count'] == 2
+
+
+def test_health_and_unknown_paths(service):
+    assert request(service, 'GET', '/health') == (200, {'status': 'ok'})
+    assert request(service, 'GET', '/nothing')[0] == 404
+    assert request(service, 'POST', '/nothing', '{}')[0] == 404
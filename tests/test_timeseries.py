@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import main as poa
+from sar_timeseries import scale_distances, time_series_poa
+
+HOURS = [2, 8, 24, 36]
+
+
+def region_poa(file, distances):
+    """
+    The Region_POA of each region from a single run.
+    """
+    layers = poa.calculate_poa(file, list(distances), poa.dispersion_angles, poa.direction_of_travel, poa.EPSG_LOCAL)
+    region_intersections_gdf = layers['Regions_Bisected']
+    titles = region_intersections_gdf.index.str.split(' | ', regex=False).str[0]
+    return pd.Series(region_intersections_gdf['Region_POA'].to_numpy(), index=titles).groupby(level=0).first()
+
+
+def test_scale_distances_stops_at_the_reference_time():
+    distances = scale_distances(poa.distances_from_ipp, [6, 24, 48], reference_hours=24, exponent=0.5)
+    np.testing.assert_allclose(distances[0], np.asarray(poa.distances_from_ipp) * 0.5)
+    np.testing.assert_allclose(distances[1], poa.distances_from_ipp)
+    np.testing.assert_allclose(distances[2], poa.distances_from_ipp)
+
+
+def test_time_series_steps_match_single_runs(export):
+    ipp, regions = poa.load_export(export, poa.EPSG_LOCAL)
+    angles, dot = poa.format_angles(poa.dispersion_angles, poa.direction_of_travel)
+    distances = scale_distances(poa.distances_from_ipp, HOURS)
+
+    table = time_series_poa(regions, ipp, distances, angles, dot, poa.EPSG_LOCAL, hours=HOURS)
+
+    assert list(table.columns) == HOURS
+    for hours, step_distances in zip(HOURS, distances):
+        expected = region_poa(export, step_distances)
+        # Regions outside every statistical area have no pieces in a single run
+        expected = expected.reindex(table.index.unique(), fill_value=0.0)
+        np.testing.assert_allclose(table[hours].groupby(level=0).first().reindex(expected.index), expected, atol=1e-9)
+
+
+def test_time_series_starting_at_zero_hours(export):
+    ipp, regions = poa.load_export(export, poa.EPSG_LOCAL)
+    angles, dot = poa.format_angles(poa.dispersion_angles, poa.direction_of_travel)
+    hours = [0, 1, 24]
+    distances = scale_distances(poa.distances_from_ipp, hours)
+
+    table = time_series_poa(regions, ipp, distances, angles, dot, poa.EPSG_LOCAL, hours=hours)
+
+    # Every ring is a point at 0 hours, so no region has any POA yet
+    assert (table[0] == 0).all()
+    later = time_series_poa(regions, ipp, distances[1:], angles, dot, poa.EPSG_LOCAL, hours=hours[1:])
+    pd.testing.assert_frame_equal(table[hours[1:]], later)
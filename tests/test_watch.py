@@ -0,0 +1,55 @@
+import os
+from types import SimpleNamespace
+import geopandas as gp
+import shapely
+import main as poa
+from sar_intersections import intersect_regions
+import sar_watch
+from sar_watch import update_regions, collect_pieces, wait_for_change
+from conftest import SAMPLE
+
+
+def test_wait_for_change_survives_the_file_being_replaced(tmp_path, monkeypatch):
+    export = tmp_path / 'export.json'
+    export.write_text('{}')
+    last = os.stat(export)
+
+    # Each poll runs the next step of an editor saving by removing and renaming the file
+    steps = iter([
+        lambda: export.write_text('{"features": []}'),
+        export.unlink,
+        lambda: export.write_text('{"features": [1]}'),
+        lambda: None,
+    ])
+    monkeypatch.setattr(sar_watch, 'time', SimpleNamespace(sleep=lambda interval: next(steps)()))
+
+    current = wait_for_change(str(export), (last.st_mtime_ns, last.st_size), 0.1)
+    assert current == (os.stat(export).st_mtime_ns, os.stat(export).st_size)
+
+
+def test_update_regions_only_recomputes_changed_regions():
+    ipp, regions = poa.load_export(SAMPLE, poa.EPSG_LOCAL)
+    layers = poa.statistical_areas(ipp, poa.distances_from_ipp, poa.dispersion_angles, poa.direction_of_travel, poa.EPSG_LOCAL)
+    intersects_gdf = layers['Statistical_Intersects']
+
+    state, changes = update_regions({}, regions, intersects_gdf, poa.EPSG_LOCAL, poa.EPSG_WGS84)
+    assert changes['added'] == state['keys']
+
+    moved = regions.copy()
+    moved.geometry = [shapely.affinity.translate(moved.geometry.iloc[0], xoff=10)] + list(moved.geometry.iloc[1:])
+    state, changes = update_regions(state, moved, intersects_gdf, poa.EPSG_LOCAL, poa.EPSG_WGS84)
+    assert changes == {'added': [], 'changed': [state['keys'][0]], 'removed': []}
+
+    # The reused and recomputed pieces together match a full overlay
+    expected = intersect_regions(moved, intersects_gdf, poa.EPSG_LOCAL)
+    pieces = collect_pieces(state)
+    assert list(pieces.index) == list(expected.index)
+    assert shapely.equals_exact(pieces.geometry.to_numpy(), expected.geometry.to_numpy(), tolerance=1e-6).all()
+
+
+def test_collect_pieces_without_regions():
+    regions = gp.GeoDataFrame({'title': []}, geometry=[], crs=poa.EPSG_LOCAL).set_index('title')
+    state, _ = update_regions({}, regions, None, poa.EPSG_LOCAL, poa.EPSG_WGS84)
+
+    pieces = collect_pieces(state)
+    assert pieces.empty and pieces.crs.to_epsg() == poa.EPSG_LOCAL